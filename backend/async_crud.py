@@ -0,0 +1,254 @@
+# async_crud.py
+# AsyncSession counterparts of the crud functions served by async_main.
+# Query building is shared with crud; relationships are always eager-loaded
+# because lazy loads cannot run under asyncio.
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import auth
+import changelog
+import crud
+import etags
+import importer
+import models
+import read_cache
+import schemas
+import stats
+import versions
+
+
+# User operations
+async def get_user_by_email(db: AsyncSession, email: str):
+    result = await db.execute(select(models.User).filter(models.User.email == email))
+    return result.scalars().first()
+
+
+async def create_user(db: AsyncSession, user: schemas.UserCreate, hashed_password: str):
+    db_user = models.User(
+        email=user.email,
+        name=user.name,
+        hashed_password=hashed_password
+    )
+    db.add(db_user)
+    await db.commit()
+    await db.refresh(db_user)
+    return db_user
+
+
+async def update_user_password_hash(db: AsyncSession, user: models.User, hashed_password: str):
+    user.hashed_password = hashed_password
+    await db.commit()
+    return user
+
+
+async def load_principal(token: str, db: AsyncSession):
+    claims = auth.decode_token(token)
+    user = await get_user_by_email(db, email=claims["sub"])
+    if user is None:
+        raise auth.credentials_exception()
+    principal = auth.Principal.from_user(user)
+    if not principal.is_active:
+        raise auth.credentials_exception()
+    auth.principal_cache.store(token, claims, principal)
+    return principal
+
+
+# Team operations
+async def get_team(db: AsyncSession, team_id: int):
+    return await db.get(models.Team, team_id)
+
+
+async def create_team(db: AsyncSession, team: schemas.TeamCreate):
+    db_team = models.Team(**team.dict())
+    db.add(db_team)
+    await db.run_sync(versions.bump, "teams")
+    await db.commit()
+    await db.refresh(db_team)
+    return db_team
+
+
+async def update_team(db: AsyncSession, team_id: int, values: dict):
+    # See crud.update_row; the session does not expire on commit
+    if not values:
+        return await get_team(db, team_id)
+    db_team = await db.run_sync(crud.update_row, models.Team, team_id, values)
+    if db_team is None:
+        return None
+    await db.run_sync(versions.bump, "teams")
+    await db.run_sync(changelog.record_team, team_id)
+    await db.commit()
+    return db_team
+
+
+async def delete_team(db: AsyncSession, team_id: int):
+    db_team = await get_team(db, team_id)
+    # See crud.delete_team
+    rows = await db.run_sync(crud.locked_task_rows_where, models.Task.team_id == team_id)
+    await db.delete(db_team)
+    await db.run_sync(stats.record, added=[dict(row._mapping, team_id=None) for row in rows], removed=rows)
+    await db.run_sync(versions.bump, "teams")
+    await db.run_sync(changelog.record_team, team_id)
+    await db.commit()
+    return db_team
+
+
+# Member operations
+async def get_member(db: AsyncSession, member_id: int, populate_existing: bool = False):
+    query = select(models.Member).options(*crud.member_loaders()).filter(models.Member.id == member_id)
+    if populate_existing:
+        query = query.execution_options(populate_existing=True)
+    return (await db.execute(query)).scalars().first()
+
+
+async def create_member(db: AsyncSession, member: schemas.MemberCreate):
+    db_member = models.Member(**member.dict())
+    db.add(db_member)
+    await db.run_sync(versions.bump, "members")
+    await db.commit()
+    return await get_member(db, db_member.id, populate_existing=True)
+
+
+async def update_member(db: AsyncSession, member_id: int, values: dict):
+    if not values:
+        return await get_member(db, member_id)
+    db_member = await db.run_sync(
+        crud.update_row, models.Member, member_id, values, crud.member_loaders(many=True)
+    )
+    if db_member is None:
+        return None
+    await db.run_sync(versions.bump, "members")
+    await db.run_sync(changelog.record_member, member_id)
+    await db.commit()
+    return db_member
+
+
+async def delete_member(db: AsyncSession, member_id: int):
+    db_member = await get_member(db, member_id)
+    # See crud.delete_member
+    rows = await db.run_sync(crud.locked_task_rows_where, models.Task.assignee_id == member_id)
+    await db.delete(db_member)
+    await db.run_sync(stats.record, added=[dict(row._mapping, assignee_id=None) for row in rows], removed=rows)
+    await db.run_sync(versions.bump, "members")
+    await db.run_sync(changelog.record_member, member_id)
+    await db.commit()
+    return db_member
+
+
+# Task operations
+async def get_task(db: AsyncSession, task_id: int, populate_existing: bool = False, for_update: bool = False):
+    query = select(models.Task).options(*crud.task_loaders()).filter(models.Task.id == task_id)
+    if for_update:
+        # See crud.get_task_for_update
+        query = query.with_for_update(of=models.Task)
+        populate_existing = True
+    if populate_existing:
+        query = query.execution_options(populate_existing=True)
+    return (await db.execute(query)).scalars().first()
+
+
+async def create_task(db: AsyncSession, task: schemas.TaskCreate, user_id: int):
+    db_task = models.Task(**task.dict(), creator_id=user_id)
+    db.add(db_task)
+    await db.flush()
+    await db.run_sync(stats.record, added=[db_task])
+    await db.run_sync(changelog.record, upserted=[db_task.id])
+    await db.commit()
+    return await get_task(db, db_task.id, populate_existing=True)
+
+
+async def update_task(db: AsyncSession, task_id: int, values: dict):
+    # See crud.update_task
+    if not values:
+        return await get_task(db, task_id)
+    before = None
+    if set(values) & set(stats.DIMENSIONS.values()):
+        before = await db.run_sync(crud.locked_task_rows, [task_id])
+        if not before:
+            return None
+    db_task = await db.run_sync(crud.update_row, models.Task, task_id, values)
+    if db_task is None:
+        return None
+    await db.run_sync(crud.load_task_relations, db_task)
+    if before:
+        await db.run_sync(stats.record, added=[db_task], removed=before)
+    await db.run_sync(changelog.record, upserted=[task_id], previous=before or ())
+    await db.commit()
+    return db_task
+
+
+async def update_task_status(db: AsyncSession, task_id: int, status: str):
+    return await update_task(db, task_id, {"status": status})
+
+
+async def delete_task(db: AsyncSession, task_id: int):
+    db_task = await get_task(db, task_id, for_update=True)
+    await db.delete(db_task)
+    await db.run_sync(stats.record, removed=[db_task])
+    await db.run_sync(changelog.record, deleted=[task_id])
+    await db.commit()
+    return db_task
+
+
+# The read routes, calendar, bulk, import, stats and sync run the sync
+# implementations on the AsyncSession's sync session, so both apps share the
+# read cache, ETags and serializers; they load everything they return up
+# front. Inside run_sync the search backend probe and every other statement
+# go through the session's own connection.
+async def list_etag(db: AsyncSession, tables, query_params):
+    return await db.run_sync(etags.list_etag, tables, query_params)
+
+
+async def detail_etag(db: AsyncSession, model, id: int, tables):
+    return await db.run_sync(etags.detail_etag, model, id, tables)
+
+
+async def get_cached_teams(db: AsyncSession, **params):
+    return await db.run_sync(read_cache.get_teams, **params)
+
+
+async def get_cached_team(db: AsyncSession, team_id: int):
+    return await db.run_sync(read_cache.get_team, team_id)
+
+
+async def get_cached_members(db: AsyncSession, **params):
+    return await db.run_sync(read_cache.get_members, **params)
+
+
+async def get_cached_member(db: AsyncSession, member_id: int):
+    return await db.run_sync(read_cache.get_member, member_id)
+
+
+async def get_cached_tasks(db: AsyncSession, projection=None, **filters):
+    return await db.run_sync(read_cache.get_tasks, projection=projection, **filters)
+
+
+async def get_task_calendar(db: AsyncSession, **kwargs):
+    return await db.run_sync(crud.get_task_calendar, **kwargs)
+
+
+async def bulk_create_tasks(db: AsyncSession, tasks, user_id: int):
+    return await db.run_sync(crud.bulk_create_tasks, tasks=tasks, user_id=user_id)
+
+
+async def bulk_update_task_status(db: AsyncSession, ids, status: str):
+    return await db.run_sync(crud.bulk_update_task_status, ids=ids, status=status)
+
+
+async def bulk_delete_tasks(db: AsyncSession, ids):
+    return await db.run_sync(crud.bulk_delete_tasks, ids=ids)
+
+
+async def get_task_stats(db: AsyncSession):
+    return await db.run_sync(stats.summary)
+
+
+async def get_task_changes(db: AsyncSession, since, limit: int):
+    return await db.run_sync(crud.get_task_changes, since, limit)
+
+
+async def import_records(db: AsyncSession, kind: str, stream, format: str, creator_id: int, batch_size: int):
+    # Each batch commits through the event loop; parsing between batches
+    # holds it for at most batch_size records
+    return await db.run_sync(
+        importer.import_stream, kind, stream, format, creator_id=creator_id, batch_size=batch_size
+    )
@@ -0,0 +1,41 @@
+# async_database.py
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from database import DATABASE_URL, apply_sqlite_pragmas, engine_options, is_sqlite_memory
+
+# Same database as database.py, through an asyncio driver:
+# aiosqlite for local SQLite files, asyncpg for PostgreSQL
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+
+def async_url(url: str) -> str:
+    scheme, rest = url.split("://", 1)
+    dialect = scheme.split("+", 1)[0]
+    return f"{ASYNC_DRIVERS.get(dialect, scheme)}://{rest}"
+
+
+ASYNC_DATABASE_URL = async_url(DATABASE_URL)
+
+# Same pool sizing and SQLite PRAGMAs as the sync engine. aiosqlite defaults to
+# NullPool, so the queue pool is requested explicitly.
+async_engine_options = engine_options(ASYNC_DATABASE_URL, pooled=False)
+if "pool_size" in async_engine_options:
+    async_engine_options["poolclass"] = AsyncAdaptedQueuePool
+
+async_engine = create_async_engine(ASYNC_DATABASE_URL, **async_engine_options)
+if ASYNC_DATABASE_URL.startswith("sqlite") and not is_sqlite_memory(ASYNC_DATABASE_URL):
+    event.listen(async_engine.sync_engine, "connect", apply_sqlite_pragmas)
+# Objects stay loaded after commit so handlers can serialize them without
+# an implicit (and, under asyncio, impossible) lazy refresh
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+
+# Dependency to get the async database session
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,632 @@
+# async_main.py
+# Async variant of main.py: same routes, served with AsyncSession so blocked
+# database calls do not hold Starlette threadpool threads.
+# Select it with DATABASE_MODE=async or run `uvicorn async_main:app`.
+from fastapi import FastAPI, Depends, File, HTTPException, Query, Request, Response, UploadFile, status
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import date
+from typing import List, Optional
+import os
+import schemas
+import async_crud
+import changelog
+import crud
+import diagnostics
+import etags
+import export
+import importer
+import metrics
+import models
+import pagination
+import projection
+import serializers
+import stream
+import task_calendar
+import versions
+from async_database import async_engine, get_async_db
+from auth import create_access_token, get_stream_user, oauth2_scheme, principal_cache
+from database import engine
+from hashing import HasherBusy, password_hasher
+from sweeper import overdue_sweeper
+
+app = FastAPI(title="Task Management API")
+
+# CORS middleware
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],  # In production, replace with specific origins
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
+)
+
+# Request timing and per-request query counts for /metrics
+if metrics.METRICS_ENABLED:
+    app.add_middleware(metrics.MetricsMiddleware)
+    metrics.install(async_engine.sync_engine)
+    metrics.install(engine)
+
+# Slow-query log and N+1 detection, off unless DIAGNOSTICS_ENABLED=1
+if diagnostics.DIAGNOSTICS_ENABLED:
+    app.add_middleware(diagnostics.DiagnosticsMiddleware)
+    diagnostics.install(async_engine.sync_engine)
+    diagnostics.install(engine)
+
+
+@app.on_event("startup")
+async def startup():
+    # The schema is created and upgraded by `python migrate.py upgrade`
+    overdue_sweeper.start()
+    stream.task_stream.start()
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    await overdue_sweeper.stop()
+    await stream.task_stream.stop()
+    password_hasher.shutdown()
+    await async_engine.dispose()
+
+
+@app.exception_handler(HasherBusy)
+async def password_hasher_busy(request: Request, exc: HasherBusy):
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Too many authentication requests, retry shortly"},
+        headers={"Retry-After": "1"},
+    )
+
+
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)):
+    principal = principal_cache.lookup(token)
+    if principal is None:
+        principal = await async_crud.load_principal(token, db)
+    return principal
+
+
+def set_next_cursor(response: Response, rows, limit: int, sort: Optional[str]):
+    cursor = pagination.next_cursor(rows, limit, sort)
+    if cursor:
+        response.headers["X-Next-Cursor"] = cursor
+
+
+def invalid_cursor(exc: pagination.InvalidCursor):
+    return HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+
+
+# Authentication routes
+@app.post("/api/auth/register", response_model=schemas.User)
+async def register_user(user: schemas.UserCreate, db: AsyncSession = Depends(get_async_db)):
+    db_user = await async_crud.get_user_by_email(db, email=user.email)
+    if db_user:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Email already registered"
+        )
+    hashed_password = await password_hasher.hash(user.password)
+    return await async_crud.create_user(db=db, user=user, hashed_password=hashed_password)
+
+
+@app.post("/api/auth/login")
+async def login(user_credentials: schemas.UserLogin, db: AsyncSession = Depends(get_async_db)):
+    user = await async_crud.get_user_by_email(db, email=user_credentials.email)
+    valid, new_hash = False, None
+    if user:
+        valid, new_hash = await password_hasher.verify_and_update(
+            user_credentials.password, user.hashed_password
+        )
+    if not valid:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Incorrect email or password",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    if new_hash:
+        await async_crud.update_user_password_hash(db, user, new_hash)
+
+    access_token = create_access_token(
+        data={"sub": user.email}
+    )
+
+    return {
+        "token": access_token,
+        "token_type": "bearer",
+        "user": {
+            "id": user.id,
+            "name": user.name,
+            "email": user.email
+        }
+    }
+
+
+# Read routes answer 304s, use the read cache and serialize like main.py
+# Task routes
+@app.get("/api/tasks", response_model=List[schemas.Task])
+async def read_tasks(
+        request: Request,
+        response: Response,
+        skip: int = 0,
+        limit: int = 100,
+        member_id: Optional[int] = None,
+        team_id: Optional[int] = None,
+        status: Optional[str] = None,
+        search: Optional[str] = None,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        cursor: Optional[str] = None,
+        sort: Optional[str] = None,
+        fields: Optional[str] = Query(
+            None, description="Comma-separated schemas.Task fields, e.g. id,title,assignee.name"
+        ),
+        expand: Optional[str] = Query(None, description="Relationships to embed whole: assignee, team"),
+        db: AsyncSession = Depends(get_async_db),
+        current_user: schemas.User = Depends(get_current_user)
+):
+    try:
+        task_projection = projection.parse_task_fields(fields, expand, sort)
+    except (projection.InvalidFields, pagination.InvalidCursor) as exc:
+        # status is shadowed by the filter parameter here
+        raise HTTPException(status_code=400, detail=str(exc))
+    not_modified = etags.conditional(
+        request, response, await async_crud.list_etag(db, versions.TASK_TABLES, request.query_params)
+    )
+    if not_modified:
+        return not_modified
+    try:
+        tasks = await async_crud.get_cached_tasks(
+            db,
+            skip=skip,
+            limit=limit,
+            member_id=member_id,
+            team_id=team_id,
+            status=status,
+            search=search,
+            start_date=start_date,
+            end_date=end_date,
+            cursor=cursor,
+            sort=sort,
+            projection=task_projection
+        )
+    except pagination.InvalidCursor as exc:
+        raise invalid_cursor(exc)
+    if sort or cursor or not search:
+        set_next_cursor(response, tasks, limit, sort)
+    return serializers.respond(
+        schemas.Task, tasks, response, many=True, sparse=task_projection is not None
+    )
+
+
+@app.get("/api/tasks/calendar", response_model=schemas.TaskCalendar)
+async def read_task_calendar(
+        from_date: date = Query(..., alias="from"),
+        to_date: date = Query(..., alias="to"),
+        granularity: str = Query("day", regex="^(day|week)$"),
+        member_id: Optional[int] = None,
+        team_id: Optional[int] = None,
+        status: Optional[str] = None,
+        db: AsyncSession = Depends(get_async_db),
+        current_user: schemas.User = Depends(get_current_user)
+):
+    try:
+        calendar = await async_crud.get_task_calendar(
+            db,
+            start=from_date,
+            end=to_date,
+            granularity=granularity,
+            member_id=member_id,
+            team_id=team_id,
+            status=status
+        )
+    except task_calendar.InvalidRange as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    return serializers.respond(schemas.TaskCalendar, calendar)
+
+
+# The export streams from the sync engine: StreamingResponse iterates it in
+# the threadpool, so the rows are never fetched on the event loop
+@app.get("/api/tasks/export")
+async def export_tasks(
+        format: str = Query("ndjson", regex="^(ndjson|csv)$"),
+        member_id: Optional[int] = None,
+        team_id: Optional[int] = None,
+        status: Optional[str] = None,
+        search: Optional[str] = None,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        current_user: schemas.User = Depends(get_current_user)
+):
+    try:
+        query = crud.task_export_query(
+            engine,
+            member_id=member_id,
+            team_id=team_id,
+            status=status,
+            search=search,
+            start_date=start_date,
+            end_date=end_date
+        )
+    except ValueError as exc:
+        # Fail before the stream starts; a bad date cannot be reported mid-body
+        raise HTTPException(status_code=400, detail=str(exc))
+    return StreamingResponse(
+        export.stream_tasks(query, format),
+        media_type=export.EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="tasks.{format}"'},
+    )
+
+
+# Bulk task routes; registered before /api/tasks/{task_id} so "bulk" is not
+# parsed as a task id
+@app.post("/api/tasks/bulk", response_model=schemas.BulkResult)
+async def bulk_create_tasks(
+        payload: schemas.TaskBulkCreate,
+        db: AsyncSession = Depends(get_async_db),
+        current_user: schemas.User = Depends(get_current_user)
+):
+    return await async_crud.bulk_create_tasks(db=db, tasks=payload.tasks, user_id=current_user.id)
+
+
+@app.patch("/api/tasks/bulk/status", response_model=schemas.BulkResult)
+async def bulk_update_task_status(
+        payload: schemas.TaskBulkStatusUpdate,
+        db: AsyncSession = Depends(get_async_db),
+        current_user: schemas.User = Depends(get_current_user)
+):
+    return await async_crud.bulk_update_task_status(db=db, ids=payload.ids, status=payload.status)
+
+
+@app.delete("/api/tasks/bulk", response_model=schemas.BulkResult)
+async def bulk_delete_tasks(
+        payload: schemas.TaskBulkDelete,
+        db: AsyncSession = Depends(get_async_db),
+        current_user: schemas.User = Depends(get_current_user)
+):
+    return await async_crud.bulk_delete_tasks(db=db, ids=payload.ids)
+
+
+@app.get("/api/tasks/{task_id}", response_model=schemas.Task)
+async def read_task(
+        request: Request,
+        response: Response,
+        task_id: int,
+        db: AsyncSession = Depends(get_async_db),
+        current_user: schemas.User = Depends(get_current_user)
+):
+    not_modified = etags.conditional(
+        request, response, await async_crud.detail_etag(db, models.Task, task_id, versions.TASK_TABLES)
+    )
+    if not_modified:
+        return not_modified
+    db_task = await async_crud.get_task(db, task_id=task_id)
+    if db_task is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+    return serializers.respond(schemas.Task, db_task, response)
+
+
+@app.post("/api/tasks", response_model=schemas.Task)
+async def create_task(
+        task: schemas.TaskCreate,
+        db: AsyncSession = Depends(get_async_db),
+        current_user: schemas.User = Depends(get_current_user)
+):
+    return await async_crud.create_task(db=db, task=task, user_id=current_user.id)
+
+
+@app.put("/api/tasks/{task_id}", response_model=schemas.Task)
+async def update_task(
+        task_id: int,
+        task: schemas.TaskUpdate,
+        db: AsyncSession = Depends(get_async_db),
+        current_user: schemas.User = Depends(get_current_user)
+):
+    db_task = await async_crud.update_task(db=db, task_id=task_id, values=task.dict())
+    if db_task is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+    return db_task
+
+
+@app.patch("/api/tasks/{task_id}", response_model=schemas.Task)
+async def patch_task(
+        task_id: int,
+        task: schemas.TaskPatch,
+        db: AsyncSession = Depends(get_async_db),
+        current_user: schemas.User = Depends(get_current_user)
+):
+    db_task = await async_crud.update_task(db=db, task_id=task_id, values=task.dict(exclude_unset=True))
+    if db_task is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+    return db_task
+
+
+@app.patch("/api/tasks/{task_id}/status", response_model=schemas.Task)
+async def update_task_status(
+        task_id: int,
+        status_update: schemas.TaskStatusUpdate,
+        db: AsyncSession = Depends(get_async_db),
+        current_user: schemas.User = Depends(get_current_user)
+):
+    db_task = await async_crud.update_task_status(db=db, task_id=task_id, status=status_update.status)
+    if db_task is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+    return db_task
+
+
+@app.delete("/api/tasks/{task_id}", response_model=schemas.Task)
+async def delete_task(
+        task_id: int,
+        db: AsyncSession = Depends(get_async_db),
+        current_user: schemas.User = Depends(get_current_user)
+):
+    db_task = await async_crud.get_task(db, task_id=task_id)
+    if db_task is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+    return await async_crud.delete_task(db=db, task_id=task_id)
+
+
+# Member routes
+@app.get("/api/members", response_model=List[schemas.Member])
+async def read_members(
+        request: Request,
+        response: Response,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        sort: Optional[str] = None,
+        db: AsyncSession = Depends(get_async_db),
+        current_user: schemas.User = Depends(get_current_user)
+):
+    not_modified = etags.conditional(
+        request, response, await async_crud.list_etag(db, versions.MEMBER_TABLES, request.query_params)
+    )
+    if not_modified:
+        return not_modified
+    try:
+        members = await async_crud.get_cached_members(db, skip=skip, limit=limit, cursor=cursor, sort=sort)
+    except pagination.InvalidCursor as exc:
+        raise invalid_cursor(exc)
+    set_next_cursor(response, members, limit, sort)
+    return serializers.respond(schemas.Member, members, response, many=True)
+
+
+@app.get("/api/members/{member_id}", response_model=schemas.Member)
+async def read_member(
+        request: Request,
+        response: Response,
+        member_id: int,
+        db: AsyncSession = Depends(get_async_db),
+        current_user: schemas.User = Depends(get_current_user)
+):
+    etag = await async_crud.detail_etag(db, models.Member, member_id, versions.MEMBER_TABLES)
+    not_modified = etags.conditional(request, response, etag)
+    if not_modified:
+        return not_modified
+    db_member = await async_crud.get_cached_member(db, member_id=member_id)
+    if db_member is None:
+        raise HTTPException(status_code=404, detail="Member not found")
+    return serializers.respond(schemas.Member, db_member, response)
+
+
+@app.post("/api/members", response_model=schemas.Member)
+async def create_member(
+        member: schemas.MemberCreate,
+        db: AsyncSession = Depends(get_async_db),
+        current_user: schemas.User = Depends(get_current_user)
+):
+    return await async_crud.create_member(db=db, member=member)
+
+
+@app.put("/api/members/{member_id}", response_model=schemas.Member)
+async def update_member(
+        member_id: int,
+        member: schemas.MemberUpdate,
+        db: AsyncSession = Depends(get_async_db),
+        current_user: schemas.User = Depends(get_current_user)
+):
+    db_member = await async_crud.update_member(db=db, member_id=member_id, values=member.dict())
+    if db_member is None:
+        raise HTTPException(status_code=404, detail="Member not found")
+    return db_member
+
+
+@app.patch("/api/members/{member_id}", response_model=schemas.Member)
+async def patch_member(
+        member_id: int,
+        member: schemas.MemberPatch,
+        db: AsyncSession = Depends(get_async_db),
+        current_user: schemas.User = Depends(get_current_user)
+):
+    db_member = await async_crud.update_member(db=db, member_id=member_id, values=member.dict(exclude_unset=True))
+    if db_member is None:
+        raise HTTPException(status_code=404, detail="Member not found")
+    return db_member
+
+
+@app.delete("/api/members/{member_id}", response_model=schemas.Member)
+async def delete_member(
+        member_id: int,
+        db: AsyncSession = Depends(get_async_db),
+        current_user: schemas.User = Depends(get_current_user)
+):
+    db_member = await async_crud.get_member(db, member_id=member_id)
+    if db_member is None:
+        raise HTTPException(status_code=404, detail="Member not found")
+    return await async_crud.delete_member(db=db, member_id=member_id)
+
+
+# Team routes
+@app.get("/api/teams", response_model=List[schemas.Team])
+async def read_teams(
+        request: Request,
+        response: Response,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        sort: Optional[str] = None,
+        db: AsyncSession = Depends(get_async_db),
+        current_user: schemas.User = Depends(get_current_user)
+):
+    not_modified = etags.conditional(
+        request, response, await async_crud.list_etag(db, versions.TEAM_TABLES, request.query_params)
+    )
+    if not_modified:
+        return not_modified
+    try:
+        teams = await async_crud.get_cached_teams(db, skip=skip, limit=limit, cursor=cursor, sort=sort)
+    except pagination.InvalidCursor as exc:
+        raise invalid_cursor(exc)
+    set_next_cursor(response, teams, limit, sort)
+    return serializers.respond(schemas.Team, teams, response, many=True)
+
+
+@app.get("/api/teams/{team_id}", response_model=schemas.Team)
+async def read_team(
+        request: Request,
+        response: Response,
+        team_id: int,
+        db: AsyncSession = Depends(get_async_db),
+        current_user: schemas.User = Depends(get_current_user)
+):
+    not_modified = etags.conditional(
+        request, response, await async_crud.detail_etag(db, models.Team, team_id, versions.TEAM_TABLES)
+    )
+    if not_modified:
+        return not_modified
+    db_team = await async_crud.get_cached_team(db, team_id=team_id)
+    if db_team is None:
+        raise HTTPException(status_code=404, detail="Team not found")
+    return serializers.respond(schemas.Team, db_team, response)
+
+
+@app.post("/api/teams", response_model=schemas.Team)
+async def create_team(
+        team: schemas.TeamCreate,
+        db: AsyncSession = Depends(get_async_db),
+        current_user: schemas.User = Depends(get_current_user)
+):
+    return await async_crud.create_team(db=db, team=team)
+
+
+@app.put("/api/teams/{team_id}", response_model=schemas.Team)
+async def update_team(
+        team_id: int,
+        team: schemas.TeamUpdate,
+        db: AsyncSession = Depends(get_async_db),
+        current_user: schemas.User = Depends(get_current_user)
+):
+    db_team = await async_crud.update_team(db=db, team_id=team_id, values=team.dict())
+    if db_team is None:
+        raise HTTPException(status_code=404, detail="Team not found")
+    return db_team
+
+
+@app.patch("/api/teams/{team_id}", response_model=schemas.Team)
+async def patch_team(
+        team_id: int,
+        team: schemas.TeamPatch,
+        db: AsyncSession = Depends(get_async_db),
+        current_user: schemas.User = Depends(get_current_user)
+):
+    db_team = await async_crud.update_team(db=db, team_id=team_id, values=team.dict(exclude_unset=True))
+    if db_team is None:
+        raise HTTPException(status_code=404, detail="Team not found")
+    return db_team
+
+
+@app.delete("/api/teams/{team_id}", response_model=schemas.Team)
+async def delete_team(
+        team_id: int,
+        db: AsyncSession = Depends(get_async_db),
+        current_user: schemas.User = Depends(get_current_user)
+):
+    db_team = await async_crud.get_team(db, team_id=team_id)
+    if db_team is None:
+        raise HTTPException(status_code=404, detail="Team not found")
+    return await async_crud.delete_team(db=db, team_id=team_id)
+
+
+# Bulk import; see async_crud.import_records
+@app.post("/api/import/{kind}")
+async def import_records(
+        kind: str,
+        file: UploadFile = File(...),
+        format: Optional[str] = Query(None, regex="^(csv|ndjson)$"),
+        batch_size: int = Query(1000, ge=1, le=10000),
+        db: AsyncSession = Depends(get_async_db),
+        current_user: schemas.User = Depends(get_current_user)
+):
+    try:
+        return await async_crud.import_records(
+            db,
+            kind,
+            file.file,
+            importer.detect_format(file.filename, format),
+            creator_id=current_user.id,
+            batch_size=batch_size,
+        )
+    except importer.InvalidImport as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+
+
+# Dashboard counts, read from the task_stats summary table
+@app.get("/api/stats/tasks", response_model=schemas.TaskStats)
+async def read_task_stats(
+        db: AsyncSession = Depends(get_async_db),
+        current_user: schemas.User = Depends(get_current_user)
+):
+    return await async_crud.get_task_stats(db)
+
+
+# Delta sync; see main.sync_tasks
+@app.get("/api/sync/tasks", response_model=schemas.TaskSync)
+async def sync_tasks(
+        since: Optional[str] = None,
+        limit: int = Query(changelog.SYNC_MAX_CHANGES, ge=1, le=changelog.SYNC_MAX_CHANGES),
+        db: AsyncSession = Depends(get_async_db),
+        current_user: schemas.User = Depends(get_current_user)
+):
+    try:
+        token = changelog.parse_token(since)
+    except changelog.InvalidToken as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+    changes = await async_crud.get_task_changes(db, token, limit)
+    changes["token"] = str(changes["token"])
+    return changes
+
+
+# Live task changes as Server-Sent Events; see stream.py
+@app.get("/api/stream/tasks")
+async def stream_tasks(
+        team_id: Optional[int] = None,
+        member_id: Optional[int] = None,
+        current_user: schemas.User = Depends(get_stream_user)
+):
+    subscription = await stream.task_stream.subscribe(team_id=team_id, member_id=member_id)
+    return StreamingResponse(
+        stream.events(stream.task_stream, subscription),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# Prometheus scrape target for this worker process; pool gauges are for
+# the async engine the routes use
+@app.get("/metrics", include_in_schema=False)
+async def read_metrics():
+    return PlainTextResponse(metrics.render(async_engine.sync_engine), media_type=metrics.CONTENT_TYPE)
+
+
+# Add a simple root route
+@app.get("/")
+def read_root():
+    return {"message": "Welcome to the Task Management API"}
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    port = int(os.environ.get("PORT", 8000))
+    uvicorn.run("async_main:app", host="0.0.0.0", port=port)
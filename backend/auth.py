@@ -1,13 +1,19 @@
 # auth.py
 from jose import JWTError, jwt
-from passlib.context import CryptContext
+from dataclasses import dataclass
 from datetime import datetime, timedelta
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Query, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy import event
 from sqlalchemy.orm import Session
+from typing import Optional
 import os
+import time
 
-from database import SessionLocal
+from cache import TTLCache
+from database import SessionLocal, get_db
+from hashing import pwd_context
 import models
 
 # To get a string like this run:
@@ -16,8 +22,8 @@ SECRET_KEY = os.environ.get("SECRET_KEY", "09d25e094faa6ca2556c818166b7a9563b93f
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/login")
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/login", auto_error=False)
 
 
 def verify_password(plain_password, hashed_password):
@@ -40,46 +46,135 @@ def get_user_by_email(db, email: str):
     return db.query(models.User).filter(models.User.email == email).first()
 
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(SessionLocal)):
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
+# Principal cache: token -> user id and user id -> a lightweight user record,
+# so a warm token authenticates without jwt.decode or a users lookup
+PRINCIPAL_CACHE_SIZE = int(os.environ.get("PRINCIPAL_CACHE_SIZE", 10000))
+PRINCIPAL_CACHE_TTL = float(os.environ.get("PRINCIPAL_CACHE_TTL", 60))
 
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
-            raise credentials_exception
-    except JWTError:
-        raise credentials_exception
 
-    user = get_user_by_email(db, email=email)
-    if user is None:
-        raise credentials_exception
+@dataclass(frozen=True)
+class Principal:
+    id: int
+    email: str
+    name: str
+    is_active: bool
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+    @classmethod
+    def from_user(cls, user):
+        return cls(
+            id=user.id,
+            email=user.email,
+            name=user.name,
+            is_active=bool(user.is_active) if user.is_active is not None else True,
+            created_at=user.created_at,
+            updated_at=user.updated_at,
+        )
+
+
+class PrincipalCache:
+    def __init__(self, maxsize: int = PRINCIPAL_CACHE_SIZE, ttl: float = PRINCIPAL_CACHE_TTL):
+        self.tokens = TTLCache(maxsize, ttl)
+        self.users = TTLCache(maxsize, ttl)
+
+    def lookup(self, token: str) -> Optional[Principal]:
+        user_id = self.tokens.get(token)
+        if user_id is None:
+            return None
+        return self.users.get(user_id)
+
+    def store(self, token: str, claims: dict, principal: Principal):
+        # Never outlive the token itself
+        token_ttl = claims["exp"] - time.time() if "exp" in claims else None
+        self.tokens.set(token, principal.id, token_ttl)
+        self.users.set(principal.id, principal)
 
-    return user
+    def invalidate_user(self, user_id: int):
+        # Token entries may stay: they only resolve to a user id, and a missing
+        # user entry forces a reload that sees the change
+        self.users.pop(user_id)
 
+    def clear(self):
+        self.tokens.clear()
+        self.users.clear()
 
-# In auth.py
-async def get_current_user_dict(token: str = Depends(oauth2_scheme), db: Session = Depends(SessionLocal)):
-    credentials_exception = HTTPException(
+
+principal_cache = PrincipalCache()
+
+
+@event.listens_for(models.User, "after_update")
+@event.listens_for(models.User, "after_delete")
+def _invalidate_principal(mapper, connection, target):
+    principal_cache.invalidate_user(target.id)
+
+
+def credentials_exception():
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
 
+
+def decode_token(token: str) -> dict:
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
-            raise credentials_exception
     except JWTError:
-        raise credentials_exception
+        raise credentials_exception()
+    if payload.get("sub") is None:
+        raise credentials_exception()
+    return payload
+
 
-    user = get_user_by_email(db, email=email)
+def load_principal(token: str, db: Session) -> Principal:
+    claims = decode_token(token)
+    user = get_user_by_email(db, email=claims["sub"])
     if user is None:
-        raise credentials_exception
+        raise credentials_exception()
+    principal = Principal.from_user(user)
+    if not principal.is_active:
+        raise credentials_exception()
+    principal_cache.store(token, claims, principal)
+    return principal
 
-    return {"id": user.id, "email": user.email, "name": user.name}
\ No newline at end of file
+
+def authenticate(token: str, db: Session) -> Principal:
+    return principal_cache.lookup(token) or load_principal(token, db)
+
+
+async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+    # The session is the request's own get_db session; it only opens a
+    # connection when the cache misses
+    principal = principal_cache.lookup(token)
+    if principal is None:
+        principal = await run_in_threadpool(load_principal, token, db)
+    return principal
+
+
+def _load_principal_in_own_session(token: str) -> Principal:
+    db = SessionLocal()
+    try:
+        return load_principal(token, db)
+    finally:
+        db.close()
+
+
+async def get_stream_user(
+        token: Optional[str] = Query(None),
+        bearer: Optional[str] = Depends(optional_oauth2_scheme)
+):
+    # For long-lived streams: EventSource cannot set headers, so ?token= is
+    # accepted too, and a cache miss uses its own short session instead of
+    # get_db's, which would stay open for as long as the stream
+    token = bearer or token
+    if not token:
+        raise credentials_exception()
+    principal = principal_cache.lookup(token)
+    if principal is None:
+        principal = await run_in_threadpool(_load_principal_in_own_session, token)
+    return principal
+
+
+async def get_current_user_dict(principal: Principal = Depends(get_current_user)):
+    return {"id": principal.id, "email": principal.email, "name": principal.name}
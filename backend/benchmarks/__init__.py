@@ -0,0 +1,2 @@
+# benchmarks
+# Run from the backend directory, e.g. `python -m benchmarks.bench_auth`.
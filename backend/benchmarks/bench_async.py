@@ -0,0 +1,79 @@
+# bench_async.py
+# Throughput of GET /api/tasks under concurrent load: sync main:app
+# (threadpool + Session) vs async_main:app (AsyncSession).
+# In-process by default; pass --url to load an already running server instead.
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench_async.db")
+
+import httpx
+
+
+async def seed(client: httpx.AsyncClient, tasks: int):
+    await client.post("/api/auth/register", json={"email": "bench@example.com", "name": "Bench", "password": "bench"})
+    login = await client.post("/api/auth/login", json={"email": "bench@example.com", "password": "bench"})
+    headers = {"Authorization": f"Bearer {login.json()['token']}"}
+    existing = await client.get("/api/tasks", params={"limit": 1}, headers=headers)
+    if existing.json():
+        return headers
+    team = (await client.post("/api/teams", json={"name": "Bench"}, headers=headers)).json()
+    member = (await client.post(
+        "/api/members", json={"name": "Bench", "email": "member@example.com", "team_id": team["id"]}, headers=headers
+    )).json()
+    for i in range(tasks):
+        await client.post("/api/tasks", json={
+            "title": f"Task {i}",
+            "start_date": "2024-01-01T00:00:00",
+            "end_date": "2024-01-31T00:00:00",
+            "assignee_id": member["id"],
+            "team_id": team["id"],
+        }, headers=headers)
+    return headers
+
+
+async def load(client: httpx.AsyncClient, headers, concurrency: int, requests: int):
+    remaining = [requests]
+
+    async def worker():
+        while remaining[0] > 0:
+            remaining[0] -= 1
+            response = await client.get("/api/tasks", params={"limit": 50}, headers=headers)
+            response.raise_for_status()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return requests / (time.perf_counter() - started)
+
+
+async def bench(label, client_kwargs, args):
+    async with httpx.AsyncClient(timeout=60, **client_kwargs) as client:
+        headers = await seed(client, args.tasks)
+        await load(client, headers, args.concurrency, args.concurrency)
+        rps = await load(client, headers, args.concurrency, args.requests)
+    print(f"{label:>6}: {rps:8.1f} req/s  (concurrency={args.concurrency})")
+
+
+async def main(args):
+    if args.url:
+        await bench("remote", {"base_url": args.url}, args)
+        return
+    import async_main
+    import main as sync_main
+
+    await async_main.startup()
+    await bench("sync", {"app": sync_main.app, "base_url": "http://bench"}, args)
+    await bench("async", {"app": async_main.app, "base_url": "http://bench"}, args)
+    await async_main.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sync vs async database path throughput")
+    parser.add_argument("--url", help="base URL of a running server instead of in-process apps")
+    parser.add_argument("-c", "--concurrency", type=int, default=32)
+    parser.add_argument("-n", "--requests", type=int, default=2000)
+    parser.add_argument("--tasks", type=int, default=200)
+    asyncio.run(main(parser.parse_args()))
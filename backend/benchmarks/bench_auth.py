@@ -0,0 +1,54 @@
+# bench_auth.py
+# Cold vs warm cost of resolving the bearer token to a principal.
+import argparse
+import os
+import tempfile
+import time
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench_auth.db")
+
+from sqlalchemy import event
+
+import auth
+import models
+from database import SessionLocal, engine
+
+
+def run(iterations: int):
+    models.Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    email = "bench-auth@example.com"
+    if auth.get_user_by_email(db, email) is None:
+        db.add(models.User(email=email, name="Bench", hashed_password="x"))
+        db.commit()
+    token = auth.create_access_token(data={"sub": email})
+
+    queries = [0]
+
+    def count(*args):
+        queries[0] += 1
+
+    event.listen(engine, "before_cursor_execute", count)
+    results = {}
+    for label, clear in (("cold", True), ("warm", False)):
+        auth.principal_cache.clear()
+        auth.authenticate(token, db)
+        queries[0] = 0
+        started = time.perf_counter()
+        for _ in range(iterations):
+            if clear:
+                auth.principal_cache.clear()
+            auth.authenticate(token, db)
+        elapsed = time.perf_counter() - started
+        results[label] = (elapsed / iterations * 1e6, queries[0] / iterations)
+    event.remove(engine, "before_cursor_execute", count)
+    db.close()
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Principal cache benchmark")
+    parser.add_argument("-n", "--iterations", type=int, default=5000)
+    args = parser.parse_args()
+    for label, (per_call, per_call_queries) in run(args.iterations).items():
+        print(f"{label:>5}: {per_call:8.1f} us/call  {per_call_queries:.2f} queries/call")
@@ -0,0 +1,85 @@
+# bench_metrics.py
+# What the instrumentation in metrics.py costs: the middleware per request
+# and the cursor hooks per statement, each measured against the same work
+# without them.
+#
+#   python -m benchmarks.bench_metrics -n 20000
+#
+# The request case drives a bare FastAPI app straight through ASGI, with no
+# client or network in the way, so the difference is the middleware alone.
+import argparse
+import asyncio
+import time
+
+from fastapi import FastAPI
+from sqlalchemy import create_engine, text
+
+import metrics
+
+
+def make_app(instrumented: bool) -> FastAPI:
+    app = FastAPI()
+    if instrumented:
+        app.add_middleware(metrics.MetricsMiddleware)
+
+    @app.get("/api/items/{item_id}")
+    async def read_item(item_id: int):
+        return {"id": item_id}
+
+    return app
+
+
+async def drive(app, iterations: int) -> float:
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": "/api/items/1", "raw_path": b"/api/items/1", "root_path": "",
+        "query_string": b"", "headers": [], "client": ("127.0.0.1", 1), "server": ("127.0.0.1", 80),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    started = time.perf_counter()
+    for _ in range(iterations):
+        await app(dict(scope), receive, send)
+    return (time.perf_counter() - started) / iterations
+
+
+def per_request(iterations: int):
+    results = {}
+    for instrumented in (False, True):
+        app = make_app(instrumented)
+        asyncio.run(drive(app, 200))
+        results[instrumented] = asyncio.run(drive(app, iterations))
+    return results[False], results[True]
+
+
+def per_statement(iterations: int):
+    results = {}
+    for instrumented in (False, True):
+        engine = create_engine("sqlite://")
+        if instrumented:
+            metrics.install(engine)
+        with engine.connect() as connection:
+            statement = text("SELECT 1")
+            started = time.perf_counter()
+            for _ in range(iterations):
+                connection.execute(statement)
+            results[instrumented] = (time.perf_counter() - started) / iterations
+        engine.dispose()
+    return results[False], results[True]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Overhead of the /metrics instrumentation")
+    parser.add_argument("-n", "--iterations", type=int, default=20000)
+    args = parser.parse_args()
+    for label, (bare, instrumented) in (
+            ("request", per_request(args.iterations)),
+            ("statement", per_statement(args.iterations)),
+    ):
+        print(f"{label:>10}: {bare * 1e6:7.1f} us bare  {instrumented * 1e6:7.1f} us instrumented  "
+              f"(+{(instrumented - bare) * 1e6:.1f} us)")
@@ -0,0 +1,94 @@
+# bench_mutations.py
+# Statements per single-row edit through the PUT/PATCH routes, against a
+# budget: exits 1 when a route issues more than it should, so a change that
+# brings back a SELECT-before-UPDATE or a refresh shows up here.
+#
+# Budgets count every statement, including the bookkeeping writes a task edit
+# always makes (table_versions bump, task_changes row) and, when a counted
+# column changes, the old-value read and the task_stats upsert.
+import argparse
+import os
+import tempfile
+import time
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench_mutations.db")
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+import auth
+import main
+import migrate
+import models
+from database import SessionLocal, engine
+
+TASK = {
+    "title": "Quarterly report", "start_date": "2024-03-01T09:00:00", "end_date": "2024-03-04T17:00:00",
+    "assignee_id": 1, "team_id": 1, "priority": "high",
+}
+# (label, method, path, body, statement budget)
+CASES = [
+    ("PATCH task title", "PATCH", "/api/tasks/{task}", {"title": "Renamed"}, 4),
+    ("PATCH task priority", "PATCH", "/api/tasks/{task}", {"priority": "low"}, 6),
+    ("PATCH task status", "PATCH", "/api/tasks/{task}/status", {"status": "completed"}, 6),
+    ("PUT task", "PUT", "/api/tasks/{task}", TASK, 6),
+    ("PATCH task missing", "PATCH", "/api/tasks/0", {"title": "Renamed"}, 1),
+    ("PATCH member role", "PATCH", "/api/members/1", {"role": "lead"}, 5),
+    ("PUT member", "PUT", "/api/members/1", {"name": "Ada", "email": "ada@example.com", "team_id": 1}, 5),
+    ("PATCH team", "PATCH", "/api/teams/1", {"description": "Core services"}, 4),
+    ("PUT team", "PUT", "/api/teams/1", {"name": "Platform"}, 4),
+]
+
+
+def seed(db):
+    email = "bench-mutations@example.com"
+    if auth.get_user_by_email(db, email) is None:
+        db.add(models.User(email=email, name="Bench", hashed_password="x"))
+    if db.get(models.Team, 1) is None:
+        db.add(models.Team(id=1, name="Platform"))
+        db.add(models.Member(id=1, name="Ada", email="ada@example.com", team_id=1))
+    db.commit()
+    return auth.create_access_token(data={"sub": email})
+
+
+def run(iterations: int):
+    migrate.upgrade()
+    db = SessionLocal()
+    token = seed(db)
+    db.close()
+    client = TestClient(main.app)
+    headers = {"Authorization": f"Bearer {token}"}
+    task_id = client.post("/api/tasks", json=TASK, headers=headers).json()["id"]
+
+    statements = []
+
+    def count(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", count)
+    results = []
+    try:
+        for label, method, path, body, budget in CASES:
+            url = path.format(task=task_id)
+            client.request(method, url, json=body, headers=headers)
+            statements.clear()
+            started = time.perf_counter()
+            for _ in range(iterations):
+                client.request(method, url, json=body, headers=headers)
+            elapsed = time.perf_counter() - started
+            results.append((label, len(statements) / iterations, budget, elapsed / iterations * 1e3))
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Statements per single-row edit")
+    parser.add_argument("-n", "--iterations", type=int, default=50)
+    args = parser.parse_args()
+    over = False
+    for label, per_request, budget, ms in run(args.iterations):
+        flag = "" if per_request <= budget else "  OVER BUDGET"
+        over = over or bool(flag)
+        print(f"{label:>20}: {per_request:4.1f} statements (budget {budget})  {ms:6.2f} ms{flag}")
+    raise SystemExit(1 if over else 0)
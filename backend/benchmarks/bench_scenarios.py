@@ -0,0 +1,194 @@
+# bench_scenarios.py
+# Replays the frontend's requests (scenarios.py) and reports p50/p95/p99
+# latency, throughput and, in-process, database queries per request.
+#
+#   python -m benchmarks.bench_scenarios --tasks 10000 --out report.json
+#   python -m benchmarks.bench_scenarios --baseline main.json --thresholds benchmarks/thresholds.json
+#   python -m benchmarks.bench_scenarios --url http://localhost:8000 -c 16
+#
+# In-process runs use main:app through TestClient against DATABASE_URL
+# (a fresh SQLite file by default), generating --tasks rows with datagen
+# when the database has none. Over HTTP the server must already hold a
+# datagen dataset, since the scenarios log in as its bench user.
+#
+# Scenarios run one after another, each with --concurrency threads sharing
+# one client, so the query count of a phase divided by its requests is the
+# scenario's queries per request. Exits 1 when a threshold or baseline
+# check fails. thresholds.json is set for the default run (in-process,
+# 10000 tasks, SQLite); pass another file for other targets or scales.
+# Its queries_per_request limits are each scenario's cost on a read cache
+# miss (READ_CACHE_TTL=0), so they hold whatever share of a run's requests
+# the cache happens to serve; a hit only costs the table_versions read.
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench_scenarios.db")
+# The overdue sweeper would rewrite statuses halfway through a run
+os.environ.setdefault("OVERDUE_SWEEP_INTERVAL", "0")
+
+from sqlalchemy import event
+
+from benchmarks import datagen, report
+from benchmarks.scenarios import SCENARIOS, Context
+
+THRESHOLDS_PATH = os.path.join(os.path.dirname(__file__), "thresholds.json")
+
+
+class QueryCounter:
+    def __init__(self, engine):
+        self.engine = engine
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, *args):
+        with self._lock:
+            self.count += 1
+
+    def __enter__(self):
+        event.listen(self.engine, "before_cursor_execute", self)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, "before_cursor_execute", self)
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def discover(client, headers) -> Context:
+    tasks = client.get("/api/tasks", params={"fields": "id", "limit": 500}, headers=headers).json()
+    members = client.get("/api/members", params={"limit": 100}, headers=headers).json()
+    teams = client.get("/api/teams", params={"limit": 100}, headers=headers).json()
+    return Context(
+        member_ids=[row["id"] for row in members],
+        team_ids=[row["id"] for row in teams],
+        task_ids=[row["id"] for row in tasks],
+    )
+
+
+def run_phase(client, headers, ctx: Context, name: str, requests: int, concurrency: int, seed: int, counter=None):
+    build = SCENARIOS[name]
+    rng = random.Random(f"{seed}:{name}")
+    planned = [build(ctx, rng) for _ in range(requests)]
+    latencies = []
+    errors = [0]
+    position = iter(range(len(planned)))
+    lock = threading.Lock()
+
+    def worker():
+        while True:
+            with lock:
+                index = next(position, None)
+            if index is None:
+                return
+            request = planned[index]
+            started = time.perf_counter()
+            response = client.request(
+                request.method, request.path, params=request.params, json=request.json,
+                headers=headers if request.auth else None
+            )
+            elapsed = time.perf_counter() - started
+            with lock:
+                latencies.append(elapsed)
+                if response.status_code >= 400:
+                    errors[0] += 1
+
+    queries_before = counter.count if counter else None
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    seconds = time.perf_counter() - started
+    queries = counter.count - queries_before if counter else None
+    return report.summarize(latencies, errors[0], seconds, queries)
+
+
+def run(client, args, counter=None, dataset=None) -> dict:
+    login = client.post("/api/auth/login", json={"email": datagen.BENCH_EMAIL, "password": datagen.BENCH_PASSWORD})
+    if login.status_code != 200:
+        raise SystemExit(f"cannot log in as {datagen.BENCH_EMAIL}; seed the target with benchmarks.datagen")
+    headers = {"Authorization": f"Bearer {login.json()['token']}"}
+    ctx = discover(client, headers)
+    results = {}
+    for name in args.scenario or list(SCENARIOS):
+        run_phase(client, headers, ctx, name, args.warmup, args.concurrency, args.seed + 1)
+        results[name] = run_phase(client, headers, ctx, name, args.requests, args.concurrency, args.seed, counter)
+    return {
+        "meta": {
+            "started_at": datetime.utcnow().isoformat(timespec="seconds"),
+            "target": args.url or "in-process",
+            "git_commit": git_commit(),
+            "python": platform.python_version(),
+            "dataset": dataset or client.get("/api/stats/tasks", headers=headers).json().get("total"),
+            "requests": args.requests,
+            "warmup": args.warmup,
+            "concurrency": args.concurrency,
+            "seed": args.seed,
+        },
+        "scenarios": results,
+    }
+
+
+def in_process(args) -> dict:
+    datagen.prepare()
+    if not datagen.existing_tasks():
+        print(f"generating {args.tasks} tasks ...", file=sys.stderr)
+        datagen.generate(args.tasks, seed=args.seed)
+
+    from fastapi.testclient import TestClient
+
+    import main
+    from database import engine
+
+    dataset = {"dialect": engine.dialect.name, "tasks": datagen.existing_tasks()}
+    with TestClient(main.app) as client, QueryCounter(engine) as counter:
+        return run(client, args, counter, dataset)
+
+
+def over_http(args) -> dict:
+    import httpx
+
+    with httpx.Client(base_url=args.url, timeout=60) as client:
+        return run(client, args)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Frontend scenario benchmark")
+    parser.add_argument("--url", help="base URL of a running server instead of main:app in-process")
+    parser.add_argument("--scenario", action="append", choices=list(SCENARIOS), help="repeatable; default all")
+    parser.add_argument("-n", "--requests", type=int, default=200, help="measured requests per scenario")
+    parser.add_argument("-c", "--concurrency", type=int, default=4)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--tasks", type=int, default=10000, help="dataset size when generating in-process")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", help="write the JSON report here")
+    parser.add_argument("--baseline", help="report of an earlier build to compare against")
+    parser.add_argument("--thresholds", default=THRESHOLDS_PATH)
+    args = parser.parse_args()
+
+    result = over_http(args) if args.url else in_process(args)
+    print(report.table(result))
+    if args.out:
+        with open(args.out, "w") as file:
+            json.dump(result, file, indent=2)
+    failures = report.check(result, report.load(args.thresholds), report.load(args.baseline))
+    for failure in failures:
+        print(f"FAIL {failure}")
+    raise SystemExit(1 if failures else 0)
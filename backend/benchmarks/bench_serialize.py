@@ -0,0 +1,72 @@
+# bench_serialize.py
+# Per-row cost of turning Task rows into a JSON body: the response_model path
+# (pydantic from_orm + jsonable_encoder + json.dumps, as FastAPI renders it)
+# against the precompiled serializer + orjson path in serializers.py.
+import argparse
+import json
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench_serialize.db")
+
+from fastapi.encoders import jsonable_encoder
+
+import models
+import schemas
+import serializers
+
+
+def make_rows(count: int):
+    team = models.Team(id=1, name="Platform", description="Core services", created_at=datetime(2024, 1, 1))
+    member = models.Member(
+        id=1, name="Ada", email="ada@example.com", role="lead", team_id=1, team=team,
+        created_at=datetime(2024, 1, 1)
+    )
+    start = datetime(2024, 3, 1, 9, 30)
+    return [
+        models.Task(
+            id=index, title=f"Task {index}", description="Write the quarterly report " * 4,
+            status=models.TaskStatus.pending, priority=models.TaskPriority.high,
+            start_date=start, end_date=start + timedelta(days=3), creator_id=1,
+            assignee_id=1, assignee=member, team_id=1, team=team,
+            created_at=start, updated_at=start + timedelta(hours=1)
+        )
+        for index in range(count)
+    ]
+
+
+def pydantic_body(rows) -> bytes:
+    content = jsonable_encoder([schemas.Task.from_orm(row) for row in rows])
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def fast_body(rows) -> bytes:
+    return serializers.ORJSONResponse(serializers.dump_many(schemas.Task, rows)).body
+
+
+def run(rows: int, iterations: int):
+    data = make_rows(rows)
+    if pydantic_body(data) != fast_body(data):
+        raise SystemExit("serializer output differs from the response_model output")
+    results = {}
+    for label, render in (("pydantic", pydantic_body), ("fast", fast_body)):
+        render(data)
+        started = time.perf_counter()
+        for _ in range(iterations):
+            render(data)
+        elapsed = time.perf_counter() - started
+        results[label] = elapsed / (iterations * rows) * 1e6
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Task serialization benchmark")
+    parser.add_argument("--rows", type=int, default=100)
+    parser.add_argument("-n", "--iterations", type=int, default=200)
+    args = parser.parse_args()
+    results = run(args.rows, args.iterations)
+    for label, per_row in results.items():
+        print(f"{label:>8}: {per_row:8.2f} us/row")
+    print(f" speedup: {results['pydantic'] / results['fast']:.1f}x")
@@ -0,0 +1,136 @@
+# bench_startup.py
+# Worker cold-start cost: how long importing the app takes, which modules
+# that time goes to, and how long serve.py takes to answer its first request
+# and to drain after SIGTERM.
+#
+#   python -m benchmarks.bench_startup
+#   python -m benchmarks.bench_startup --app async_main --workers 4 --top 30
+#   python -m benchmarks.bench_startup --max-import-ms 800
+#
+# Each measurement runs in a fresh interpreter against a migrated temporary
+# SQLite database. The profile is `python -X importtime`: "self" is a module's
+# own top-level code, "cumulative" adds the modules it imported first.
+# Exits 1 when --max-import-ms is given and the median import exceeds it.
+import argparse
+import os
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def environment(database_url: str, **extra) -> dict:
+    return dict(os.environ, DATABASE_URL=database_url, OVERDUE_SWEEP_INTERVAL="0", **extra)
+
+
+def import_times(app: str, env: dict, runs: int) -> list:
+    times = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, "-c", f"import {app}"], cwd=BACKEND, env=env, check=True)
+        times.append(time.perf_counter() - started)
+    return times
+
+
+def import_profile(app: str, env: dict) -> list:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {app}"],
+        cwd=BACKEND, env=env, check=True, capture_output=True, text=True,
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        # import time:       self [us] |  cumulative | imported package
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((int(self_us), int(cumulative_us), name.rstrip()))
+    return rows
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def boot(app: str, env: dict, workers: int, gunicorn: bool, timeout: float = 60) -> dict:
+    port = free_port()
+    command = [sys.executable, "serve.py", "--workers", str(workers)]
+    if not gunicorn:
+        command.append("--no-gunicorn")
+    env = dict(env, PORT=str(port), HOST="127.0.0.1", DATABASE_MODE="async" if app == "async_main" else "sync")
+    started = time.perf_counter()
+    process = subprocess.Popen(command, cwd=BACKEND, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while True:
+            if process.poll() is not None:
+                raise SystemExit(f"serve.py exited with {process.returncode} before answering")
+            if time.perf_counter() - started > timeout:
+                raise SystemExit(f"serve.py did not answer within {timeout}s")
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/", timeout=1):
+                    break
+            except OSError:
+                time.sleep(0.01)
+        ready = time.perf_counter() - started
+        drain_started = time.perf_counter()
+        process.send_signal(signal.SIGTERM)
+        process.wait(timeout)
+        return {"first_response_ms": round(ready * 1e3, 1), "drain_ms": round((time.perf_counter() - drain_started) * 1e3, 1)}
+    finally:
+        if process.poll() is None:
+            process.kill()
+
+
+def gunicorn_installed() -> bool:
+    try:
+        import gunicorn  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Worker cold-start benchmark and import-time profile")
+    parser.add_argument("--app", default="main", choices=("main", "async_main", "minimal_main"))
+    parser.add_argument("--runs", type=int, default=5, help="import measurements")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--top", type=int, default=20, help="modules listed in the profile")
+    parser.add_argument("--max-import-ms", type=float)
+    args = parser.parse_args()
+
+    database_url = f"sqlite:///{tempfile.mkdtemp()}/bench_startup.db"
+    env = environment(database_url)
+    subprocess.run([sys.executable, "migrate.py", "upgrade"], cwd=BACKEND, env=env, check=True,
+                   stdout=subprocess.DEVNULL)
+
+    times = import_times(args.app, env, args.runs)
+    bare = statistics.median(import_times("sys", env, args.runs))
+    median = statistics.median(times)
+    print(f"import {args.app}: median {median * 1e3:.0f} ms, min {min(times) * 1e3:.0f} ms "
+          f"(interpreter start {bare * 1e3:.0f} ms)")
+
+    rows = import_profile(args.app, env)
+    total = max(cumulative for _, cumulative, _ in rows)
+    print(f"\nslowest modules by own import time (of {total / 1e3:.0f} ms):")
+    print(f"{'self ms':>9} {'cumul ms':>9}  module")
+    for self_us, cumulative_us, name in sorted(rows, reverse=True)[:args.top]:
+        print(f"{self_us / 1e3:9.1f} {cumulative_us / 1e3:9.1f}  {name.strip()}")
+
+    if args.app != "minimal_main":
+        print()
+        for gunicorn in ((True, False) if gunicorn_installed() else (False,)):
+            label = "gunicorn, preloaded" if gunicorn else "uvicorn supervisor"
+            result = boot(args.app, env, args.workers, gunicorn)
+            print(f"serve.py {args.workers} workers ({label}): first response {result['first_response_ms']} ms, "
+                  f"drain {result['drain_ms']} ms")
+
+    if args.max_import_ms is not None and median * 1e3 > args.max_import_ms:
+        print(f"FAIL import {median * 1e3:.0f} ms > {args.max_import_ms:.0f} ms")
+        raise SystemExit(1)
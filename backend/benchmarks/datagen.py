@@ -0,0 +1,182 @@
+# datagen.py
+# Seeded synthetic data for the benchmarks: users, teams, members and tasks.
+#
+#   python -m benchmarks.datagen --tasks 100000 --seed 42
+#   DATABASE_URL=postgresql://... python -m benchmarks.datagen --tasks 5000000 --reset
+#
+# The same seed, scale and anchor date give the same rows. Tasks are written
+# with Core executemany batches (the FTS triggers still index them); the
+# task_stats summary is rebuilt and table_versions bumped at the end, since
+# the crud paths that normally maintain them are bypassed. The change log
+# is left empty: sync clients start with a reset, as after a restore.
+#
+# Every generated user can log in with the password "bench";
+# bench@example.com is the one the scenarios use.
+import argparse
+import json
+import os
+import random
+import time
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import func, select
+
+import migrate
+import models
+import stats
+import versions
+from database import SessionLocal, engine
+
+BENCH_EMAIL = "bench@example.com"
+BENCH_PASSWORD = "bench"
+DEFAULT_ANCHOR = date(2024, 6, 3)
+
+WORDS = (
+    "report", "review", "deploy", "migrate", "design", "invoice", "audit", "refactor", "onboard",
+    "release", "budget", "roadmap", "backup", "schema", "customer", "security", "incident",
+    "dashboard", "payroll", "quarterly", "sprint", "vendor", "contract", "training", "metrics",
+)
+ROLES = ("developer", "designer", "manager", "analyst", "lead", None)
+STATUSES = (
+    (models.TaskStatus.pending, 40), (models.TaskStatus.in_progress, 25),
+    (models.TaskStatus.completed, 30), (models.TaskStatus.overdue, 5),
+)
+PRIORITIES = ((models.TaskPriority.low, 30), (models.TaskPriority.medium, 50), (models.TaskPriority.high, 20))
+
+
+def scale(tasks: int) -> dict:
+    # Default team and member counts for a task count
+    return {"teams": max(5, tasks // 2000), "members": max(20, tasks // 200), "users": 10}
+
+
+def sentence(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def weighted(rng: random.Random, choices):
+    values, weights = zip(*choices)
+    return rng.choices(values, weights)[0]
+
+
+def insert_batches(db, table, rows, batch_size: int) -> int:
+    batch, count = [], 0
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            db.execute(table.insert(), batch)
+            db.commit()
+            count += len(batch)
+            batch.clear()
+    if batch:
+        db.execute(table.insert(), batch)
+        db.commit()
+        count += len(batch)
+    return count
+
+
+def generate(
+        tasks: int,
+        teams: int = None,
+        members: int = None,
+        users: int = None,
+        seed: int = 42,
+        anchor: date = DEFAULT_ANCHOR,
+        batch_size: int = 10000
+) -> dict:
+    from auth import get_password_hash
+
+    defaults = scale(tasks)
+    teams = teams or defaults["teams"]
+    members = members or defaults["members"]
+    users = users or defaults["users"]
+    rng = random.Random(seed)
+    started = time.perf_counter()
+    anchor_at = datetime.combine(anchor, datetime.min.time())
+    password_hash = get_password_hash(BENCH_PASSWORD)
+
+    db = SessionLocal()
+    try:
+        counts = {}
+        counts["users"] = insert_batches(db, models.User.__table__, (
+            {"name": "Bench" if index == 0 else f"User {index}",
+             "email": BENCH_EMAIL if index == 0 else f"user{index}@example.com",
+             "hashed_password": password_hash, "is_active": True}
+            for index in range(users)
+        ), batch_size)
+        counts["teams"] = insert_batches(db, models.Team.__table__, (
+            {"name": f"Team {index + 1}", "description": sentence(rng, 6) if rng.random() < 0.7 else None}
+            for index in range(teams)
+        ), batch_size)
+        team_ids = list(db.scalars(select(models.Team.id).order_by(models.Team.id)))
+        counts["members"] = insert_batches(db, models.Member.__table__, (
+            {"name": f"Member {index + 1}", "email": f"member{index + 1}@example.com",
+             "role": rng.choice(ROLES), "team_id": rng.choice(team_ids) if rng.random() < 0.9 else None}
+            for index in range(members)
+        ), batch_size)
+        member_teams = dict(db.execute(select(models.Member.id, models.Member.team_id)).all())
+        member_ids = sorted(member_teams)
+        user_ids = list(db.scalars(select(models.User.id).order_by(models.User.id)))
+
+        def task_rows():
+            for index in range(tasks):
+                assignee_id = rng.choice(member_ids)
+                start = anchor_at + timedelta(days=rng.randint(-180, 180), hours=rng.randint(8, 17))
+                yield {
+                    "title": f"{sentence(rng, rng.randint(2, 4)).capitalize()} #{index + 1}",
+                    "description": sentence(rng, rng.randint(8, 30)) if rng.random() < 0.8 else None,
+                    "status": weighted(rng, STATUSES),
+                    "priority": weighted(rng, PRIORITIES),
+                    "start_date": start,
+                    "end_date": start + timedelta(days=rng.randint(0, 30), hours=rng.randint(0, 8)),
+                    "creator_id": rng.choice(user_ids),
+                    "assignee_id": assignee_id,
+                    # Mostly the assignee's team, sometimes none
+                    "team_id": member_teams[assignee_id] if rng.random() < 0.85 else None,
+                }
+
+        counts["tasks"] = insert_batches(db, models.Task.__table__, task_rows(), batch_size)
+        stats.rebuild(db)
+        versions.bump(db, "users", "teams", "members", "tasks")
+        db.commit()
+    finally:
+        db.close()
+    return dict(counts, seed=seed, anchor=anchor.isoformat(), seconds=round(time.perf_counter() - started, 1))
+
+
+def existing_tasks() -> int:
+    db = SessionLocal()
+    try:
+        return db.scalar(select(func.count()).select_from(models.Task))
+    finally:
+        db.close()
+
+
+def prepare(reset: bool = False):
+    if reset:
+        models.Base.metadata.drop_all(bind=engine)
+        # So the migrations run again from the first revision
+        with engine.begin() as connection:
+            connection.exec_driver_sql("DROP TABLE IF EXISTS alembic_version")
+    migrate.upgrade()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fill the database with seeded synthetic data")
+    parser.add_argument("--tasks", type=int, default=10000)
+    parser.add_argument("--teams", type=int)
+    parser.add_argument("--members", type=int)
+    parser.add_argument("--users", type=int)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--anchor", type=date.fromisoformat, default=DEFAULT_ANCHOR,
+                        help="task dates are spread +-180 days around this date")
+    parser.add_argument("--batch-size", type=int, default=10000)
+    parser.add_argument("--reset", action="store_true", help="drop and recreate all tables first")
+    args = parser.parse_args()
+
+    prepare(args.reset)
+    if existing_tasks():
+        raise SystemExit(f"{os.environ.get('DATABASE_URL', 'the database')} already has tasks; pass --reset")
+    print(json.dumps(generate(
+        args.tasks, teams=args.teams, members=args.members, users=args.users,
+        seed=args.seed, anchor=args.anchor, batch_size=args.batch_size,
+    )))
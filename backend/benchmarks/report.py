@@ -0,0 +1,95 @@
+# report.py
+# Latency summaries for bench_scenarios and the regression checks run on them.
+#
+# A thresholds file sets absolute limits per scenario and how far a run may
+# drift from a baseline report of an earlier build:
+#
+#   {
+#     "max_regression": 0.25,        latency may grow 25% over the baseline
+#     "max_error_rate": 0,
+#     "scenarios": {"list_tasks": {"p95_ms": 40, "queries_per_request": 4}}
+#   }
+import json
+import math
+from typing import List, Optional
+
+LATENCY_KEYS = ("p50_ms", "p95_ms", "p99_ms")
+LIMIT_KEYS = LATENCY_KEYS + ("mean_ms", "max_ms", "queries_per_request")
+# A baseline comparison tolerates this many extra queries per request before
+# failing; the counts are averages, so a single extra query shows up as ~1
+QUERY_SLACK = 0.5
+
+
+def percentile(ordered: List[float], fraction: float) -> float:
+    # Nearest-rank percentile of an already sorted list
+    if not ordered:
+        return 0.0
+    rank = max(1, math.ceil(fraction * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(latencies: List[float], errors: int, seconds: float, queries: Optional[int]) -> dict:
+    ordered = sorted(latencies)
+    count = len(ordered)
+    return {
+        "requests": count,
+        "errors": errors,
+        "error_rate": round(errors / count, 4) if count else 0,
+        "p50_ms": round(percentile(ordered, 0.50) * 1e3, 3),
+        "p95_ms": round(percentile(ordered, 0.95) * 1e3, 3),
+        "p99_ms": round(percentile(ordered, 0.99) * 1e3, 3),
+        "mean_ms": round(sum(ordered) / count * 1e3, 3) if count else 0,
+        "max_ms": round(ordered[-1] * 1e3, 3) if count else 0,
+        "throughput_rps": round(count / seconds, 1) if seconds else None,
+        "queries_per_request": round(queries / count, 2) if queries is not None and count else None,
+    }
+
+
+def check(report: dict, thresholds: Optional[dict] = None, baseline: Optional[dict] = None) -> List[str]:
+    thresholds = thresholds or {}
+    failures = []
+    max_regression = thresholds.get("max_regression", 0.25)
+    for name, result in report["scenarios"].items():
+        limits = thresholds.get("scenarios", {}).get(name, {})
+        max_error_rate = limits.get("max_error_rate", thresholds.get("max_error_rate", 0))
+        if result["error_rate"] > max_error_rate:
+            failures.append(f"{name}: error rate {result['error_rate']} > {max_error_rate}")
+        for key in LIMIT_KEYS:
+            if key in limits and result.get(key) is not None and result[key] > limits[key]:
+                failures.append(f"{name}: {key} {result[key]} > {limits[key]}")
+
+        previous = (baseline or {}).get("scenarios", {}).get(name)
+        if not previous:
+            continue
+        for key in LATENCY_KEYS:
+            if previous[key] and result[key] > previous[key] * (1 + max_regression):
+                failures.append(
+                    f"{name}: {key} {result[key]} is {result[key] / previous[key] - 1:.0%} over baseline {previous[key]}"
+                )
+        if (
+            result["queries_per_request"] is not None and previous.get("queries_per_request") is not None
+            and result["queries_per_request"] > previous["queries_per_request"] + QUERY_SLACK
+        ):
+            failures.append(
+                f"{name}: queries_per_request {result['queries_per_request']} > baseline {previous['queries_per_request']}"
+            )
+    return failures
+
+
+def load(path: Optional[str]) -> Optional[dict]:
+    if not path:
+        return None
+    with open(path) as file:
+        return json.load(file)
+
+
+def table(report: dict) -> str:
+    lines = [f"{'scenario':>16} {'reqs':>6} {'err':>4} {'p50':>8} {'p95':>8} {'p99':>8} {'rps':>8} {'q/req':>6}"]
+    for name, result in report["scenarios"].items():
+        queries = result["queries_per_request"]
+        lines.append(
+            f"{name:>16} {result['requests']:>6} {result['errors']:>4} {result['p50_ms']:>8.2f} "
+            f"{result['p95_ms']:>8.2f} {result['p99_ms']:>8.2f} {result['throughput_rps'] or 0:>8.1f} "
+            f"{'-' if queries is None else f'{queries:.2f}':>6}"
+        )
+    return "\n".join(lines)
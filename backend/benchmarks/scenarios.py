@@ -0,0 +1,123 @@
+# scenarios.py
+# The requests the frontend makes (services/api.js), as benchmark scenarios.
+# Each scenario builds one request from the dataset context and a seeded
+# Random, so a run replays the same sequence of requests.
+#
+#   login            LoginForm: POST /auth/login
+#   list_tasks       TaskListView: GET /tasks with its fields= and a filter
+#   list_filters     TaskListView filter dropdowns: GET /members, GET /teams
+#   calendar_month   TaskCalendarView: GET /tasks/calendar for a 6-week grid
+#   task_detail      TaskForm when editing: GET /tasks/{id}
+#   create_task      TaskForm: POST /tasks
+#   edit_task        TaskForm: PUT /tasks/{id}
+#   status_change    TaskListView status menu: PATCH /tasks/{id}/status
+#
+# TaskListView sends its filters as memberId/teamId/...; they are sent here
+# under the names the API reads (member_id, team_id, ...).
+import random
+from datetime import date, timedelta
+from typing import Callable, Dict, NamedTuple, Optional
+
+from benchmarks.datagen import BENCH_EMAIL, BENCH_PASSWORD, DEFAULT_ANCHOR
+
+LIST_FIELDS = "id,title,status,priority,start_date,end_date,assignee.name,team.name"
+STATUSES = ("pending", "in_progress", "completed", "overdue")
+SEARCH_TERMS = ("report", "deploy", "audit", "security review", "budget")
+
+
+class Request(NamedTuple):
+    method: str
+    path: str
+    params: Optional[dict] = None
+    json: Optional[dict] = None
+    # False for requests made without the bearer token
+    auth: bool = True
+
+
+class Context(NamedTuple):
+    member_ids: list
+    team_ids: list
+    task_ids: list
+    anchor: date = DEFAULT_ANCHOR
+
+
+def login(ctx: Context, rng: random.Random) -> Request:
+    return Request("POST", "/api/auth/login", json={"email": BENCH_EMAIL, "password": BENCH_PASSWORD}, auth=False)
+
+
+def list_tasks(ctx: Context, rng: random.Random) -> Request:
+    params = {"fields": LIST_FIELDS}
+    choice = rng.randrange(6)
+    if choice == 1:
+        params["member_id"] = rng.choice(ctx.member_ids)
+    elif choice == 2:
+        params["team_id"] = rng.choice(ctx.team_ids)
+    elif choice == 3:
+        params["status"] = rng.choice(STATUSES)
+    elif choice == 4:
+        start = ctx.anchor + timedelta(days=rng.randint(-150, 150))
+        params["start_date"] = start.isoformat()
+        params["end_date"] = (start + timedelta(days=14)).isoformat()
+    elif choice == 5:
+        params["search"] = rng.choice(SEARCH_TERMS)
+    return Request("GET", "/api/tasks", params=params)
+
+
+def list_filters(ctx: Context, rng: random.Random) -> Request:
+    return Request("GET", rng.choice(("/api/members", "/api/teams")))
+
+
+def calendar_month(ctx: Context, rng: random.Random) -> Request:
+    month = ctx.anchor.replace(day=1) + timedelta(days=31 * rng.randint(-5, 5))
+    first = month.replace(day=1)
+    grid_start = first - timedelta(days=first.weekday())
+    params = {
+        "from": grid_start.isoformat(),
+        "to": (grid_start + timedelta(days=41)).isoformat(),
+        "granularity": "day",
+    }
+    if rng.random() < 0.5:
+        params["member_id"] = rng.choice(ctx.member_ids)
+    return Request("GET", "/api/tasks/calendar", params=params)
+
+
+def task_detail(ctx: Context, rng: random.Random) -> Request:
+    return Request("GET", f"/api/tasks/{rng.choice(ctx.task_ids)}")
+
+
+def task_body(ctx: Context, rng: random.Random) -> dict:
+    start = ctx.anchor + timedelta(days=rng.randint(-30, 30))
+    return {
+        "title": f"Benchmark task {rng.randrange(10 ** 6)}",
+        "description": "Created by the benchmark suite",
+        "status": rng.choice(STATUSES[:3]),
+        "priority": rng.choice(("low", "medium", "high")),
+        "start_date": f"{start.isoformat()}T09:00:00",
+        "end_date": f"{(start + timedelta(days=rng.randint(1, 14))).isoformat()}T17:00:00",
+        "assignee_id": rng.choice(ctx.member_ids),
+        "team_id": rng.choice(ctx.team_ids),
+    }
+
+
+def create_task(ctx: Context, rng: random.Random) -> Request:
+    return Request("POST", "/api/tasks", json=task_body(ctx, rng))
+
+
+def edit_task(ctx: Context, rng: random.Random) -> Request:
+    return Request("PUT", f"/api/tasks/{rng.choice(ctx.task_ids)}", json=task_body(ctx, rng))
+
+
+def status_change(ctx: Context, rng: random.Random) -> Request:
+    return Request("PATCH", f"/api/tasks/{rng.choice(ctx.task_ids)}/status", json={"status": rng.choice(STATUSES[:3])})
+
+
+SCENARIOS: Dict[str, Callable[[Context, random.Random], Request]] = {
+    "login": login,
+    "list_tasks": list_tasks,
+    "list_filters": list_filters,
+    "calendar_month": calendar_month,
+    "task_detail": task_detail,
+    "create_task": create_task,
+    "edit_task": edit_task,
+    "status_change": status_change,
+}
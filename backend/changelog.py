@@ -0,0 +1,161 @@
+# changelog.py
+# Task change log for delta sync (GET /api/sync/tasks).
+#
+#   python changelog.py compact [--retention-days N]
+#
+# Each task mutation appends (task_id, "upsert" | "delete") rows to
+# task_changes in its own transaction; the row id is the sync token. record()
+# bumps the "tasks" table version first, and that row lock is held until
+# commit, so change ids are handed out in commit order and a client never
+# skips over a change that commits late.
+import argparse
+import json
+import os
+from datetime import datetime, timedelta
+from typing import Iterable, Optional
+
+from sqlalchemy import delete, func, literal, select
+from sqlalchemy.orm import Session
+
+import models
+import versions
+
+UPSERT = "upsert"
+DELETE = "delete"
+CHANGE_LOG_RETENTION_DAYS = float(os.environ.get("CHANGE_LOG_RETENTION_DAYS", 7))
+SYNC_MAX_CHANGES = int(os.environ.get("SYNC_MAX_CHANGES", 1000))
+# Set on a session that wrote changes; stream.py wakes its reader after commit
+PENDING_KEY = "task_changes_pending"
+
+
+class InvalidToken(ValueError):
+    pass
+
+
+def change_row(task_id: int, op: str, previous=None) -> dict:
+    return {
+        "task_id": task_id,
+        "op": op,
+        "previous_team_id": previous.team_id if previous is not None else None,
+        "previous_assignee_id": previous.assignee_id if previous is not None else None,
+    }
+
+
+def record(db: Session, upserted: Iterable[int] = (), deleted: Iterable[int] = (), previous: Iterable = ()):
+    # previous: rows with id, team_id and assignee_id read before an update
+    # that may move the tasks to another team or assignee
+    # (crud.locked_task_rows)
+    before = {row.id: row for row in previous}
+    rows = [change_row(task_id, UPSERT, before.get(task_id)) for task_id in upserted]
+    rows += [change_row(task_id, DELETE) for task_id in deleted]
+    versions.bump(db, "tasks")
+    if rows:
+        db.execute(models.TaskChange.__table__.insert(), rows)
+        db.info[PENDING_KEY] = True
+
+
+def record_where(db: Session, *criteria):
+    # Log an upsert for every task matching criteria, e.g. the tasks that
+    # embed a member or team that just changed. Sessions do not autoflush,
+    # so when that member or team is being deleted this runs before the
+    # delete nulls the tasks' assignee_id or team_id, and those are logged
+    # as the previous scope.
+    table = models.TaskChange.__table__
+    versions.bump(db, "tasks")
+    db.execute(table.insert().from_select(
+        ["task_id", "op", "previous_team_id", "previous_assignee_id"],
+        select(models.Task.id, literal(UPSERT), models.Task.team_id, models.Task.assignee_id)
+        .where(*criteria)
+    ))
+    db.info[PENDING_KEY] = True
+
+
+def record_member(db: Session, member_id: int):
+    # Tasks embed their assignee
+    record_where(db, models.Task.assignee_id == member_id)
+
+
+def record_team(db: Session, team_id: int):
+    # Tasks embed their team and their assignee's team
+    members = select(models.Member.id).where(models.Member.team_id == team_id)
+    record_where(db, (models.Task.team_id == team_id) | models.Task.assignee_id.in_(members))
+
+
+def parse_token(token: Optional[str]) -> Optional[int]:
+    if token is None or token == "":
+        return None
+    try:
+        value = int(token)
+    except ValueError:
+        raise InvalidToken("Invalid sync token")
+    if value < 0:
+        raise InvalidToken("Invalid sync token")
+    return value
+
+
+def bounds(db: Session):
+    # (horizon, head): tokens below the horizon may have missed compacted
+    # changes; head is the newest change id
+    oldest, newest = db.execute(select(func.min(models.TaskChange.id), func.max(models.TaskChange.id))).one()
+    if newest is None:
+        return 0, 0
+    return oldest - 1, newest
+
+
+def changes_since(db: Session, since: Optional[int], limit: int = SYNC_MAX_CHANGES) -> dict:
+    # Collapses the changes after since to the last operation per task.
+    # reset means the client must reload everything and continue from token.
+    horizon, head = bounds(db)
+    if since is None or since < horizon or since > head:
+        return {"token": head, "reset": True, "has_more": False, "upserted": [], "deleted": []}
+
+    rows = db.execute(
+        select(models.TaskChange.id, models.TaskChange.task_id, models.TaskChange.op)
+        .where(models.TaskChange.id > since)
+        .order_by(models.TaskChange.id)
+        .limit(limit + 1)
+    ).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    last_op = {}
+    for _, task_id, op in rows:
+        last_op[task_id] = op
+    return {
+        "token": rows[-1].id if rows else since,
+        "reset": False,
+        "has_more": has_more,
+        "upserted": [task_id for task_id, op in last_op.items() if op == UPSERT],
+        "deleted": [task_id for task_id, op in last_op.items() if op == DELETE],
+    }
+
+
+def compact(db: Session, retention_days: float = CHANGE_LOG_RETENTION_DAYS) -> int:
+    # Drops changes older than the retention window, always keeping the
+    # newest row; clients holding an older token get a reset
+    cutoff = datetime.utcnow() - timedelta(days=retention_days)
+    newest = db.scalar(select(func.max(models.TaskChange.id)))
+    if newest is None:
+        return 0
+    result = db.execute(
+        delete(models.TaskChange).where(
+            models.TaskChange.changed_at < cutoff,
+            models.TaskChange.id < newest
+        )
+    )
+    db.commit()
+    return result.rowcount
+
+
+if __name__ == "__main__":
+    from database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Maintain the task change log")
+    parser.add_argument("command", choices=("compact",))
+    parser.add_argument("--retention-days", type=float, default=CHANGE_LOG_RETENTION_DAYS)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        print(json.dumps({"deleted": compact(db, args.retention_days)}))
+    finally:
+        db.close()
@@ -1,10 +1,100 @@
 # crud.py
-from sqlalchemy.orm import Session
-from sqlalchemy import or_, and_
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.orm import Session, aliased, joinedload, load_only, selectinload
+from sqlalchemy.orm.attributes import set_committed_value
 import models, schemas
+import changelog
+import pagination
+import search as search_backend
+import stats
+import task_calendar
+import versions
 from auth import get_password_hash
-from datetime import datetime
-from typing import Optional
+from datetime import date, datetime
+from typing import List, Optional
+
+
+# Loader strategies: eager-load exactly the relationships each response schema
+# serializes. Lists use selectin loads so the paged SELECT stays narrow and each
+# related row is fetched once per page; single rows use joined loads.
+def member_loaders(many: bool = False):
+    strategy = selectinload if many else joinedload
+    return (strategy(models.Member.team),)
+
+
+def task_loaders(many: bool = False):
+    strategy = selectinload if many else joinedload
+    return (
+        strategy(models.Task.assignee).options(*member_loaders(many)),
+        strategy(models.Task.team),
+    )
+
+
+def load_task_relations(db: Session, task):
+    # The assignee (with its team) and the team of a task that came back from
+    # RETURNING, in one SELECT, attached as if they had been eager-loaded
+    team = aliased(models.Team)
+    row = db.execute(
+        select(models.Member, team)
+        .options(joinedload(models.Member.team))
+        .outerjoin(team, team.id == task.team_id)
+        .where(models.Member.id == task.assignee_id)
+    ).first()
+    assignee, task_team = row if row else (None, db.get(models.Team, task.team_id) if task.team_id else None)
+    set_committed_value(task, "assignee", assignee)
+    set_committed_value(task, "team", task_team)
+    return task
+
+
+def task_projection_loaders(projection):
+    # load_only for a sparse fieldset (see projection.py). Many-to-one selectin
+    # loads key off the foreign key, so it is loaded even when not returned.
+    columns = set(projection.columns)
+    options = []
+    for name, nested_columns in projection.relations:
+        relationship = getattr(models.Task, name)
+        columns.add(relationship.property.local_remote_pairs[0][0].key)
+        target = relationship.property.mapper.class_
+        loader = selectinload(relationship)
+        if nested_columns is None:
+            if target is models.Member:
+                loader = loader.options(*member_loaders(many=True))
+        else:
+            loader = loader.load_only(*(getattr(target, column) for column in nested_columns))
+        options.append(loader)
+    return [load_only(*(getattr(models.Task, column) for column in sorted(columns)))] + options
+
+
+# Single-row updates: one UPDATE ... RETURNING hands back the updated row,
+# and the loaders fetch its related rows, instead of SELECT, assign, flush
+# and refresh. values holds only the columns to change: all of them for PUT,
+# the fields sent for PATCH.
+def update_returning(model, row_id: int, values: dict, loaders=()):
+    return (
+        update(model).where(model.id == row_id).values(**values)
+        .returning(model).options(*loaders)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def update_row(db: Session, model, row_id: int, values: dict, loaders=()):
+    # The updated row, or None when there is no such row
+    if db.get_bind().dialect.update_returning:
+        return db.scalars(update_returning(model, row_id, values, loaders)).first()
+    result = db.execute(
+        update(model).where(model.id == row_id).values(**values),
+        execution_options={"synchronize_session": False}
+    )
+    if not result.rowcount:
+        return None
+    return db.query(model).options(*loaders).filter(model.id == row_id).populate_existing().first()
+
+
+def commit_loaded(db: Session):
+    # Everything the response needs is already loaded; detached objects are
+    # not expired by the commit, so serializing them issues no more SELECTs
+    db.expunge_all()
+    db.commit()
 
 
 # User CRUD operations
@@ -16,8 +106,9 @@ def get_user_by_email(db: Session, email: str):
     return db.query(models.User).filter(models.User.email == email).first()
 
 
-def create_user(db: Session, user: schemas.UserCreate):
-    hashed_password = get_password_hash(user.password)
+def create_user(db: Session, user: schemas.UserCreate, hashed_password: Optional[str] = None):
+    if hashed_password is None:
+        hashed_password = get_password_hash(user.password)
     db_user = models.User(
         email=user.email,
         name=user.name,
@@ -29,9 +120,26 @@ def create_user(db: Session, user: schemas.UserCreate):
     return db_user
 
 
+def update_user_password_hash(db: Session, user: models.User, hashed_password: str):
+    user.hashed_password = hashed_password
+    db.commit()
+    return user
+
+
 # Team CRUD operations
-def get_teams(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.Team).offset(skip).limit(limit).all()
+def get_teams(
+        db: Session,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        sort: Optional[str] = None
+):
+    query = pagination.apply_keyset(
+        db.query(models.Team), models.Team, sort=sort, cursor=cursor, dialect_name=db.get_bind().dialect.name
+    )
+    if cursor:
+        return query.limit(limit).all()
+    return query.offset(skip).limit(limit).all()
 
 
 def get_team(db: Session, team_id: int):
@@ -41,65 +149,94 @@ def get_team(db: Session, team_id: int):
 def create_team(db: Session, team: schemas.TeamCreate):
     db_team = models.Team(**team.dict())
     db.add(db_team)
+    versions.bump(db, "teams")
     db.commit()
     db.refresh(db_team)
     return db_team
 
 
-def update_team(db: Session, team_id: int, team: schemas.TeamUpdate):
-    db_team = get_team(db, team_id)
-    for key, value in team.dict().items():
-        setattr(db_team, key, value)
-    db.commit()
-    db.refresh(db_team)
+def update_team(db: Session, team_id: int, values: dict):
+    if not values:
+        return get_team(db, team_id)
+    db_team = update_row(db, models.Team, team_id, values)
+    if db_team is None:
+        return None
+    versions.bump(db, "teams")
+    changelog.record_team(db, team_id)
+    commit_loaded(db)
     return db_team
 
 
 def delete_team(db: Session, team_id: int):
     db_team = get_team(db, team_id)
+    # The delete nulls team_id on the team's tasks; count them under "none"
+    rows = locked_task_rows_where(db, models.Task.team_id == team_id)
     db.delete(db_team)
+    stats.record(db, added=[dict(row._mapping, team_id=None) for row in rows], removed=rows)
+    versions.bump(db, "teams")
+    changelog.record_team(db, team_id)
     db.commit()
     return db_team
 
 
 # Member CRUD operations
-def get_members(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.Member).offset(skip).limit(limit).all()
+def get_members(
+        db: Session,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        sort: Optional[str] = None
+):
+    query = db.query(models.Member).options(*member_loaders(many=True))
+    query = pagination.apply_keyset(
+        query, models.Member, sort=sort, cursor=cursor, dialect_name=db.get_bind().dialect.name
+    )
+    if cursor:
+        return query.limit(limit).all()
+    return query.offset(skip).limit(limit).all()
 
 
 def get_member(db: Session, member_id: int):
-    return db.query(models.Member).filter(models.Member.id == member_id).first()
+    return db.query(models.Member).options(*member_loaders()).filter(models.Member.id == member_id).first()
 
 
 def create_member(db: Session, member: schemas.MemberCreate):
     db_member = models.Member(**member.dict())
     db.add(db_member)
+    versions.bump(db, "members")
     db.commit()
     db.refresh(db_member)
     return db_member
 
 
-def update_member(db: Session, member_id: int, member: schemas.MemberUpdate):
-    db_member = get_member(db, member_id)
-    for key, value in member.dict().items():
-        setattr(db_member, key, value)
-    db.commit()
-    db.refresh(db_member)
+def update_member(db: Session, member_id: int, values: dict):
+    if not values:
+        return get_member(db, member_id)
+    db_member = update_row(db, models.Member, member_id, values, member_loaders(many=True))
+    if db_member is None:
+        return None
+    versions.bump(db, "members")
+    changelog.record_member(db, member_id)
+    commit_loaded(db)
     return db_member
 
 
 def delete_member(db: Session, member_id: int):
     db_member = get_member(db, member_id)
+    # The delete nulls assignee_id on the member's tasks; see delete_team
+    rows = locked_task_rows_where(db, models.Task.assignee_id == member_id)
     db.delete(db_member)
+    stats.record(db, added=[dict(row._mapping, assignee_id=None) for row in rows], removed=rows)
+    versions.bump(db, "members")
+    changelog.record_member(db, member_id)
     db.commit()
     return db_member
 
 
 # Task CRUD operations
-def get_tasks(
-        db: Session,
-        skip: int = 0,
-        limit: int = 100,
+def filter_tasks(
+        query,
+        bind,
         member_id: Optional[int] = None,
         team_id: Optional[int] = None,
         status: Optional[str] = None,
@@ -107,9 +244,9 @@ def get_tasks(
         start_date: Optional[str] = None,
         end_date: Optional[str] = None
 ):
-    query = db.query(models.Task)
-
-    # Apply filters
+    # Works on a sync Query as well as a select() (async path, export); bind
+    # is the sync engine, used for its dialect and the full-text index probe.
+    # Returns the filtered query and the search relevance order, if any.
     if member_id:
         query = query.filter(models.Task.assignee_id == member_id)
 
@@ -119,69 +256,323 @@ def get_tasks(
     if status:
         query = query.filter(models.Task.status == status)
 
+    rank = None
     if search:
-        search_term = f"%{search}%"
-        query = query.filter(
-            or_(
-                models.Task.title.ilike(search_term),
-                models.Task.description.ilike(search_term)
-            )
-        )
+        query, rank = search_backend.apply_search(query, search, bind)
 
     if start_date and end_date:
         start = datetime.strptime(start_date, "%Y-%m-%d")
         end = datetime.strptime(end_date, "%Y-%m-%d")
+        # Interval overlap; equivalent to "starts in, ends in, or spans the range"
+        # but a plain range on start_date can use ix_tasks_start_date_end_date
         query = query.filter(
-            or_(
-                and_(
-                    models.Task.start_date >= start,
-                    models.Task.start_date <= end
-                ),
-                and_(
-                    models.Task.end_date >= start,
-                    models.Task.end_date <= end
-                ),
-                and_(
-                    models.Task.start_date <= start,
-                    models.Task.end_date >= end
-                )
-            )
+            models.Task.start_date <= end,
+            models.Task.end_date >= start
         )
 
-    return query.offset(skip).limit(limit).all()
+    return query, rank
+
+
+def task_query(
+        query,
+        bind,
+        skip: int = 0,
+        limit: int = 100,
+        member_id: Optional[int] = None,
+        team_id: Optional[int] = None,
+        status: Optional[str] = None,
+        search: Optional[str] = None,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        cursor: Optional[str] = None,
+        sort: Optional[str] = None
+):
+    query, rank = filter_tasks(
+        query,
+        bind,
+        member_id=member_id,
+        team_id=team_id,
+        status=status,
+        search=search,
+        start_date=start_date,
+        end_date=end_date
+    )
+
+    if rank is not None and not sort and not cursor:
+        # Relevance order; paged with skip since rank is not a stable seek key
+        return query.order_by(rank, models.Task.id).offset(skip).limit(limit)
+
+    # A cursor replaces skip: the page starts right after the row it encodes
+    query = pagination.apply_keyset(
+        query, models.Task, sort=sort, cursor=cursor, dialect_name=bind.dialect.name
+    )
+    if cursor:
+        return query.limit(limit)
+    return query.offset(skip).limit(limit)
+
+
+def get_tasks(
+        db: Session,
+        skip: int = 0,
+        limit: int = 100,
+        member_id: Optional[int] = None,
+        team_id: Optional[int] = None,
+        status: Optional[str] = None,
+        search: Optional[str] = None,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        cursor: Optional[str] = None,
+        sort: Optional[str] = None,
+        projection=None
+):
+    if projection is not None:
+        options = task_projection_loaders(projection)
+    else:
+        options = task_loaders(many=True)
+    query = db.query(models.Task).options(*options)
+    # The session's connection, so the first search probes the index on it
+    # (under AsyncSession.run_sync, without blocking the event loop)
+    return task_query(
+        query,
+        db.connection(),
+        skip=skip,
+        limit=limit,
+        member_id=member_id,
+        team_id=team_id,
+        status=status,
+        search=search,
+        start_date=start_date,
+        end_date=end_date,
+        cursor=cursor,
+        sort=sort
+    ).all()
+
+
+def get_task_calendar(
+        db: Session,
+        start: date,
+        end: date,
+        granularity: str = "day",
+        member_id: Optional[int] = None,
+        team_id: Optional[int] = None,
+        status: Optional[str] = None
+):
+    starts = task_calendar.bucket_starts(start, end, granularity)
+    lower, upper = task_calendar.range_bounds(starts[0], end)
+    query = select(
+        models.Task.id,
+        models.Task.title,
+        models.Task.status,
+        models.Task.priority,
+        models.Task.start_date,
+        models.Task.end_date,
+    )
+    query, _ = filter_tasks(query, db.get_bind(), member_id=member_id, team_id=team_id, status=status)
+    query = query.where(
+        models.Task.start_date < upper,
+        models.Task.end_date >= lower
+    ).order_by(models.Task.start_date, models.Task.id)
+    rows = db.execute(query).all()
+    return task_calendar.build_calendar(rows, starts, start, end, granularity)
+
+
+# Flat task columns for exports; no relationships, no ORM identity map
+EXPORT_COLUMNS = (
+    models.Task.id,
+    models.Task.title,
+    models.Task.description,
+    models.Task.status,
+    models.Task.priority,
+    models.Task.start_date,
+    models.Task.end_date,
+    models.Task.creator_id,
+    models.Task.assignee_id,
+    models.Task.team_id,
+    models.Task.created_at,
+    models.Task.updated_at,
+)
+
+
+def get_task_changes(db: Session, since: Optional[int], limit: int = changelog.SYNC_MAX_CHANGES):
+    # The change log names the tasks; their current state is loaded here.
+    # A task upserted and deleted again since the last change read is
+    # reported as deleted.
+    changes = changelog.changes_since(db, since, limit)
+    if changes["upserted"]:
+        tasks = db.query(models.Task).options(*task_loaders(many=True)).filter(
+            models.Task.id.in_(changes["upserted"])
+        ).order_by(models.Task.id).all()
+        found = {task.id for task in tasks}
+        changes["deleted"] += [task_id for task_id in changes["upserted"] if task_id not in found]
+        changes["upserted"] = tasks
+    changes["deleted"].sort()
+    return changes
+
+
+def task_export_query(bind, **filters):
+    query, rank = filter_tasks(select(*EXPORT_COLUMNS), bind, **filters)
+    if rank is not None:
+        return query.order_by(rank, models.Task.id)
+    return query.order_by(models.Task.id)
+
+
+def stream_rows(db: Session, query, batch_size: int = 1000):
+    # yield_per turns on server-side cursors where the driver has them, so
+    # only one batch of rows is held in memory at a time
+    result = db.execute(query.execution_options(yield_per=batch_size))
+    for partition in result.partitions():
+        yield partition
 
 
 def get_task(db: Session, task_id: int):
-    return db.query(models.Task).filter(models.Task.id == task_id).first()
+    return db.query(models.Task).options(*task_loaders()).filter(models.Task.id == task_id).first()
+
+
+def get_task_for_update(db: Session, task_id: int):
+    # Row lock for writes that adjust task_stats from the task's old values;
+    # populate_existing so a copy the route already loaded is re-read
+    query = db.query(models.Task).options(*task_loaders()).filter(models.Task.id == task_id)
+    return query.with_for_update(of=models.Task).populate_existing().first()
 
 
 def create_task(db: Session, task: schemas.TaskCreate, user_id: int):
     db_task = models.Task(**task.dict(), creator_id=user_id)
     db.add(db_task)
+    db.flush()
+    stats.record(db, added=[db_task])
+    changelog.record(db, upserted=[db_task.id])
     db.commit()
     db.refresh(db_task)
     return db_task
 
 
-def update_task(db: Session, task_id: int, task: schemas.TaskUpdate):
-    db_task = get_task(db, task_id)
-    for key, value in task.dict().items():
-        setattr(db_task, key, value)
-    db.commit()
-    db.refresh(db_task)
+def update_task(db: Session, task_id: int, values: dict):
+    if not values:
+        return get_task(db, task_id)
+    # The old counted columns are only read (and locked) when the update
+    # changes one of them; otherwise the UPDATE is the only round trip
+    before = None
+    if set(values) & set(stats.DIMENSIONS.values()):
+        before = locked_task_rows(db, [task_id])
+        if not before:
+            return None
+    db_task = update_row(db, models.Task, task_id, values)
+    if db_task is None:
+        return None
+    load_task_relations(db, db_task)
+    if before:
+        stats.record(db, added=[db_task], removed=before)
+    changelog.record(db, upserted=[task_id], previous=before or ())
+    commit_loaded(db)
     return db_task
 
 
 def update_task_status(db: Session, task_id: int, status: str):
-    db_task = get_task(db, task_id)
-    db_task.status = status
-    db.commit()
-    db.refresh(db_task)
-    return db_task
+    return update_task(db, task_id, {"status": status})
 
 
 def delete_task(db: Session, task_id: int):
-    db_task = get_task(db, task_id)
+    db_task = get_task_for_update(db, task_id)
     db.delete(db_task)
+    stats.record(db, removed=[db_task])
+    changelog.record(db, deleted=[task_id])
     db.commit()
     return db_task
+
+
+# Bulk task operations: set-based statements in a single transaction, with a
+# result per requested item
+def bulk_result(results: List[dict]):
+    succeeded = sum(1 for result in results if result["ok"])
+    return {"succeeded": succeeded, "failed": len(results) - succeeded, "results": results}
+
+
+def existing_ids(db: Session, model, ids):
+    ids = {id_ for id_ in ids if id_ is not None}
+    if not ids:
+        return set()
+    return set(db.scalars(select(model.id).where(model.id.in_(ids))))
+
+
+def bulk_create_tasks(db: Session, tasks: List[schemas.TaskCreate], user_id: int):
+    rows = [dict(task.dict(), creator_id=user_id) for task in tasks]
+    members = existing_ids(db, models.Member, (row["assignee_id"] for row in rows))
+    teams = existing_ids(db, models.Team, (row["team_id"] for row in rows))
+
+    results = []
+    valid = []
+    for index, row in enumerate(rows):
+        if row["assignee_id"] not in members:
+            results.append({"index": index, "ok": False, "error": "Assignee not found"})
+        elif row["team_id"] is not None and row["team_id"] not in teams:
+            results.append({"index": index, "ok": False, "error": "Team not found"})
+        else:
+            results.append({"index": index, "ok": True})
+            valid.append((index, row))
+
+    if valid:
+        # executemany with RETURNING, batched by the dialect's insertmanyvalues
+        statement = insert(models.Task)
+        if db.get_bind().dialect.name == "sqlite":
+            # Ordered RETURNING degrades to one INSERT per row on SQLite; rowids
+            # are handed out in statement order under its single-writer lock,
+            # so sorting recovers the parameter order instead
+            ids = sorted(db.scalars(statement.returning(models.Task.id), [row for _, row in valid]))
+        else:
+            ids = db.scalars(
+                statement.returning(models.Task.id, sort_by_parameter_order=True),
+                [row for _, row in valid]
+            ).all()
+        for (index, _), task_id in zip(valid, ids):
+            results[index]["id"] = task_id
+        stats.record(db, added=[row for _, row in valid])
+        changelog.record(db, upserted=ids)
+    db.commit()
+    return bulk_result(results)
+
+
+def locked_task_rows(db: Session, ids):
+    return locked_task_rows_where(db, models.Task.id.in_(set(ids)))
+
+
+def locked_task_rows_where(db: Session, condition):
+    # The counted columns of the tasks about to change, locked (where the
+    # database supports it) so the stats deltas match what the write sees
+    columns = [models.Task.id] + [getattr(models.Task, column) for column in stats.DIMENSIONS.values()]
+    return db.execute(select(*columns).where(condition).with_for_update()).all()
+
+
+def bulk_update_task_status(db: Session, ids: List[int], status: str):
+    rows = locked_task_rows(db, ids)
+    updated = {row.id for row in rows}
+    if updated:
+        db.execute(
+            update(models.Task).where(models.Task.id.in_(updated)).values(status=status),
+            execution_options={"synchronize_session": False}
+        )
+        stats.record(db, added=[dict(row._mapping, status=status) for row in rows], removed=rows)
+        changelog.record(db, upserted=sorted(updated))
+    db.commit()
+    return bulk_result([
+        {"index": index, "id": task_id, "ok": task_id in updated,
+         "error": None if task_id in updated else "Task not found"}
+        for index, task_id in enumerate(ids)
+    ])
+
+
+def bulk_delete_tasks(db: Session, ids: List[int]):
+    rows = locked_task_rows(db, ids)
+    deleted = {row.id for row in rows}
+    if deleted:
+        db.execute(
+            delete(models.Task).where(models.Task.id.in_(deleted)),
+            execution_options={"synchronize_session": False}
+        )
+        stats.record(db, removed=rows)
+        changelog.record(db, deleted=sorted(deleted))
+    db.commit()
+    return bulk_result([
+        {"index": index, "id": task_id, "ok": task_id in deleted,
+         "error": None if task_id in deleted else "Task not found"}
+        for index, task_id in enumerate(ids)
+    ])
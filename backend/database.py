@@ -1,8 +1,12 @@
 # database.py
 import os
-from sqlalchemy import create_engine
+import threading
+import time
+
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
 
 # Use Heroku's DATABASE_URL environment variable or local SQLite database
 DATABASE_URL = os.environ.get("DATABASE_URL", "sqlite:///./task_management.db")
@@ -11,7 +15,121 @@ DATABASE_URL = os.environ.get("DATABASE_URL", "sqlite:///./task_management.db")
 if DATABASE_URL.startswith("postgres://"):
     DATABASE_URL = DATABASE_URL.replace("postgres://", "postgresql://", 1)
 
-engine = create_engine(DATABASE_URL)
+# Pool sizing; the defaults match SQLAlchemy's own. Sync routes hold their
+# connection until the response is serialized and get_db closes the session,
+# both of which need a threadpool thread; keep DB_POOL_SIZE + DB_MAX_OVERFLOW
+# at or above the expected in-flight requests per worker or checkouts queue
+# for up to DB_POOL_TIMEOUT. /api/health/db shows how close the pool runs.
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", 5))
+DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", 10))
+DB_POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", 30))
+DB_POOL_RECYCLE = int(os.environ.get("DB_POOL_RECYCLE", 1800))
+DB_POOL_PRE_PING = os.environ.get("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+
+# Connect-time PRAGMAs for file-backed SQLite. WAL lets readers run alongside
+# the single writer; busy_timeout makes writers wait instead of failing with
+# "database is locked".
+SQLITE_PRAGMAS = {
+    "journal_mode": os.environ.get("SQLITE_JOURNAL_MODE", "WAL"),
+    "synchronous": os.environ.get("SQLITE_SYNCHRONOUS", "NORMAL"),
+    "busy_timeout": int(os.environ.get("SQLITE_BUSY_TIMEOUT_MS", 5000)),
+    "cache_size": int(os.environ.get("SQLITE_CACHE_SIZE", -64000)),
+    "mmap_size": int(os.environ.get("SQLITE_MMAP_SIZE", 256 * 1024 * 1024)),
+}
+
+
+class TimedQueuePool(QueuePool):
+    # QueuePool that records how long checkouts wait for a free connection
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._wait_lock = threading.Lock()
+        self.checkouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            waited = time.perf_counter() - started
+            with self._wait_lock:
+                self.checkouts += 1
+                self.wait_total += waited
+                self.wait_max = max(self.wait_max, waited)
+
+
+def is_sqlite_memory(url: str) -> bool:
+    return url.startswith("sqlite") and (":memory:" in url or url.rstrip("/") in ("sqlite:", "sqlite+pysqlite:"))
+
+
+def engine_options(url: str, pooled: bool = True) -> dict:
+    if is_sqlite_memory(url):
+        # One shared in-process connection; pool sizing does not apply
+        return {"connect_args": {"check_same_thread": False}}
+
+    options = {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+    if pooled:
+        options["poolclass"] = TimedQueuePool
+    if url.startswith("sqlite"):
+        # Connections move between threadpool threads; the pool hands each
+        # one to a single thread at a time
+        options["connect_args"] = {"check_same_thread": False}
+    return options
+
+
+def apply_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for pragma, value in SQLITE_PRAGMAS.items():
+        cursor.execute(f"PRAGMA {pragma}={value}")
+    cursor.close()
+
+
+def create_db_engine(url: str = DATABASE_URL, **overrides):
+    engine = create_engine(url, **{**engine_options(url), **overrides})
+    if url.startswith("sqlite") and not is_sqlite_memory(url):
+        event.listen(engine, "connect", apply_sqlite_pragmas)
+    return engine
+
+
+def pool_stats(bind=None) -> dict:
+    pool = (bind or engine).pool
+    if not isinstance(pool, QueuePool):
+        return {"pool": type(pool).__name__, "status": pool.status()}
+    stats = {
+        "pool": type(pool).__name__,
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": max(pool.overflow(), 0),
+        "max_overflow": pool._max_overflow,
+    }
+    if isinstance(pool, TimedQueuePool):
+        stats.update({
+            "checkouts": pool.checkouts,
+            "wait_seconds_total": round(pool.wait_total, 6),
+            "wait_seconds_max": round(pool.wait_max, 6),
+        })
+    return stats
+
+
+engine = create_db_engine()
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-Base = declarative_base()
\ No newline at end of file
+Base = declarative_base()
+
+
+# Dependency to get the database session
+def get_db():
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
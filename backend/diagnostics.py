@@ -0,0 +1,320 @@
+# diagnostics.py
+# Opt-in query diagnostics for finding where a slow request spends its time.
+# DIAGNOSTICS_ENABLED=1 turns on three things:
+#
+#   slow queries   any statement over DIAGNOSTICS_SLOW_QUERY_MS is logged with
+#                  its bound parameters and plan (EXPLAIN QUERY PLAN on SQLite,
+#                  EXPLAIN elsewhere; never ANALYZE, so nothing runs twice)
+#   N+1 detection  a request that runs one statement shape more than
+#                  DIAGNOSTICS_N_PLUS_ONE times is flagged with the shape
+#   request log    DIAGNOSTICS_SAMPLE_RATE of requests are written with their
+#                  per-shape statement counts and times
+#
+# Every record is a JSON line in DIAGNOSTICS_FILE, rotated at
+# DIAGNOSTICS_MAX_BYTES; slow queries and N+1 suspects are always written and
+# also logged as warnings. {pid} in the file name keeps workers from rotating
+# each other's file. Summarize the files offline with
+#
+#   python diagnostics.py summary diagnostics-*.jsonl
+#
+# A statement's shape is its SQL text with IN lists and multi-row VALUES
+# collapsed, so lazy loads of the same relationship count as one shape
+# whatever ids they carry. Bound parameters end up in the file as they were
+# sent, so keep it somewhere only operators can read.
+import argparse
+import glob
+import json
+import logging
+import logging.handlers
+import os
+import random
+import re
+import threading
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+from datetime import datetime
+from functools import lru_cache
+from typing import Optional
+
+from sqlalchemy import event
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+DIAGNOSTICS_ENABLED = os.environ.get("DIAGNOSTICS_ENABLED", "0") == "1"
+DIAGNOSTICS_SLOW_QUERY_MS = float(os.environ.get("DIAGNOSTICS_SLOW_QUERY_MS", 100))
+# A request running one shape more than this many times is an N+1 suspect
+DIAGNOSTICS_N_PLUS_ONE = int(os.environ.get("DIAGNOSTICS_N_PLUS_ONE", 5))
+DIAGNOSTICS_SAMPLE_RATE = float(os.environ.get("DIAGNOSTICS_SAMPLE_RATE", 0.01))
+DIAGNOSTICS_FILE = os.environ.get("DIAGNOSTICS_FILE", "diagnostics-{pid}.jsonl")
+DIAGNOSTICS_MAX_BYTES = int(os.environ.get("DIAGNOSTICS_MAX_BYTES", 10 * 1024 * 1024))
+DIAGNOSTICS_BACKUPS = int(os.environ.get("DIAGNOSTICS_BACKUPS", 5))
+# Plans are cached per shape; a slow shape is explained once per process
+PLAN_CACHE_SIZE = 256
+PARAMETER_MAX_LENGTH = 200
+# Shapes listed in a sampled request record
+TOP_SHAPES = 10
+
+PLACEHOLDER = r"(?:\?|%s|%\([^)]*\)s|\$\d+|:\w+)"
+PLACEHOLDER_LIST = re.compile(rf"\(\s*{PLACEHOLDER}(?:\s*,\s*{PLACEHOLDER})*\s*\)")
+REPEATED_LIST = re.compile(r"\(\.\.\.\)(?:\s*,\s*\(\.\.\.\))+")
+WHITESPACE = re.compile(r"\s+")
+
+# {shape: [count, seconds]} for the request being served, if any
+request_statements: ContextVar[Optional[dict]] = ContextVar("request_statements", default=None)
+# "METHOD /path" of the request being served, for slow-query records
+current_request: ContextVar[Optional[str]] = ContextVar("current_request", default=None)
+
+
+# Statements come from a small set of compiled queries, so shapes are cached
+@lru_cache(maxsize=1024)
+def shape(statement: str) -> str:
+    statement = WHITESPACE.sub(" ", statement).strip()
+    return REPEATED_LIST.sub("(...)", PLACEHOLDER_LIST.sub("(...)", statement))
+
+
+def explain_prefix(dialect_name: str) -> str:
+    return "EXPLAIN QUERY PLAN " if dialect_name == "sqlite" else "EXPLAIN "
+
+
+def format_parameters(parameters, executemany: bool):
+    if executemany:
+        rows = list(parameters or ())
+        return {"rows": len(rows), "first": format_parameters(rows[0], False) if rows else None}
+    if isinstance(parameters, dict):
+        return {key: truncate(value) for key, value in parameters.items()}
+    return [truncate(value) for value in parameters or ()]
+
+
+def truncate(value):
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    text = str(value)
+    return text if len(text) <= PARAMETER_MAX_LENGTH else text[:PARAMETER_MAX_LENGTH] + "..."
+
+
+class Diagnostics:
+    def __init__(
+            self,
+            slow_query_ms: float = DIAGNOSTICS_SLOW_QUERY_MS,
+            n_plus_one: int = DIAGNOSTICS_N_PLUS_ONE,
+            sample_rate: float = DIAGNOSTICS_SAMPLE_RATE,
+            path: str = DIAGNOSTICS_FILE,
+    ):
+        self.slow_query_seconds = slow_query_ms / 1000
+        self.n_plus_one = n_plus_one
+        self.sample_rate = sample_rate
+        self.path = path.format(pid=os.getpid())
+        self.plans = OrderedDict()
+        self.counts = {"slow_query": 0, "n_plus_one": 0, "request": 0}
+        self._lock = threading.Lock()
+        self._handler = None
+
+    def write(self, kind: str, record: dict):
+        # RotatingFileHandler serializes writes and rotation between threads
+        if self._handler is None:
+            with self._lock:
+                if self._handler is None:
+                    handler = logging.handlers.RotatingFileHandler(
+                        self.path, maxBytes=DIAGNOSTICS_MAX_BYTES, backupCount=DIAGNOSTICS_BACKUPS, delay=True
+                    )
+                    handler.setFormatter(logging.Formatter("%(message)s"))
+                    self._handler = handler
+        with self._lock:
+            self.counts[kind] += 1
+        line = json.dumps({"at": datetime.utcnow().isoformat(timespec="milliseconds"), "kind": kind, **record},
+                          default=str)
+        self._handler.handle(logging.makeLogRecord({"msg": line, "levelno": logging.INFO}))
+
+    def plan(self, conn, statement: str, parameters, executemany: bool) -> Optional[list]:
+        key = shape(statement)
+        with self._lock:
+            if key in self.plans:
+                self.plans.move_to_end(key)
+                return self.plans[key]
+        if executemany:
+            return None
+        # PostgreSQL aborts the whole transaction when a statement fails, so
+        # there the EXPLAIN runs in a savepoint. SQLite keeps the transaction,
+        # and refuses savepoints while a RETURNING statement has rows to fetch.
+        savepoint = conn.dialect.name == "postgresql"
+        try:
+            # A raw DBAPI cursor on the same connection, so the EXPLAIN sees
+            # the same transaction and does not re-enter these hooks
+            cursor = conn.connection.cursor()
+            try:
+                if savepoint:
+                    cursor.execute("SAVEPOINT diagnostics_explain")
+                try:
+                    cursor.execute(explain_prefix(conn.dialect.name) + statement, parameters)
+                    rows = cursor.fetchall()
+                except Exception:
+                    if savepoint:
+                        cursor.execute("ROLLBACK TO SAVEPOINT diagnostics_explain")
+                    raise
+                finally:
+                    if savepoint:
+                        cursor.execute("RELEASE SAVEPOINT diagnostics_explain")
+            finally:
+                cursor.close()
+        except Exception as exc:
+            logger.debug("EXPLAIN failed for %s", key, exc_info=True)
+            return [f"EXPLAIN failed: {exc}"]
+        # SQLite: (id, parent, notused, detail); PostgreSQL: one text column
+        plan = [row[-1] for row in rows]
+        with self._lock:
+            self.plans[key] = plan
+            while len(self.plans) > PLAN_CACHE_SIZE:
+                self.plans.popitem(last=False)
+        return plan
+
+    def slow_query(self, conn, statement, parameters, executemany, elapsed):
+        record = {
+            "ms": round(elapsed * 1e3, 3),
+            "statement": statement,
+            "parameters": format_parameters(parameters, executemany),
+            "plan": self.plan(conn, statement, parameters, executemany),
+            "request": current_request.get(),
+        }
+        logger.warning("slow query (%.1f ms): %s", record["ms"], shape(statement))
+        self.write("slow_query", record)
+
+    def finish_request(self, method: str, route: str, status_code: int, elapsed: float, statements: dict):
+        suspects = [
+            {"shape": key, "count": count, "ms": round(seconds * 1e3, 3)}
+            for key, (count, seconds) in statements.items() if count > self.n_plus_one
+        ]
+        request = {"method": method, "route": route, "status": status_code}
+        if suspects:
+            for suspect in suspects:
+                logger.warning("suspected N+1 in %s %s: %d x %s", method, route, suspect["count"], suspect["shape"])
+            self.write("n_plus_one", {**request, "statements": suspects})
+        if self.sample_rate and random.random() < self.sample_rate:
+            top = sorted(statements.items(), key=lambda item: item[1][1], reverse=True)[:TOP_SHAPES]
+            self.write("request", {
+                **request,
+                "ms": round(elapsed * 1e3, 3),
+                "queries": sum(count for count, _ in statements.values()),
+                "db_ms": round(sum(seconds for _, seconds in statements.values()) * 1e3, 3),
+                "statements": [
+                    {"shape": key, "count": count, "ms": round(seconds * 1e3, 3)} for key, (count, seconds) in top
+                ],
+            })
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"file": self.path, "plans_cached": len(self.plans), "records": dict(self.counts)}
+
+
+diagnostics = Diagnostics()
+
+
+class DiagnosticsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        statements = {}
+        reset_statements = request_statements.set(statements)
+        reset_request = current_request.set(f"{scope['method']} {scope['path']}")
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            request_statements.reset(reset_statements)
+            current_request.reset(reset_request)
+            diagnostics.finish_request(
+                scope["method"], metrics.route_template(scope), status_code, elapsed, statements
+            )
+
+
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._diagnostics_started = time.perf_counter()
+
+
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - context._diagnostics_started
+    statements = request_statements.get()
+    if statements is not None:
+        entry = statements.setdefault(shape(statement), [0, 0.0])
+        entry[0] += 1
+        entry[1] += elapsed
+    if elapsed >= diagnostics.slow_query_seconds:
+        diagnostics.slow_query(conn, statement, parameters, executemany, elapsed)
+
+
+def install(engine):
+    if not event.contains(engine, "before_cursor_execute", before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", after_cursor_execute)
+
+
+def summary(paths) -> dict:
+    slow, suspects, routes = {}, {}, {}
+    for path in paths:
+        with open(path) as file:
+            for line in file:
+                record = json.loads(line)
+                if record["kind"] == "slow_query":
+                    entry = slow.setdefault(shape(record["statement"]), {"count": 0, "max_ms": 0, "plan": None})
+                    entry["count"] += 1
+                    entry["max_ms"] = max(entry["max_ms"], record["ms"])
+                    entry["plan"] = record["plan"] or entry["plan"]
+                elif record["kind"] == "n_plus_one":
+                    for statement in record["statements"]:
+                        key = (f"{record['method']} {record['route']}", statement["shape"])
+                        entry = suspects.setdefault(key, {"requests": 0, "max_count": 0})
+                        entry["requests"] += 1
+                        entry["max_count"] = max(entry["max_count"], statement["count"])
+                else:
+                    entry = routes.setdefault(f"{record['method']} {record['route']}", {
+                        "requests": 0, "ms": 0.0, "db_ms": 0.0, "queries": 0,
+                    })
+                    entry["requests"] += 1
+                    entry["ms"] += record["ms"]
+                    entry["db_ms"] += record["db_ms"]
+                    entry["queries"] += record["queries"]
+    return {
+        "slow_queries": sorted(
+            ({"shape": key, **value} for key, value in slow.items()), key=lambda item: -item["max_ms"]
+        ),
+        "n_plus_one": sorted(
+            ({"route": route, "shape": key, **value} for (route, key), value in suspects.items()),
+            key=lambda item: -item["requests"],
+        ),
+        "sampled_routes": {
+            route: {
+                "requests": value["requests"],
+                "mean_ms": round(value["ms"] / value["requests"], 3),
+                "mean_db_ms": round(value["db_ms"] / value["requests"], 3),
+                "mean_queries": round(value["queries"] / value["requests"], 2),
+            }
+            for route, value in sorted(routes.items())
+        },
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Summarize diagnostics records")
+    parser.add_argument("command", choices=("summary",))
+    parser.add_argument("paths", nargs="*", default=[DIAGNOSTICS_FILE.format(pid="*") + "*"],
+                        help="record files, rotated backups included; globs are expanded")
+    args = parser.parse_args()
+
+    files = sorted({path for pattern in args.paths for path in glob.glob(pattern)})
+    print(json.dumps(summary(files), indent=2))
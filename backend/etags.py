@@ -0,0 +1,65 @@
+# etags.py
+# Strong ETags and If-None-Match handling for the read routes. Tags are built
+# from a primary-key lookup or the table_versions rows, never from the
+# response body, so a 304 is answered before any rows are loaded.
+import hashlib
+from typing import Iterable, Optional
+
+from fastapi import Request, Response
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+import versions
+
+# Clients must revalidate every time; a matching tag costs one small query
+CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(*parts) -> str:
+    return '"%s"' % hashlib.sha1(repr(parts).encode()).hexdigest()
+
+
+def list_etag(db: Session, tables: Iterable[str], query_params) -> str:
+    # Any write to a table the response reads, or different parameters, give
+    # a different tag
+    return make_etag(
+        sorted(versions.current(db, tables).items()),
+        sorted(query_params.multi_items()),
+    )
+
+
+def detail_etag(db: Session, model, id: int, tables: Iterable[str]) -> Optional[str]:
+    row = db.execute(select(model.created_at, model.updated_at).where(model.id == id)).first()
+    if row is None:
+        return None
+    # updated_at alone is not enough: SQLite timestamps have one second
+    # resolution and embedded rows (assignee, team) change on their own, so
+    # the table versions are part of the tag as well
+    return make_etag(
+        model.__tablename__,
+        id,
+        str(row.created_at),
+        str(row.updated_at),
+        sorted(versions.current(db, tables).items()),
+    )
+
+
+def matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    tags = [tag.strip() for tag in header.split(",")]
+    # If-None-Match uses weak comparison
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+
+def conditional(request: Request, response: Response, etag: Optional[str]) -> Optional[Response]:
+    # Returns a 304 to send instead of the body, or tags the response and
+    # returns None
+    if etag is None:
+        return None
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
@@ -0,0 +1,57 @@
+# export.py
+import csv
+import io
+import json
+from datetime import datetime
+
+import crud
+from database import SessionLocal
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+EXPORT_FIELDS = [column.key for column in crud.EXPORT_COLUMNS]
+
+
+def encode_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def ndjson_chunks(partitions):
+    for rows in partitions:
+        yield "".join(
+            json.dumps(
+                {field: encode_value(value) for field, value in zip(EXPORT_FIELDS, row)},
+                separators=(",", ":")
+            ) + "\n"
+            for row in rows
+        )
+
+
+def csv_chunks(partitions):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_FIELDS)
+    # The header goes out before the first row is fetched
+    yield buffer.getvalue()
+    for rows in partitions:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows([[encode_value(value) for value in row] for row in rows])
+        yield buffer.getvalue()
+
+
+def stream_tasks(query, format: str, batch_size: int = 1000):
+    # Runs on its own session: the response outlives the request's handler
+    db = SessionLocal()
+    try:
+        partitions = crud.stream_rows(db, query, batch_size=batch_size)
+        chunks = csv_chunks(partitions) if format == "csv" else ndjson_chunks(partitions)
+        for chunk in chunks:
+            yield chunk
+    finally:
+        db.close()
@@ -0,0 +1,98 @@
+# hashing.py
+import asyncio
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Optional, Tuple
+
+from passlib.context import CryptContext
+
+BCRYPT_ROUNDS = int(os.environ.get("BCRYPT_ROUNDS", 12))
+# "thread" relies on bcrypt releasing the GIL; "process" sidesteps it entirely
+PASSWORD_HASH_EXECUTOR = os.environ.get("PASSWORD_HASH_EXECUTOR", "thread")
+PASSWORD_HASH_WORKERS = int(os.environ.get("PASSWORD_HASH_WORKERS", min(4, os.cpu_count() or 1)))
+# Hashes running or queued before new requests are turned away
+PASSWORD_HASH_MAX_PENDING = int(os.environ.get("PASSWORD_HASH_MAX_PENDING", PASSWORD_HASH_WORKERS * 8))
+
+# Pinning min and max rounds to the configured cost makes any hash made with a
+# different cost "need update", so changing BCRYPT_ROUNDS rehashes on login
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+    bcrypt__max_rounds=BCRYPT_ROUNDS,
+)
+
+
+class HasherBusy(Exception):
+    pass
+
+
+def hash_password(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def verify_password(password: str, hashed_password: str) -> bool:
+    return pwd_context.verify(password, hashed_password)
+
+
+def verify_and_update(password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    return pwd_context.verify_and_update(password, hashed_password)
+
+
+class PasswordHasher:
+    def __init__(
+            self,
+            kind: str = PASSWORD_HASH_EXECUTOR,
+            workers: int = PASSWORD_HASH_WORKERS,
+            max_pending: int = PASSWORD_HASH_MAX_PENDING
+    ):
+        self.kind = kind
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor = None
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="password-hash"
+                )
+        return self._executor
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    async def _run(self, fn, *args):
+        # Admission control: fail fast instead of queueing behind a login burst
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise HasherBusy()
+            self._pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, fn, *args)
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    async def hash(self, password: str) -> str:
+        return await self._run(hash_password, password)
+
+    async def verify_and_update(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        return await self._run(verify_and_update, password, hashed_password)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+password_hasher = PasswordHasher()
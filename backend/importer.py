@@ -0,0 +1,252 @@
+# importer.py
+# Streaming CSV/NDJSON import of teams, members and tasks.
+#
+#   python importer.py teams teams.csv
+#   python importer.py members members.ndjson
+#   python importer.py tasks tasks.csv --creator-email admin@example.com
+#
+# Rows are validated against the Create schemas. References can be ids or
+# names: a team by "team" (name), a task assignee by "assignee_email".
+# Valid rows are inserted in executemany batches, one commit per batch.
+import argparse
+import codecs
+import csv
+import json
+import time
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import func, insert, select
+from sqlalchemy.orm import Session
+
+import changelog
+import models
+import schemas
+import stats
+import versions
+
+IMPORT_KINDS = ("teams", "members", "tasks")
+IMPORT_FORMATS = ("csv", "ndjson")
+MAX_REPORTED_ERRORS = 1000
+
+
+class InvalidImport(ValueError):
+    pass
+
+
+def detect_format(filename: Optional[str], format: Optional[str] = None) -> str:
+    if format:
+        if format not in IMPORT_FORMATS:
+            raise InvalidImport(f"Unsupported format: {format}")
+        return format
+    if filename and filename.lower().endswith((".ndjson", ".jsonl")):
+        return "ndjson"
+    if filename and filename.lower().endswith(".csv"):
+        return "csv"
+    raise InvalidImport("Cannot infer the file format; pass format=csv or format=ndjson")
+
+
+def iter_lines(stream) -> Iterator[str]:
+    # Decode incrementally so large uploads are never read into memory whole
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    for chunk in iter(lambda: stream.read(64 * 1024), b""):
+        pending += decoder.decode(chunk)
+        lines = pending.split("\n")
+        pending = lines.pop()
+        yield from lines
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending
+
+
+def iter_records(stream, format: str) -> Iterator[Tuple[int, Optional[dict], Optional[str]]]:
+    # Yields (line number, record, parse error)
+    if format == "csv":
+        reader = csv.DictReader(line + "\n" for line in iter_lines(stream))
+        for record in reader:
+            # Empty CSV cells mean "not set", not an empty string
+            yield reader.line_num, {key: value for key, value in record.items() if value not in ("", None)}, None
+        return
+
+    for line_number, line in enumerate(iter_lines(stream), start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as exc:
+            yield line_number, None, f"Invalid JSON: {exc}"
+            continue
+        if not isinstance(record, dict):
+            yield line_number, None, "Expected a JSON object"
+            continue
+        yield line_number, record, None
+
+
+class LookupIndex:
+    # In-memory name/email -> id maps so references resolve without a query per row
+
+    def __init__(self, db: Session):
+        self.teams: Dict[str, int] = {}
+        self.team_ids = set()
+        for team_id, name in db.execute(select(models.Team.id, models.Team.name)):
+            self.team_ids.add(team_id)
+            if name is not None:
+                self.teams.setdefault(name.lower(), team_id)
+        self.members: Dict[str, int] = {}
+        self.member_ids = set()
+        for member_id, email in db.execute(select(models.Member.id, models.Member.email)):
+            self.member_ids.add(member_id)
+            if email is not None:
+                self.members.setdefault(email.lower(), member_id)
+
+    def resolve_team(self, record: dict):
+        name = record.pop("team", None)
+        if record.get("team_id") is None and name is not None:
+            team_id = self.teams.get(str(name).lower())
+            if team_id is None:
+                raise InvalidImport(f"Unknown team: {name}")
+            record["team_id"] = team_id
+        elif record.get("team_id") is not None and int(record["team_id"]) not in self.team_ids:
+            raise InvalidImport(f"Unknown team_id: {record['team_id']}")
+
+    def resolve_assignee(self, record: dict):
+        email = record.pop("assignee_email", None)
+        if record.get("assignee_id") is None and email is not None:
+            member_id = self.members.get(str(email).lower())
+            if member_id is None:
+                raise InvalidImport(f"Unknown assignee: {email}")
+            record["assignee_id"] = member_id
+        elif record.get("assignee_id") is not None and int(record["assignee_id"]) not in self.member_ids:
+            raise InvalidImport(f"Unknown assignee_id: {record['assignee_id']}")
+
+
+class Importer:
+    def __init__(self, db: Session, kind: str, creator_id: Optional[int] = None, batch_size: int = 1000):
+        if kind not in IMPORT_KINDS:
+            raise InvalidImport(f"Unsupported import kind: {kind}")
+        if kind == "tasks" and creator_id is None:
+            raise InvalidImport("Task imports need a creator")
+        self.db = db
+        self.kind = kind
+        self.creator_id = creator_id
+        self.batch_size = batch_size
+        self.index = LookupIndex(db)
+        self.processed = 0
+        self.inserted = 0
+        self.failed = 0
+        self.errors = []
+
+    def error(self, line: int, messages):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line, "errors": messages})
+
+    def validate(self, record: dict) -> dict:
+        if self.kind == "teams":
+            return schemas.TeamCreate(**record).dict()
+        self.index.resolve_team(record)
+        if self.kind == "members":
+            return schemas.MemberCreate(**record).dict()
+        self.index.resolve_assignee(record)
+        return dict(schemas.TaskCreate(**record).dict(), creator_id=self.creator_id)
+
+    def flush(self, batch):
+        if not batch:
+            return
+        if self.kind == "teams":
+            rows = self.db.execute(insert(models.Team).returning(models.Team.id, models.Team.name), batch)
+            for team_id, name in rows:
+                self.index.team_ids.add(team_id)
+                self.index.teams.setdefault(name.lower(), team_id)
+            versions.bump(self.db, "teams")
+        elif self.kind == "members":
+            rows = self.db.execute(insert(models.Member).returning(models.Member.id, models.Member.email), batch)
+            for member_id, email in rows:
+                self.index.member_ids.add(member_id)
+                self.index.members.setdefault(email.lower(), member_id)
+            versions.bump(self.db, "members")
+        else:
+            # Core executemany; skips the ORM bulk-insert bookkeeping. The ids
+            # come back through insertmanyvalues for the change log.
+            table = models.Task.__table__
+            ids = self.db.scalars(table.insert().returning(table.c.id), batch).all()
+            stats.record(self.db, added=batch)
+            changelog.record(self.db, upserted=ids)
+        self.db.commit()
+        self.inserted += len(batch)
+        batch.clear()
+
+    def run(self, records: Iterable[Tuple[int, Optional[dict], Optional[str]]]):
+        started = time.perf_counter()
+        batch = []
+        for line, record, parse_error in records:
+            self.processed += 1
+            if parse_error:
+                self.error(line, [parse_error])
+                continue
+            try:
+                batch.append(self.validate(record))
+            except ValidationError as exc:
+                self.error(line, [f"{'.'.join(map(str, e['loc']))}: {e['msg']}" for e in exc.errors()])
+                continue
+            except (InvalidImport, ValueError, TypeError) as exc:
+                self.error(line, [str(exc)])
+                continue
+            if len(batch) >= self.batch_size:
+                self.flush(batch)
+        self.flush(batch)
+        return self.report(time.perf_counter() - started)
+
+    def report(self, seconds: float):
+        return {
+            "kind": self.kind,
+            "processed": self.processed,
+            "inserted": self.inserted,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+            "seconds": round(seconds, 3),
+            "rows_per_second": round(self.processed / seconds) if seconds else None,
+        }
+
+
+def import_stream(db: Session, kind: str, stream, format: str, creator_id: Optional[int] = None, batch_size: int = 1000):
+    importer = Importer(db, kind, creator_id=creator_id, batch_size=batch_size)
+    return importer.run(iter_records(stream, format))
+
+
+if __name__ == "__main__":
+    from database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Import teams, members or tasks from CSV/NDJSON")
+    parser.add_argument("kind", choices=IMPORT_KINDS)
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=IMPORT_FORMATS)
+    parser.add_argument("--creator-email", help="user recorded as creator of imported tasks")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        creator_id = None
+        if args.creator_email:
+            creator_id = db.scalar(
+                select(models.User.id).where(func.lower(models.User.email) == args.creator_email.lower())
+            )
+            if creator_id is None:
+                parser.error(f"No user with email {args.creator_email}")
+        with open(args.path, "rb") as stream:
+            report = import_stream(
+                db,
+                args.kind,
+                stream,
+                detect_format(args.path, args.format),
+                creator_id=creator_id,
+                batch_size=args.batch_size,
+            )
+    except InvalidImport as exc:
+        parser.error(str(exc))
+    finally:
+        db.close()
+    print(json.dumps(report, indent=2))
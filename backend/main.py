@@ -1,17 +1,36 @@
 # main.py
-from fastapi import FastAPI, Depends, HTTPException, status
+from fastapi import FastAPI, Depends, File, HTTPException, Query, Request, Response, UploadFile, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from sqlalchemy.orm import Session
+from datetime import date
 from typing import List, Optional
 import os
 import models
 import schemas
 import crud
-from database import engine, SessionLocal
-from auth import create_access_token, get_current_user, verify_password, get_password_hash
-
-# Create the database tables
-models.Base.metadata.create_all(bind=engine)
+import changelog
+import diagnostics
+import etags
+import export
+import importer
+import metrics
+import pagination
+import projection
+import read_cache
+import serializers
+import stats
+import stream
+import task_calendar
+import versions
+from database import engine, get_db, pool_stats
+from auth import create_access_token, get_current_user, get_stream_user
+from hashing import HasherBusy, password_hasher
+from sweeper import overdue_sweeper
+
+# The schema is created and upgraded by `python migrate.py upgrade`, not here:
+# every worker would otherwise reflect it on import
 
 app = FastAPI(title="Task Management API")
 
@@ -22,40 +41,98 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
+# Request timing and per-request query counts for /metrics
+if metrics.METRICS_ENABLED:
+    app.add_middleware(metrics.MetricsMiddleware)
+    metrics.install(engine)
+
+# Slow-query log and N+1 detection, off unless DIAGNOSTICS_ENABLED=1
+if diagnostics.DIAGNOSTICS_ENABLED:
+    app.add_middleware(diagnostics.DiagnosticsMiddleware)
+    diagnostics.install(engine)
+
+
+def set_next_cursor(response: Response, rows, limit: int, sort: Optional[str]):
+    cursor = pagination.next_cursor(rows, limit, sort)
+    if cursor:
+        response.headers["X-Next-Cursor"] = cursor
+
+
+def invalid_cursor(exc: pagination.InvalidCursor):
+    return HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+
+
+@app.on_event("startup")
+async def start_overdue_sweeper():
+    overdue_sweeper.start()
+
+
+@app.on_event("shutdown")
+async def stop_overdue_sweeper():
+    await overdue_sweeper.stop()
+
+
+@app.on_event("startup")
+async def start_task_stream():
+    stream.task_stream.start()
+
+
+@app.on_event("shutdown")
+async def stop_task_stream():
+    await stream.task_stream.stop()
+
+
+@app.on_event("shutdown")
+def shutdown_password_hasher():
+    password_hasher.shutdown()
 
-# Dependency to get the database session
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+
+@app.exception_handler(HasherBusy)
+async def password_hasher_busy(request: Request, exc: HasherBusy):
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Too many authentication requests, retry shortly"},
+        headers={"Retry-After": "1"},
+    )
 
 
 # Authentication routes
+# bcrypt runs on password_hasher's bounded pool so a burst of logins cannot
+# take over the threadpool the other routes need
 @app.post("/api/auth/register", response_model=schemas.User)
-def register_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
-    db_user = crud.get_user_by_email(db, email=user.email)
+async def register_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
+    db_user = await run_in_threadpool(crud.get_user_by_email, db, email=user.email)
     if db_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered"
         )
-    return crud.create_user(db=db, user=user)
+    hashed_password = await password_hasher.hash(user.password)
+    return await run_in_threadpool(crud.create_user, db=db, user=user, hashed_password=hashed_password)
 
 
 @app.post("/api/auth/login")
-def login(user_credentials: schemas.UserLogin, db: Session = Depends(get_db)):
-    user = crud.get_user_by_email(db, email=user_credentials.email)
-    if not user or not verify_password(user_credentials.password, user.hashed_password):
+async def login(user_credentials: schemas.UserLogin, db: Session = Depends(get_db)):
+    user = await run_in_threadpool(crud.get_user_by_email, db, email=user_credentials.email)
+    valid, new_hash = False, None
+    if user:
+        valid, new_hash = await password_hasher.verify_and_update(
+            user_credentials.password, user.hashed_password
+        )
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+    if new_hash:
+        # Stored hash used a different bcrypt cost; upgrade it transparently
+        await run_in_threadpool(crud.update_user_password_hash, db, user, new_hash)
+
     access_token = create_access_token(
         data={"sub": user.email}
     )
@@ -74,6 +151,8 @@ def login(user_credentials: schemas.UserLogin, db: Session = Depends(get_db)):
 # Task routes
 @app.get("/api/tasks", response_model=List[schemas.Task])
 def read_tasks(
+        request: Request,
+        response: Response,
         skip: int = 0,
         limit: int = 100,
         member_id: Optional[int] = None,
@@ -82,32 +161,152 @@ def read_tasks(
         search: Optional[str] = None,
         start_date: Optional[str] = None,
         end_date: Optional[str] = None,
+        cursor: Optional[str] = None,
+        sort: Optional[str] = None,
+        fields: Optional[str] = Query(
+            None, description="Comma-separated schemas.Task fields, e.g. id,title,assignee.name"
+        ),
+        expand: Optional[str] = Query(None, description="Relationships to embed whole: assignee, team"),
         db: Session = Depends(get_db),
         current_user: schemas.User = Depends(get_current_user)
 ):
-    return crud.get_tasks(
-        db,
-        skip=skip,
-        limit=limit,
-        member_id=member_id,
-        team_id=team_id,
-        status=status,
-        search=search,
-        start_date=start_date,
-        end_date=end_date
+    try:
+        task_projection = projection.parse_task_fields(fields, expand, sort)
+    except (projection.InvalidFields, pagination.InvalidCursor) as exc:
+        # status is shadowed by the filter parameter here
+        raise HTTPException(status_code=400, detail=str(exc))
+    not_modified = etags.conditional(
+        request, response, etags.list_etag(db, versions.TASK_TABLES, request.query_params)
     )
+    if not_modified:
+        return not_modified
+    try:
+        tasks = read_cache.get_tasks(
+            db,
+            skip=skip,
+            limit=limit,
+            member_id=member_id,
+            team_id=team_id,
+            status=status,
+            search=search,
+            start_date=start_date,
+            end_date=end_date,
+            cursor=cursor,
+            sort=sort,
+            projection=task_projection
+        )
+    except pagination.InvalidCursor as exc:
+        raise invalid_cursor(exc)
+    if sort or cursor or not search:
+        set_next_cursor(response, tasks, limit, sort)
+    return serializers.respond(
+        schemas.Task, tasks, response, many=True, sparse=task_projection is not None
+    )
+
+
+@app.get("/api/tasks/calendar", response_model=schemas.TaskCalendar)
+def read_task_calendar(
+        from_date: date = Query(..., alias="from"),
+        to_date: date = Query(..., alias="to"),
+        granularity: str = Query("day", regex="^(day|week)$"),
+        member_id: Optional[int] = None,
+        team_id: Optional[int] = None,
+        status: Optional[str] = None,
+        db: Session = Depends(get_db),
+        current_user: schemas.User = Depends(get_current_user)
+):
+    try:
+        calendar = crud.get_task_calendar(
+            db,
+            start=from_date,
+            end=to_date,
+            granularity=granularity,
+            member_id=member_id,
+            team_id=team_id,
+            status=status
+        )
+    except task_calendar.InvalidRange as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    return serializers.respond(schemas.TaskCalendar, calendar)
+
+
+@app.get("/api/tasks/export")
+def export_tasks(
+        format: str = Query("ndjson", regex="^(ndjson|csv)$"),
+        member_id: Optional[int] = None,
+        team_id: Optional[int] = None,
+        status: Optional[str] = None,
+        search: Optional[str] = None,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        current_user: schemas.User = Depends(get_current_user)
+):
+    try:
+        query = crud.task_export_query(
+            engine,
+            member_id=member_id,
+            team_id=team_id,
+            status=status,
+            search=search,
+            start_date=start_date,
+            end_date=end_date
+        )
+    except ValueError as exc:
+        # Fail before the stream starts; a bad date cannot be reported mid-body
+        raise HTTPException(status_code=400, detail=str(exc))
+    return StreamingResponse(
+        export.stream_tasks(query, format),
+        media_type=export.EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="tasks.{format}"'},
+    )
+
+
+# Bulk task routes; registered before /api/tasks/{task_id} so "bulk" is not
+# parsed as a task id
+@app.post("/api/tasks/bulk", response_model=schemas.BulkResult)
+def bulk_create_tasks(
+        payload: schemas.TaskBulkCreate,
+        db: Session = Depends(get_db),
+        current_user: schemas.User = Depends(get_current_user)
+):
+    return crud.bulk_create_tasks(db=db, tasks=payload.tasks, user_id=current_user.id)
+
+
+@app.patch("/api/tasks/bulk/status", response_model=schemas.BulkResult)
+def bulk_update_task_status(
+        payload: schemas.TaskBulkStatusUpdate,
+        db: Session = Depends(get_db),
+        current_user: schemas.User = Depends(get_current_user)
+):
+    return crud.bulk_update_task_status(db=db, ids=payload.ids, status=payload.status)
+
+
+@app.delete("/api/tasks/bulk", response_model=schemas.BulkResult)
+def bulk_delete_tasks(
+        payload: schemas.TaskBulkDelete,
+        db: Session = Depends(get_db),
+        current_user: schemas.User = Depends(get_current_user)
+):
+    return crud.bulk_delete_tasks(db=db, ids=payload.ids)
 
 
 @app.get("/api/tasks/{task_id}", response_model=schemas.Task)
 def read_task(
+        request: Request,
+        response: Response,
         task_id: int,
         db: Session = Depends(get_db),
         current_user: schemas.User = Depends(get_current_user)
 ):
+    not_modified = etags.conditional(
+        request, response, etags.detail_etag(db, models.Task, task_id, versions.TASK_TABLES)
+    )
+    if not_modified:
+        return not_modified
     db_task = crud.get_task(db, task_id=task_id)
     if db_task is None:
         raise HTTPException(status_code=404, detail="Task not found")
-    return db_task
+    return serializers.respond(schemas.Task, db_task, response)
 
 
 @app.post("/api/tasks", response_model=schemas.Task)
@@ -116,9 +315,11 @@ def create_task(
         db: Session = Depends(get_db),
         current_user: schemas.User = Depends(get_current_user)
 ):
-    return crud.create_task(db=db, task=task, user_id=current_user.id)
+    return serializers.respond(schemas.Task, crud.create_task(db=db, task=task, user_id=current_user.id))
 
 
+# PUT replaces every field, PATCH only the fields sent; both are a single
+# UPDATE ... RETURNING (see crud.update_row)
 @app.put("/api/tasks/{task_id}", response_model=schemas.Task)
 def update_task(
         task_id: int,
@@ -126,10 +327,23 @@ def update_task(
         db: Session = Depends(get_db),
         current_user: schemas.User = Depends(get_current_user)
 ):
-    db_task = crud.get_task(db, task_id=task_id)
+    db_task = crud.update_task(db=db, task_id=task_id, values=task.dict())
+    if db_task is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+    return serializers.respond(schemas.Task, db_task)
+
+
+@app.patch("/api/tasks/{task_id}", response_model=schemas.Task)
+def patch_task(
+        task_id: int,
+        task: schemas.TaskPatch,
+        db: Session = Depends(get_db),
+        current_user: schemas.User = Depends(get_current_user)
+):
+    db_task = crud.update_task(db=db, task_id=task_id, values=task.dict(exclude_unset=True))
     if db_task is None:
         raise HTTPException(status_code=404, detail="Task not found")
-    return crud.update_task(db=db, task_id=task_id, task=task)
+    return serializers.respond(schemas.Task, db_task)
 
 
 @app.patch("/api/tasks/{task_id}/status", response_model=schemas.Task)
@@ -139,10 +353,10 @@ def update_task_status(
         db: Session = Depends(get_db),
         current_user: schemas.User = Depends(get_current_user)
 ):
-    db_task = crud.get_task(db, task_id=task_id)
+    db_task = crud.update_task_status(db=db, task_id=task_id, status=status_update.status)
     if db_task is None:
         raise HTTPException(status_code=404, detail="Task not found")
-    return crud.update_task_status(db=db, task_id=task_id, status=status_update.status)
+    return serializers.respond(schemas.Task, db_task)
 
 
 @app.delete("/api/tasks/{task_id}", response_model=schemas.Task)
@@ -154,30 +368,51 @@ def delete_task(
     db_task = crud.get_task(db, task_id=task_id)
     if db_task is None:
         raise HTTPException(status_code=404, detail="Task not found")
-    return crud.delete_task(db=db, task_id=task_id)
+    return serializers.respond(schemas.Task, crud.delete_task(db=db, task_id=task_id))
 
 
 # Member routes
 @app.get("/api/members", response_model=List[schemas.Member])
 def read_members(
+        request: Request,
+        response: Response,
         skip: int = 0,
         limit: int = 100,
+        cursor: Optional[str] = None,
+        sort: Optional[str] = None,
         db: Session = Depends(get_db),
         current_user: schemas.User = Depends(get_current_user)
 ):
-    return crud.get_members(db, skip=skip, limit=limit)
+    not_modified = etags.conditional(
+        request, response, etags.list_etag(db, versions.MEMBER_TABLES, request.query_params)
+    )
+    if not_modified:
+        return not_modified
+    try:
+        members = read_cache.get_members(db, skip=skip, limit=limit, cursor=cursor, sort=sort)
+    except pagination.InvalidCursor as exc:
+        raise invalid_cursor(exc)
+    set_next_cursor(response, members, limit, sort)
+    return serializers.respond(schemas.Member, members, response, many=True)
 
 
 @app.get("/api/members/{member_id}", response_model=schemas.Member)
 def read_member(
+        request: Request,
+        response: Response,
         member_id: int,
         db: Session = Depends(get_db),
         current_user: schemas.User = Depends(get_current_user)
 ):
-    db_member = crud.get_member(db, member_id=member_id)
+    not_modified = etags.conditional(
+        request, response, etags.detail_etag(db, models.Member, member_id, versions.MEMBER_TABLES)
+    )
+    if not_modified:
+        return not_modified
+    db_member = read_cache.get_member(db, member_id=member_id)
     if db_member is None:
         raise HTTPException(status_code=404, detail="Member not found")
-    return db_member
+    return serializers.respond(schemas.Member, db_member, response)
 
 
 @app.post("/api/members", response_model=schemas.Member)
@@ -186,7 +421,7 @@ def create_member(
         db: Session = Depends(get_db),
         current_user: schemas.User = Depends(get_current_user)
 ):
-    return crud.create_member(db=db, member=member)
+    return serializers.respond(schemas.Member, crud.create_member(db=db, member=member))
 
 
 @app.put("/api/members/{member_id}", response_model=schemas.Member)
@@ -196,10 +431,23 @@ def update_member(
         db: Session = Depends(get_db),
         current_user: schemas.User = Depends(get_current_user)
 ):
-    db_member = crud.get_member(db, member_id=member_id)
+    db_member = crud.update_member(db=db, member_id=member_id, values=member.dict())
+    if db_member is None:
+        raise HTTPException(status_code=404, detail="Member not found")
+    return serializers.respond(schemas.Member, db_member)
+
+
+@app.patch("/api/members/{member_id}", response_model=schemas.Member)
+def patch_member(
+        member_id: int,
+        member: schemas.MemberPatch,
+        db: Session = Depends(get_db),
+        current_user: schemas.User = Depends(get_current_user)
+):
+    db_member = crud.update_member(db=db, member_id=member_id, values=member.dict(exclude_unset=True))
     if db_member is None:
         raise HTTPException(status_code=404, detail="Member not found")
-    return crud.update_member(db=db, member_id=member_id, member=member)
+    return serializers.respond(schemas.Member, db_member)
 
 
 @app.delete("/api/members/{member_id}", response_model=schemas.Member)
@@ -211,30 +459,51 @@ def delete_member(
     db_member = crud.get_member(db, member_id=member_id)
     if db_member is None:
         raise HTTPException(status_code=404, detail="Member not found")
-    return crud.delete_member(db=db, member_id=member_id)
+    return serializers.respond(schemas.Member, crud.delete_member(db=db, member_id=member_id))
 
 
 # Team routes
 @app.get("/api/teams", response_model=List[schemas.Team])
 def read_teams(
+        request: Request,
+        response: Response,
         skip: int = 0,
         limit: int = 100,
+        cursor: Optional[str] = None,
+        sort: Optional[str] = None,
         db: Session = Depends(get_db),
         current_user: schemas.User = Depends(get_current_user)
 ):
-    return crud.get_teams(db, skip=skip, limit=limit)
+    not_modified = etags.conditional(
+        request, response, etags.list_etag(db, versions.TEAM_TABLES, request.query_params)
+    )
+    if not_modified:
+        return not_modified
+    try:
+        teams = read_cache.get_teams(db, skip=skip, limit=limit, cursor=cursor, sort=sort)
+    except pagination.InvalidCursor as exc:
+        raise invalid_cursor(exc)
+    set_next_cursor(response, teams, limit, sort)
+    return serializers.respond(schemas.Team, teams, response, many=True)
 
 
 @app.get("/api/teams/{team_id}", response_model=schemas.Team)
 def read_team(
+        request: Request,
+        response: Response,
         team_id: int,
         db: Session = Depends(get_db),
         current_user: schemas.User = Depends(get_current_user)
 ):
-    db_team = crud.get_team(db, team_id=team_id)
+    not_modified = etags.conditional(
+        request, response, etags.detail_etag(db, models.Team, team_id, versions.TEAM_TABLES)
+    )
+    if not_modified:
+        return not_modified
+    db_team = read_cache.get_team(db, team_id=team_id)
     if db_team is None:
         raise HTTPException(status_code=404, detail="Team not found")
-    return db_team
+    return serializers.respond(schemas.Team, db_team, response)
 
 
 @app.post("/api/teams", response_model=schemas.Team)
@@ -243,7 +512,7 @@ def create_team(
         db: Session = Depends(get_db),
         current_user: schemas.User = Depends(get_current_user)
 ):
-    return crud.create_team(db=db, team=team)
+    return serializers.respond(schemas.Team, crud.create_team(db=db, team=team))
 
 
 @app.put("/api/teams/{team_id}", response_model=schemas.Team)
@@ -253,10 +522,23 @@ def update_team(
         db: Session = Depends(get_db),
         current_user: schemas.User = Depends(get_current_user)
 ):
-    db_team = crud.get_team(db, team_id=team_id)
+    db_team = crud.update_team(db=db, team_id=team_id, values=team.dict())
     if db_team is None:
         raise HTTPException(status_code=404, detail="Team not found")
-    return crud.update_team(db=db, team_id=team_id, team=team)
+    return serializers.respond(schemas.Team, db_team)
+
+
+@app.patch("/api/teams/{team_id}", response_model=schemas.Team)
+def patch_team(
+        team_id: int,
+        team: schemas.TeamPatch,
+        db: Session = Depends(get_db),
+        current_user: schemas.User = Depends(get_current_user)
+):
+    db_team = crud.update_team(db=db, team_id=team_id, values=team.dict(exclude_unset=True))
+    if db_team is None:
+        raise HTTPException(status_code=404, detail="Team not found")
+    return serializers.respond(schemas.Team, db_team)
 
 
 @app.delete("/api/teams/{team_id}", response_model=schemas.Team)
@@ -268,7 +550,112 @@ def delete_team(
     db_team = crud.get_team(db, team_id=team_id)
     if db_team is None:
         raise HTTPException(status_code=404, detail="Team not found")
-    return crud.delete_team(db=db, team_id=team_id)
+    return serializers.respond(schemas.Team, crud.delete_team(db=db, team_id=team_id))
+
+
+# Bulk import
+@app.post("/api/import/{kind}")
+def import_records(
+        kind: str,
+        file: UploadFile = File(...),
+        format: Optional[str] = Query(None, regex="^(csv|ndjson)$"),
+        batch_size: int = Query(1000, ge=1, le=10000),
+        db: Session = Depends(get_db),
+        current_user: schemas.User = Depends(get_current_user)
+):
+    try:
+        return importer.import_stream(
+            db,
+            kind,
+            file.file,
+            importer.detect_format(file.filename, format),
+            creator_id=current_user.id,
+            batch_size=batch_size,
+        )
+    except importer.InvalidImport as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+
+
+# Dashboard counts, read from the task_stats summary table
+@app.get("/api/stats/tasks", response_model=schemas.TaskStats)
+def read_task_stats(
+        db: Session = Depends(get_db),
+        current_user: schemas.User = Depends(get_current_user)
+):
+    return stats.summary(db)
+
+
+# Delta sync: tasks upserted and deleted since a token from a previous call.
+# Without a token, or with one older than the compacted change log, the
+# response has reset=true and the client reloads /api/tasks before syncing
+# from the returned token.
+@app.get("/api/sync/tasks", response_model=schemas.TaskSync)
+def sync_tasks(
+        since: Optional[str] = None,
+        limit: int = Query(changelog.SYNC_MAX_CHANGES, ge=1, le=changelog.SYNC_MAX_CHANGES),
+        db: Session = Depends(get_db),
+        current_user: schemas.User = Depends(get_current_user)
+):
+    try:
+        token = changelog.parse_token(since)
+    except changelog.InvalidToken as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+    changes = crud.get_task_changes(db, token, limit)
+    changes["token"] = str(changes["token"])
+    changes["upserted"] = serializers.dump_many(schemas.Task, changes["upserted"])
+    return serializers.respond(schemas.TaskSync, changes)
+
+
+# Live task changes as Server-Sent Events, optionally limited to one team or
+# assignee; see stream.py for the event format
+@app.get("/api/stream/tasks")
+async def stream_tasks(
+        team_id: Optional[int] = None,
+        member_id: Optional[int] = None,
+        current_user: schemas.User = Depends(get_stream_user)
+):
+    subscription = await stream.task_stream.subscribe(team_id=team_id, member_id=member_id)
+    return StreamingResponse(
+        stream.events(stream.task_stream, subscription),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# Read cache counters for this worker process
+@app.get("/api/health/cache")
+def read_cache_stats(current_user: schemas.User = Depends(get_current_user)):
+    return read_cache.read_cache.stats()
+
+
+# Diagnostics records written by this worker process
+@app.get("/api/health/diagnostics")
+def read_diagnostics_stats(current_user: schemas.User = Depends(get_current_user)):
+    return {"enabled": diagnostics.DIAGNOSTICS_ENABLED, **diagnostics.diagnostics.stats()}
+
+
+# Live connection pool statistics, for sizing DB_POOL_SIZE / DB_MAX_OVERFLOW
+@app.get("/api/health/db")
+def read_pool_stats(current_user: schemas.User = Depends(get_current_user)):
+    return pool_stats()
+
+
+# Task stream subscribers and reader position for this worker process
+@app.get("/api/health/stream")
+def read_stream_stats(current_user: schemas.User = Depends(get_current_user)):
+    return stream.task_stream.stats()
+
+
+# Overdue sweeper state and the result of this worker's last run
+@app.get("/api/health/sweeper")
+def read_sweeper_status(current_user: schemas.User = Depends(get_current_user)):
+    return overdue_sweeper.status()
+
+
+# Prometheus scrape target for this worker process
+@app.get("/metrics", include_in_schema=False)
+async def read_metrics():
+    return PlainTextResponse(metrics.render(), media_type=metrics.CONTENT_TYPE)
 
 
 # Add a simple root route
@@ -277,8 +664,11 @@ def read_root():
     return {"message": "Welcome to the Task Management API"}
 
 
+# Development server with auto-reload; serve.py is the production entry point
 if __name__ == "__main__":
     import uvicorn
 
     port = int(os.environ.get("PORT", 8000))
-    uvicorn.run("main:app", host="0.0.0.0", port=port, reload=True)
\ No newline at end of file
+    # DATABASE_MODE=async serves the AsyncSession variant in async_main.py
+    app_path = "async_main:app" if os.environ.get("DATABASE_MODE") == "async" else "main:app"
+    uvicorn.run(app_path, host="0.0.0.0", port=port, reload=True)
\ No newline at end of file
@@ -0,0 +1,260 @@
+# metrics.py
+# Request and database instrumentation, served as Prometheus text on /metrics.
+#
+#   http_request_duration_seconds   histogram per method, route and status
+#   http_requests_in_progress       requests currently inside the app
+#   db_queries_per_request          histogram per method and route
+#   db_request_seconds_total        DB time spent per method and route
+#   db_query_duration_seconds       histogram of every statement
+#   db_pool_*, threadpool_*         pool and threadpool occupancy at scrape time
+#
+# Routes are labelled with their template (/api/tasks/{task_id}), never the
+# raw path, so label sets stay bounded; requests no route matched share
+# route="unmatched". The per-request query count and DB time are collected
+# through a context variable the middleware sets, which Starlette copies
+# into the threadpool thread a sync route runs in.
+#
+# Everything is plain counters behind one lock per family: a request costs
+# two perf_counter calls and a few dict updates, a statement one more pair.
+# Counters belong to the worker process; with several workers each one
+# reports its own, so scrape them individually or aggregate on the
+# Prometheus side. METRICS_ENABLED=0 leaves the middleware and hooks out.
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import event
+
+import database
+
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "1") != "0"
+# PlainTextResponse appends the charset
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 50, 100)
+
+UNMATCHED = "unmatched"
+
+# {"queries": int, "seconds": float} for the request being served, if any
+request_db: ContextVar[Optional[dict]] = ContextVar("request_db", default=None)
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...], buckets: tuple):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        # label values -> [bucket counts..., count, sum]
+        self.series: Dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self.series.get(label_values)
+            if series is None:
+                series = self.series[label_values] = [0] * (len(self.buckets) + 2) + [0.0]
+            series[index] += 1
+            series[-2] += 1
+            series[-1] += value
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            series = [(key, list(values)) for key, values in self.series.items()]
+        for key, values in sorted(series):
+            labels = format_labels(self.labels, key)
+            cumulative = 0
+            for bound, count in zip(self.buckets, values):
+                cumulative += count
+                yield f'{self.name}_bucket{format_labels(self.labels + ("le",), key + (format_value(bound),))} {cumulative}'
+            yield f'{self.name}_bucket{format_labels(self.labels + ("le",), key + ("+Inf",))} {values[-2]}'
+            yield f"{self.name}_count{labels} {values[-2]}"
+            yield f"{self.name}_sum{labels} {format_value(values[-1])}"
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...]):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.series: Dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float, *label_values):
+        with self._lock:
+            self.series[label_values] = self.series.get(label_values, 0) + amount
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        with self._lock:
+            series = sorted(self.series.items())
+        for key, value in series:
+            yield f"{self.name}{format_labels(self.labels, key)} {format_value(value)}"
+
+
+def escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_labels(names: tuple, values: tuple) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+def format_value(value) -> str:
+    if isinstance(value, float):
+        return repr(round(value, 9))
+    return str(value)
+
+
+def gauge(name: str, help: str, value) -> list:
+    return [f"# HELP {name} {help}", f"# TYPE {name} gauge", f"{name} {format_value(value)}"]
+
+
+request_duration = Histogram(
+    "http_request_duration_seconds", "Time from receiving a request to sending the last byte",
+    ("method", "route", "status"), LATENCY_BUCKETS,
+)
+request_queries = Histogram(
+    "db_queries_per_request", "Statements executed while serving one request",
+    ("method", "route"), COUNT_BUCKETS,
+)
+request_db_seconds = Counter(
+    "db_request_seconds_total", "Time spent in statements while serving requests", ("method", "route"),
+)
+query_duration = Histogram(
+    "db_query_duration_seconds", "Execution time of every statement, inside or outside a request",
+    (), QUERY_BUCKETS,
+)
+
+in_progress = 0
+_in_progress_lock = threading.Lock()
+
+
+# endpoint -> route template
+_templates: Dict[object, str] = {}
+
+
+def route_template(scope) -> str:
+    # The router leaves the matched endpoint in the scope; map it back to
+    # the template it was registered under
+    endpoint = scope.get("endpoint")
+    if endpoint is None:
+        return UNMATCHED
+    template = _templates.get(endpoint)
+    if template is None:
+        for route in getattr(scope.get("app"), "routes", ()):
+            if getattr(route, "endpoint", None) is endpoint:
+                template = route.path
+                break
+        template = _templates[endpoint] = template or UNMATCHED
+    return template
+
+
+class MetricsMiddleware:
+    # Plain ASGI rather than BaseHTTPMiddleware, which would add a task and
+    # a memory stream to every request and buffer streamed responses
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        global in_progress
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        db = {"queries": 0, "seconds": 0.0}
+        reset = request_db.set(db)
+        with _in_progress_lock:
+            in_progress += 1
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            with _in_progress_lock:
+                in_progress -= 1
+            request_db.reset(reset)
+            method = scope["method"]
+            route = route_template(scope)
+            request_duration.observe(elapsed, method, route, str(status_code))
+            request_queries.observe(db["queries"], method, route)
+            if db["seconds"]:
+                request_db_seconds.inc(db["seconds"], method, route)
+
+
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._metrics_started = time.perf_counter()
+
+
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - context._metrics_started
+    query_duration.observe(elapsed)
+    db = request_db.get()
+    if db is not None:
+        db["queries"] += 1
+        db["seconds"] += elapsed
+
+
+def install(engine):
+    if not event.contains(engine, "before_cursor_execute", before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", after_cursor_execute)
+
+
+def threadpool_stats() -> Optional[dict]:
+    # Must run on the event loop thread
+    try:
+        from anyio import to_thread
+
+        limiter = to_thread.current_default_thread_limiter()
+    except RuntimeError:
+        return None
+    return {"busy": limiter.borrowed_tokens, "limit": limiter.total_tokens}
+
+
+def render(engine=None) -> str:
+    lines = []
+    for family in (request_duration, request_queries, request_db_seconds, query_duration):
+        lines.extend(family.render())
+    lines.extend(gauge("http_requests_in_progress", "Requests currently being served", in_progress))
+
+    pool = database.pool_stats(engine)
+    if "checked_out" in pool:
+        lines.extend(gauge("db_pool_checked_out", "Connections checked out of the pool", pool["checked_out"]))
+        lines.extend(gauge("db_pool_size", "Configured pool size", pool["size"]))
+        lines.extend(gauge("db_pool_overflow", "Connections open beyond the pool size", pool["overflow"]))
+        lines.extend(gauge("db_pool_max_overflow", "Configured overflow limit", pool["max_overflow"]))
+    if "checkouts" in pool:
+        lines.extend([
+            "# HELP db_pool_checkouts_total Connections handed out by the pool",
+            "# TYPE db_pool_checkouts_total counter",
+            f"db_pool_checkouts_total {pool['checkouts']}",
+            "# HELP db_pool_wait_seconds_total Time spent waiting for a pooled connection",
+            "# TYPE db_pool_wait_seconds_total counter",
+            f"db_pool_wait_seconds_total {format_value(float(pool['wait_seconds_total']))}",
+        ])
+
+    threads = threadpool_stats()
+    if threads is not None:
+        lines.extend(gauge("threadpool_threads_busy", "Threadpool tokens in use by sync routes and dependencies", threads["busy"]))
+        lines.extend(gauge("threadpool_threads_limit", "Threadpool size", threads["limit"]))
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,92 @@
+# migrate.py
+# Creates or upgrades the database schema through the Alembic migrations.
+# The apps no longer touch the schema when they are imported or start up;
+# run this once per deploy, before the workers:
+#
+#   python migrate.py upgrade    migrate to the newest revision
+#   python migrate.py check      exit 1 unless the database is at it
+#
+# A database created by the old import-time create_all has the tables but no
+# alembic_version. upgrade adopts it: stamps it at 0001, the schema that
+# create_all started from, then runs the later revisions, skipping (stamping)
+# those whose objects create_all had already made.
+import argparse
+import json
+import os
+
+from alembic import command
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import inspect
+
+import models
+from database import engine
+
+MIGRATIONS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+# What the old create_all may already have made, by revision. It created the
+# tables of every model that existed when it ran, but never added an index to
+# a table that was already there, so an adopted database can have any mix.
+ADOPTED_TABLES = {"0004": "task_stats", "0005": "job_leases", "0006": "table_versions", "0007": "task_changes"}
+ADOPTED_INDEXES = {
+    "0002": {
+        "ix_tasks_assignee_id_status", "ix_tasks_team_id_status_end_date", "ix_tasks_status_end_date",
+        "ix_tasks_start_date_end_date", "ix_members_team_id",
+    },
+}
+
+
+def alembic_config() -> Config:
+    # Built without alembic.ini, whose logging section would replace the
+    # logging setup of whatever process calls this
+    config = Config()
+    config.set_main_option("script_location", MIGRATIONS)
+    return config
+
+
+def revisions() -> dict:
+    head = ScriptDirectory.from_config(alembic_config()).get_current_head()
+    with engine.connect() as connection:
+        current = MigrationContext.configure(connection).get_current_revision()
+    return {"current": current, "head": head, "up_to_date": current == head}
+
+
+def already_created(revision: str) -> bool:
+    inspector = inspect(engine)
+    if revision in ADOPTED_TABLES:
+        return inspector.has_table(ADOPTED_TABLES[revision])
+    if revision in ADOPTED_INDEXES:
+        names = {index["name"] for table in ("tasks", "members") for index in inspector.get_indexes(table)}
+        return ADOPTED_INDEXES[revision] <= names
+    # 0003 creates the search index with IF NOT EXISTS and rebuilds it
+    return False
+
+
+def adopt(config: Config):
+    command.stamp(config, "0001")
+    script = ScriptDirectory.from_config(config)
+    for script_revision in reversed(list(script.walk_revisions("0002", "head"))):
+        revision = script_revision.revision
+        if already_created(revision):
+            command.stamp(config, revision)
+        else:
+            command.upgrade(config, revision)
+
+
+def upgrade() -> dict:
+    config = alembic_config()
+    tables = inspect(engine).get_table_names()
+    if "alembic_version" not in tables and models.Task.__tablename__ in tables:
+        adopt(config)
+    command.upgrade(config, "head")
+    return revisions()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Create or upgrade the database schema")
+    parser.add_argument("command", choices=("upgrade", "check"))
+    args = parser.parse_args()
+
+    result = upgrade() if args.command == "upgrade" else revisions()
+    print(json.dumps(result))
+    raise SystemExit(0 if result["up_to_date"] else 1)
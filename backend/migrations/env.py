@@ -0,0 +1,54 @@
+# env.py
+from logging.config import fileConfig
+
+from alembic import context
+
+import models
+from database import DATABASE_URL, engine
+
+config = context.config
+
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+target_metadata = models.Base.metadata
+
+# Objects managed outside the ORM metadata (see search.py and later revisions)
+UNMANAGED = ("tasks_fts", "ix_tasks_fts")
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    return not (reflected and name and name.startswith(UNMANAGED))
+
+
+def run_migrations_offline() -> None:
+    context.configure(
+        url=DATABASE_URL,
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+        render_as_batch=DATABASE_URL.startswith("sqlite"),
+        include_object=include_object,
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    with engine.connect() as connection:
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            render_as_batch=connection.dialect.name == "sqlite",
+            include_object=include_object,
+        )
+
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
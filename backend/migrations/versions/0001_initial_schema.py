@@ -0,0 +1,107 @@
+"""initial schema
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17 09:00:00.000000
+
+Databases created earlier by Base.metadata.create_all already match this
+revision: run `alembic stamp 0001` once, then `alembic upgrade head`.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+task_status = sa.Enum('pending', 'in_progress', 'completed', 'overdue', name='taskstatus')
+task_priority = sa.Enum('low', 'medium', 'high', name='taskpriority')
+
+
+def upgrade() -> None:
+    op.create_table(
+        'users',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(), nullable=True),
+        sa.Column('email', sa.String(), nullable=True),
+        sa.Column('hashed_password', sa.String(), nullable=True),
+        sa.Column('is_active', sa.Boolean(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_users_id', 'users', ['id'], unique=False)
+    op.create_index('ix_users_name', 'users', ['name'], unique=False)
+    op.create_index('ix_users_email', 'users', ['email'], unique=True)
+
+    op.create_table(
+        'teams',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(), nullable=True),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_teams_id', 'teams', ['id'], unique=False)
+    op.create_index('ix_teams_name', 'teams', ['name'], unique=False)
+
+    op.create_table(
+        'members',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(), nullable=True),
+        sa.Column('email', sa.String(), nullable=True),
+        sa.Column('role', sa.String(), nullable=True),
+        sa.Column('team_id', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['team_id'], ['teams.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_members_id', 'members', ['id'], unique=False)
+    op.create_index('ix_members_name', 'members', ['name'], unique=False)
+    op.create_index('ix_members_email', 'members', ['email'], unique=False)
+
+    op.create_table(
+        'tasks',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('title', sa.String(), nullable=True),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('status', task_status, nullable=True),
+        sa.Column('priority', task_priority, nullable=True),
+        sa.Column('start_date', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('end_date', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('creator_id', sa.Integer(), nullable=True),
+        sa.Column('assignee_id', sa.Integer(), nullable=True),
+        sa.Column('team_id', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['assignee_id'], ['members.id']),
+        sa.ForeignKeyConstraint(['creator_id'], ['users.id']),
+        sa.ForeignKeyConstraint(['team_id'], ['teams.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_tasks_id', 'tasks', ['id'], unique=False)
+    op.create_index('ix_tasks_title', 'tasks', ['title'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_tasks_title', table_name='tasks')
+    op.drop_index('ix_tasks_id', table_name='tasks')
+    op.drop_table('tasks')
+    op.drop_index('ix_members_email', table_name='members')
+    op.drop_index('ix_members_name', table_name='members')
+    op.drop_index('ix_members_id', table_name='members')
+    op.drop_table('members')
+    op.drop_index('ix_teams_name', table_name='teams')
+    op.drop_index('ix_teams_id', table_name='teams')
+    op.drop_table('teams')
+    op.drop_index('ix_users_email', table_name='users')
+    op.drop_index('ix_users_name', table_name='users')
+    op.drop_index('ix_users_id', table_name='users')
+    op.drop_table('users')
+    task_priority.drop(op.get_bind(), checkfirst=True)
+    task_status.drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,34 @@
+"""composite indexes for task filters
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 09:30:00.000000
+
+Covers the filter shapes sent by TaskListView and TaskCalendarView:
+assignee + status, team + status + due date, status + due date, and the
+start/end date range.
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_tasks_assignee_id_status', 'tasks', ['assignee_id', 'status'], unique=False)
+    op.create_index('ix_tasks_team_id_status_end_date', 'tasks', ['team_id', 'status', 'end_date'], unique=False)
+    op.create_index('ix_tasks_status_end_date', 'tasks', ['status', 'end_date'], unique=False)
+    op.create_index('ix_tasks_start_date_end_date', 'tasks', ['start_date', 'end_date'], unique=False)
+    op.create_index('ix_members_team_id', 'members', ['team_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_members_team_id', table_name='members')
+    op.drop_index('ix_tasks_start_date_end_date', table_name='tasks')
+    op.drop_index('ix_tasks_status_end_date', table_name='tasks')
+    op.drop_index('ix_tasks_team_id_status_end_date', table_name='tasks')
+    op.drop_index('ix_tasks_assignee_id_status', table_name='tasks')
@@ -0,0 +1,64 @@
+"""full-text search index for tasks
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 10:00:00.000000
+
+SQLite gets an external-content FTS5 table kept in sync by triggers;
+PostgreSQL gets a GIN index over the same tsvector expression that
+search.PostgresFullTextSearch queries.
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+SQLITE_UPGRADE = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5("
+    "title, description, content='tasks', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER IF NOT EXISTS tasks_fts_ai AFTER INSERT ON tasks BEGIN "
+    "INSERT INTO tasks_fts(rowid, title, description) VALUES (new.id, new.title, new.description); "
+    "END",
+    "CREATE TRIGGER IF NOT EXISTS tasks_fts_ad AFTER DELETE ON tasks BEGIN "
+    "INSERT INTO tasks_fts(tasks_fts, rowid, title, description) "
+    "VALUES ('delete', old.id, old.title, old.description); "
+    "END",
+    "CREATE TRIGGER IF NOT EXISTS tasks_fts_au AFTER UPDATE OF title, description ON tasks BEGIN "
+    "INSERT INTO tasks_fts(tasks_fts, rowid, title, description) "
+    "VALUES ('delete', old.id, old.title, old.description); "
+    "INSERT INTO tasks_fts(rowid, title, description) VALUES (new.id, new.title, new.description); "
+    "END",
+    "INSERT INTO tasks_fts(tasks_fts) VALUES ('rebuild')",
+)
+
+SQLITE_DOWNGRADE = (
+    "DROP TRIGGER IF EXISTS tasks_fts_au",
+    "DROP TRIGGER IF EXISTS tasks_fts_ad",
+    "DROP TRIGGER IF EXISTS tasks_fts_ai",
+    "DROP TABLE IF EXISTS tasks_fts",
+)
+
+POSTGRES_DOCUMENT = "to_tsvector('simple', coalesce(tasks.title, '') || ' ' || coalesce(tasks.description, ''))"
+
+
+def upgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        for statement in SQLITE_UPGRADE:
+            op.execute(statement)
+    elif dialect == 'postgresql':
+        op.execute(f"CREATE INDEX IF NOT EXISTS ix_tasks_fts ON tasks USING gin (({POSTGRES_DOCUMENT}))")
+
+
+def downgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        for statement in SQLITE_DOWNGRADE:
+            op.execute(statement)
+    elif dialect == 'postgresql':
+        op.execute("DROP INDEX IF EXISTS ix_tasks_fts")
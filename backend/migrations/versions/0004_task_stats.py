@@ -0,0 +1,47 @@
+"""task_stats summary table
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 11:00:00.000000
+
+Per-dimension task counts maintained by the crud write paths; backfilled
+here from the tasks table (the same recount as `python stats.py rebuild`).
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+# dimension -> tasks column; must match stats.DIMENSIONS
+DIMENSIONS = {
+    'status': 'status',
+    'priority': 'priority',
+    'team': 'team_id',
+    'assignee': 'assignee_id',
+}
+
+
+def upgrade() -> None:
+    op.create_table(
+        'task_stats',
+        sa.Column('dimension', sa.String(), nullable=False),
+        sa.Column('key', sa.String(), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('dimension', 'key'),
+    )
+    op.execute("INSERT INTO task_stats (dimension, key, count) SELECT 'total', 'all', count(*) FROM tasks")
+    for dimension, column in DIMENSIONS.items():
+        op.execute(
+            f"INSERT INTO task_stats (dimension, key, count) "
+            f"SELECT '{dimension}', coalesce(CAST({column} AS VARCHAR), 'none'), count(*) "
+            f"FROM tasks GROUP BY {column}"
+        )
+
+
+def downgrade() -> None:
+    op.drop_table('task_stats')
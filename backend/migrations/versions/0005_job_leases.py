@@ -0,0 +1,32 @@
+"""job_leases table for background jobs
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17 11:30:00.000000
+
+Lets one worker process at a time run a background job such as the
+overdue sweeper (see sweeper.py).
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'job_leases',
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('owner', sa.String(), nullable=False),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('name'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('job_leases')
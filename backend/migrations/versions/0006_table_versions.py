@@ -0,0 +1,31 @@
+"""table_versions change counters
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17 12:00:00.000000
+
+One row per table, bumped by every crud write; ETags are derived from it
+(see versions.py and etags.py). Missing rows read as version 0.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'table_versions',
+        sa.Column('table_name', sa.String(), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('table_name'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('table_versions')
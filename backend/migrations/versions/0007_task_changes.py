@@ -0,0 +1,35 @@
+"""task_changes change log for delta sync
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17 12:00:00.000000
+
+Append-only log of task upserts and deletes behind GET /api/sync/tasks (see
+changelog.py). Starts empty: clients without a token get a reset.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'task_changes',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('task_id', sa.Integer(), nullable=False),
+        sa.Column('op', sa.String(), nullable=False),
+        sa.Column('changed_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(op.f('ix_task_changes_changed_at'), 'task_changes', ['changed_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_task_changes_changed_at'), table_name='task_changes')
+    op.drop_table('task_changes')
@@ -0,0 +1,30 @@
+"""previous team and assignee on task_changes
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-17 18:00:00.000000
+
+The team and assignee a task had before a logged change, so a task moved
+out of a team or away from a member still reaches the task stream
+subscribers of its old scope (see stream.py). Earlier rows keep NULL.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0008'
+down_revision = '0007'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('task_changes', sa.Column('previous_team_id', sa.Integer(), nullable=True))
+    op.add_column('task_changes', sa.Column('previous_assignee_id', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('task_changes') as batch_op:
+        batch_op.drop_column('previous_assignee_id')
+        batch_op.drop_column('previous_team_id')
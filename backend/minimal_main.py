@@ -7,9 +7,7 @@ from fastapi.middleware.cors import CORSMiddleware
 from auth import create_access_token, get_password_hash
 from auth import get_current_user, verify_password
 # Import database module
-from database import engine, SessionLocal
-# Add this after importing database
-import models
+from database import get_db
 # Import crud operations
 import crud
 # Import schemas
@@ -19,8 +17,7 @@ from jose import JWTError, jwt
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/login")
 
-# Create the database tables
-models.Base.metadata.create_all(bind=engine)
+# Tables are created by `python migrate.py upgrade`
 app = FastAPI()
 
 # CORS middleware
@@ -33,15 +30,6 @@ app.add_middleware(
 )
 
 
-# Dependency to get the database session
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-
 # Authentication routes
 @app.post("/api/auth/register", response_model=schemas.User)
 def register_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
@@ -113,6 +101,7 @@ def read_task(
     return task
 
 
+# Development server with auto-reload; see serve.py for production
 if __name__ == "__main__":
     import uvicorn
 
@@ -1,22 +1,25 @@
 # models.py
-from sqlalchemy import Boolean, Column, ForeignKey, Integer, String, DateTime, Text, Enum
+from sqlalchemy import Boolean, Column, ForeignKey, Integer, String, DateTime, Text, Enum, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
 
 from database import Base
 
+
 class TaskStatus(str, enum.Enum):
     pending = "pending"
     in_progress = "in_progress"
     completed = "completed"
     overdue = "overdue"
 
+
 class TaskPriority(str, enum.Enum):
     low = "low"
     medium = "medium"
     high = "high"
 
+
 class User(Base):
     __tablename__ = "users"
 
@@ -30,6 +33,7 @@ class User(Base):
 
     tasks = relationship("Task", back_populates="creator")
 
+
 class Team(Base):
     __tablename__ = "teams"
 
@@ -42,6 +46,7 @@ class Team(Base):
     members = relationship("Member", back_populates="team")
     tasks = relationship("Task", back_populates="team")
 
+
 class Member(Base):
     __tablename__ = "members"
 
@@ -49,15 +54,23 @@ class Member(Base):
     name = Column(String, index=True)
     email = Column(String, index=True)
     role = Column(String, nullable=True)
-    team_id = Column(Integer, ForeignKey("teams.id"), nullable=True)
+    team_id = Column(Integer, ForeignKey("teams.id"), nullable=True, index=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
     team = relationship("Team", back_populates="members")
     tasks = relationship("Task", back_populates="assignee")
 
+
 class Task(Base):
     __tablename__ = "tasks"
+    # Composite indexes for the filter combinations crud.get_tasks builds
+    __table_args__ = (
+        Index("ix_tasks_assignee_id_status", "assignee_id", "status"),
+        Index("ix_tasks_team_id_status_end_date", "team_id", "status", "end_date"),
+        Index("ix_tasks_status_end_date", "status", "end_date"),
+        Index("ix_tasks_start_date_end_date", "start_date", "end_date"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, index=True)
@@ -74,4 +87,47 @@ class Task(Base):
 
     creator = relationship("User", back_populates="tasks")
     assignee = relationship("Member", back_populates="tasks")
-    team = relationship("Team", back_populates="tasks")
\ No newline at end of file
+    team = relationship("Team", back_populates="tasks")
+
+
+class TaskStat(Base):
+    # Task counts per (dimension, key), e.g. ("status", "pending"); kept in
+    # step with the tasks table by the crud write paths (see stats.py)
+    __tablename__ = "task_stats"
+
+    dimension = Column(String, primary_key=True)
+    key = Column(String, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+
+class JobLease(Base):
+    # One row per background job; whoever holds an unexpired lease runs it
+    __tablename__ = "job_leases"
+
+    name = Column(String, primary_key=True)
+    owner = Column(String, nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+
+
+class TableVersion(Base):
+    # Change counter per table, bumped in the same transaction as each write;
+    # ETags and cached reads compare against it (see versions.py)
+    __tablename__ = "table_versions"
+
+    table_name = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+
+class TaskChange(Base):
+    # Append-only change log behind GET /api/sync/tasks; id is the sync token.
+    # The newest row is never compacted away, so SQLite never reuses an id.
+    __tablename__ = "task_changes"
+
+    id = Column(Integer, primary_key=True)
+    task_id = Column(Integer, nullable=False)
+    op = Column(String, nullable=False)
+    # Team and assignee before the change, for stream subscribers of the
+    # scope the task left; see changelog.record
+    previous_team_id = Column(Integer, nullable=True)
+    previous_assignee_id = Column(Integer, nullable=True)
+    changed_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
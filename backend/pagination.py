@@ -0,0 +1,128 @@
+# pagination.py
+import base64
+import json
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import String, and_, case, literal, or_
+
+import models
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+PRIORITY_RANK = {
+    models.TaskPriority.low: 0,
+    models.TaskPriority.medium: 1,
+    models.TaskPriority.high: 2,
+}
+
+# Sort keys each list endpoint can seek on; every order is tie-broken by id
+SORT_KEYS = {
+    models.Task: ("id", "end_date", "created_at", "priority"),
+    models.Member: ("id", "created_at"),
+    models.Team: ("id", "created_at"),
+}
+
+
+def parse_sort(model, sort: Optional[str]):
+    sort = sort or "id"
+    descending = sort.startswith("-")
+    key = sort.lstrip("-")
+    if key not in SORT_KEYS[model]:
+        raise InvalidCursor(f"Unsupported sort key: {key}")
+    return key, descending
+
+
+def sort_column(model, key: str):
+    if key == "priority":
+        return case(
+            *[(model.priority == priority, rank) for priority, rank in PRIORITY_RANK.items()],
+            else_=None
+        )
+    return getattr(model, key)
+
+
+def sort_value(row, key: str):
+    # row is an ORM object or a serialized dict (see read_cache)
+    value = row[key] if isinstance(row, dict) else getattr(row, key)
+    if key == "priority":
+        return PRIORITY_RANK.get(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def encode_cursor(sort: str, value, row_id: int) -> str:
+    payload = json.dumps([sort, value, row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        cursor_sort, value, row_id = json.loads(base64.urlsafe_b64decode(padded))
+    except (ValueError, TypeError):
+        raise InvalidCursor("Malformed cursor")
+    if cursor_sort != sort or not isinstance(row_id, int):
+        raise InvalidCursor("Cursor does not match the requested sort order")
+    key = sort.lstrip("-")
+    if value is not None and key in ("end_date", "created_at"):
+        try:
+            value = datetime.fromisoformat(value)
+        except (TypeError, ValueError):
+            raise InvalidCursor("Malformed cursor")
+    return value, row_id
+
+
+def bind_value(key: str, value, dialect_name: str):
+    # On SQLite server_default=func.now() stores CURRENT_TIMESTAMP text, which has
+    # no fractional part, while bound datetimes render with microseconds. Compare
+    # server-generated timestamps in their stored format so seeks line up.
+    if key == "created_at" and dialect_name == "sqlite":
+        return literal(value.strftime("%Y-%m-%d %H:%M:%S"), String)
+    return value
+
+
+def apply_keyset(
+        query,
+        model,
+        sort: Optional[str] = None,
+        cursor: Optional[str] = None,
+        dialect_name: str = ""
+):
+    # Seek on (sort_key, id) instead of OFFSET so deep pages cost the same as the
+    # first one. NULL sort keys are ordered last in both directions.
+    key, descending = parse_sort(model, sort)
+    column = sort_column(model, key)
+
+    if cursor:
+        value, last_id = decode_cursor(cursor, sort or "id")
+        if key == "id":
+            query = query.filter(model.id < last_id if descending else model.id > last_id)
+        elif value is None:
+            query = query.filter(
+                column.is_(None),
+                model.id < last_id if descending else model.id > last_id
+            )
+        else:
+            value = bind_value(key, value, dialect_name)
+            past = column < value if descending else column > value
+            tie = model.id < last_id if descending else model.id > last_id
+            query = query.filter(or_(past, and_(column == value, tie), column.is_(None)))
+
+    if key == "id":
+        return query.order_by(model.id.desc() if descending else model.id.asc())
+    if descending:
+        return query.order_by(column.desc().nulls_last(), model.id.desc())
+    return query.order_by(column.asc().nulls_last(), model.id.asc())
+
+
+def next_cursor(rows, limit: int, sort: Optional[str] = None) -> Optional[str]:
+    if not rows or len(rows) < limit:
+        return None
+    key = (sort or "id").lstrip("-")
+    last = rows[-1]
+    return encode_cursor(sort or "id", sort_value(last, key), sort_value(last, "id"))
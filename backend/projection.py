@@ -0,0 +1,127 @@
+# projection.py
+# Sparse fieldsets for GET /api/tasks: ?fields= picks schemas.Task fields,
+# ?expand= picks relationships to embed whole.
+#
+#   fields=id,title,status,assignee.name      columns plus one assignee column
+#   fields=id,title&expand=assignee            columns plus the full assignee
+#   expand=                                    every column, no relationships
+#
+# Requested fields become load_only() on the task query and on each embedded
+# relationship (crud.task_projection_loaders), so unrequested columns
+# (description in particular) are never read. id and the sort key are always
+# returned; cursors are built from them.
+from typing import NamedTuple, Optional, Tuple
+
+from pydantic import BaseModel
+
+import models
+import pagination
+import schemas
+import serializers
+
+
+class InvalidFields(ValueError):
+    pass
+
+
+class TaskProjection(NamedTuple):
+    # Hashable, so it can be part of a read cache key
+    columns: Tuple[str, ...]
+    # (relationship, nested columns, or None for the whole nested schema)
+    relations: Tuple[Tuple[str, Optional[Tuple[str, ...]]], ...]
+
+
+def _schema_fields(schema):
+    columns, relations = [], {}
+    for name, field in schema.__fields__.items():
+        if isinstance(field.type_, type) and issubclass(field.type_, BaseModel):
+            relations[name] = field.type_
+        else:
+            columns.append(name)
+    return columns, relations
+
+
+TASK_COLUMNS, TASK_RELATIONS = _schema_fields(schemas.Task)
+
+
+def _split(value: Optional[str]):
+    return [part.strip() for part in (value or "").split(",") if part.strip()]
+
+
+def parse_task_fields(
+        fields: Optional[str],
+        expand: Optional[str],
+        sort: Optional[str] = None
+) -> Optional[TaskProjection]:
+    if fields is None and expand is None:
+        return None
+
+    requested = set(TASK_COLUMNS) if fields is None else set()
+    nested = {}
+    for path in _split(fields):
+        name, _, child = path.partition(".")
+        if name in TASK_RELATIONS:
+            if not child:
+                nested[name] = None
+                continue
+            child_columns, _ = _schema_fields(TASK_RELATIONS[name])
+            if child not in child_columns:
+                raise InvalidFields(f"Unknown field: {path}")
+            if name not in nested or nested[name] is not None:
+                nested.setdefault(name, set()).add(child)
+        elif name in TASK_COLUMNS and not child:
+            requested.add(name)
+        else:
+            raise InvalidFields(f"Unknown field: {path}")
+    for name in _split(expand):
+        if name not in TASK_RELATIONS:
+            raise InvalidFields(f"Unknown relationship: {name}")
+        nested[name] = None
+
+    requested.add("id")
+    if sort:
+        requested.add(pagination.parse_sort(models.Task, sort)[0])
+
+    return TaskProjection(
+        columns=tuple(name for name in TASK_COLUMNS if name in requested),
+        relations=tuple(
+            (name, None if nested[name] is None else tuple(
+                column for column in _schema_fields(TASK_RELATIONS[name])[0]
+                if column in nested[name] or column == "id"
+            ))
+            for name in TASK_RELATIONS if name in nested
+        ),
+    )
+
+
+def serialize(projection: TaskProjection, rows) -> list:
+    plan = [(column, serializers.field_converter(schemas.Task, column)) for column in projection.columns]
+    nested = []
+    for name, nested_columns in projection.relations:
+        schema = TASK_RELATIONS[name]
+        if nested_columns is None:
+            nested.append((name, serializers.serializer(schema), None))
+        else:
+            nested.append((name, None, [
+                (column, serializers.field_converter(schema, column)) for column in nested_columns
+            ]))
+
+    result = []
+    for row in rows:
+        item = {}
+        for column, convert in plan:
+            value = getattr(row, column)
+            item[column] = value if convert is None else convert(value)
+        for name, full, partial in nested:
+            value = getattr(row, name)
+            if value is None:
+                item[name] = None
+            elif full is not None:
+                item[name] = full(value)
+            else:
+                item[name] = {
+                    column: getattr(value, column) if convert is None else convert(getattr(value, column))
+                    for column, convert in partial
+                }
+        result.append(item)
+    return result
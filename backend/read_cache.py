@@ -0,0 +1,116 @@
+# read_cache.py
+# Cached versions of the member, team and task reads served by the GET routes.
+#
+# Entries are keyed by function and arguments and stamped with the
+# table_versions of every table the result embeds. A lookup reads the current
+# versions (one small query, shared with the ETag check) and only serves an
+# entry whose stamp still matches, so a write in any worker process
+# invalidates it. Results are stored as the plain dicts the serializers
+# module produces, not ORM objects, since they outlive the session that
+# loaded them.
+import os
+import threading
+
+from sqlalchemy.orm import Session
+
+import crud
+import projection as task_projection
+import schemas
+import serializers
+import versions
+from cache import TTLCache
+
+READ_CACHE_SIZE = int(os.environ.get("READ_CACHE_SIZE", 1000))
+# Seconds; 0 disables the cache
+READ_CACHE_TTL = float(os.environ.get("READ_CACHE_TTL", 60))
+
+
+class ReadCache:
+    def __init__(self, maxsize: int = READ_CACHE_SIZE, ttl: float = READ_CACHE_TTL):
+        self.entries = TTLCache(maxsize, ttl)
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.entries.ttl > 0 and self.entries.maxsize > 0
+
+    def _count(self, counter: str):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def get_or_load(self, db: Session, name: str, tables, args: tuple, load):
+        if not self.enabled:
+            return load()
+        # Versions are read before loading, so an entry is never stamped
+        # newer than its data
+        stamp = tuple(versions.current(db, tables).items())
+        key = (name, args)
+        entry = self.entries.get(key)
+        if entry is not None and entry[0] == stamp:
+            self._count("hits")
+            return entry[1]
+        self._count("misses" if entry is None else "stale")
+        value = load()
+        self.entries.set(key, (stamp, value))
+        return value
+
+    def clear(self):
+        self.entries.clear()
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "size": len(self.entries),
+            "maxsize": self.entries.maxsize,
+            "ttl": self.entries.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale": self.stale,
+            "evictions": self.entries.evictions,
+            "expirations": self.entries.expirations,
+        }
+
+
+read_cache = ReadCache()
+
+
+def get_teams(db: Session, **params):
+    return read_cache.get_or_load(
+        db, "get_teams", versions.TEAM_TABLES, tuple(sorted(params.items())),
+        lambda: serializers.dump_many(schemas.Team, crud.get_teams(db, **params))
+    )
+
+
+def get_team(db: Session, team_id: int):
+    return read_cache.get_or_load(
+        db, "get_team", versions.TEAM_TABLES, (team_id,),
+        lambda: serializers.dump(schemas.Team, crud.get_team(db, team_id=team_id))
+    )
+
+
+def get_members(db: Session, **params):
+    return read_cache.get_or_load(
+        db, "get_members", versions.MEMBER_TABLES, tuple(sorted(params.items())),
+        lambda: serializers.dump_many(schemas.Member, crud.get_members(db, **params))
+    )
+
+
+def get_member(db: Session, member_id: int):
+    return read_cache.get_or_load(
+        db, "get_member", versions.MEMBER_TABLES, (member_id,),
+        lambda: serializers.dump(schemas.Member, crud.get_member(db, member_id=member_id))
+    )
+
+
+def get_tasks(db: Session, projection=None, **filters):
+    def load():
+        tasks = crud.get_tasks(db, projection=projection, **filters)
+        if projection is not None:
+            return task_projection.serialize(projection, tasks)
+        return serializers.dump_many(schemas.Task, tasks)
+    return read_cache.get_or_load(
+        db, "get_tasks", versions.TASK_TABLES, (projection,) + tuple(sorted(filters.items())), load
+    )
@@ -1,10 +1,21 @@
 # schemas.py
-from pydantic import BaseModel, EmailStr
-from typing import List, Optional, Any
-from datetime import datetime
+from pydantic import BaseModel, EmailStr, Field, conlist, validator
+import os
+from typing import Dict, List, Optional, Any
+from datetime import date, datetime
 from models import TaskStatus, TaskPriority
 
 
+def not_null(*fields):
+    # PATCH bodies: a field may be left out, but not set to null unless the
+    # column is nullable
+    def check(cls, value):
+        if value is None:
+            raise ValueError("may not be null")
+        return value
+    return validator(*fields, pre=True, allow_reuse=True)(check)
+
+
 # User schemas
 class UserBase(BaseModel):
     email: EmailStr
@@ -44,6 +55,13 @@ class TeamUpdate(TeamBase):
     pass
 
 
+class TeamPatch(BaseModel):
+    name: Optional[str] = None
+    description: Optional[str] = None
+
+    _not_null = not_null("name")
+
+
 class Team(TeamBase):
     id: int
     created_at: datetime
@@ -69,6 +87,15 @@ class MemberUpdate(MemberBase):
     pass
 
 
+class MemberPatch(BaseModel):
+    name: Optional[str] = None
+    email: Optional[EmailStr] = None
+    role: Optional[str] = None
+    team_id: Optional[int] = None
+
+    _not_null = not_null("name", "email")
+
+
 class Member(MemberBase):
     id: int
     created_at: datetime
@@ -99,6 +126,19 @@ class TaskUpdate(TaskBase):
     pass
 
 
+class TaskPatch(BaseModel):
+    title: Optional[str] = None
+    description: Optional[str] = None
+    status: Optional[TaskStatus] = None
+    priority: Optional[TaskPriority] = None
+    start_date: Optional[datetime] = None
+    end_date: Optional[datetime] = None
+    assignee_id: Optional[int] = None
+    team_id: Optional[int] = None
+
+    _not_null = not_null("title", "start_date", "end_date", "assignee_id")
+
+
 class TaskStatusUpdate(BaseModel):
     status: TaskStatus
 
@@ -115,6 +155,80 @@ class Task(TaskBase):
         orm_mode = True
 
 
+# Bulk task schemas
+BULK_MAX_ITEMS = int(os.environ.get("BULK_MAX_ITEMS", 5000))
+
+
+class TaskBulkCreate(BaseModel):
+    tasks: conlist(TaskCreate, min_items=1, max_items=BULK_MAX_ITEMS)
+
+
+class TaskBulkStatusUpdate(BaseModel):
+    ids: conlist(int, min_items=1, max_items=BULK_MAX_ITEMS)
+    status: TaskStatus
+
+
+class TaskBulkDelete(BaseModel):
+    ids: conlist(int, min_items=1, max_items=BULK_MAX_ITEMS)
+
+
+class BulkItemResult(BaseModel):
+    index: int
+    id: Optional[int] = None
+    ok: bool
+    error: Optional[str] = None
+
+
+class BulkResult(BaseModel):
+    succeeded: int
+    failed: int
+    results: List[BulkItemResult]
+
+
+# Calendar schemas
+class CalendarTask(BaseModel):
+    id: int
+    title: str
+    status: Optional[TaskStatus] = None
+    priority: Optional[TaskPriority] = None
+    start_date: datetime
+    end_date: datetime
+    # Indexes into TaskCalendar.buckets of the first and last bucket the task spans
+    first_bucket: int
+    last_bucket: int
+
+
+class CalendarBucket(BaseModel):
+    start: date
+    count: int
+
+
+class TaskCalendar(BaseModel):
+    from_: date = Field(alias="from")
+    to: date
+    granularity: str
+    buckets: List[CalendarBucket]
+    tasks: List[CalendarTask]
+
+
+# Stats schemas
+class TaskStats(BaseModel):
+    total: int
+    by_status: Dict[str, int]
+    by_priority: Dict[str, int]
+    by_team: Dict[str, int]
+    by_assignee: Dict[str, int]
+
+
+# Delta sync schemas
+class TaskSync(BaseModel):
+    token: str
+    reset: bool
+    has_more: bool
+    upserted: List[Task]
+    deleted: List[int]
+
+
 # Authentication schemas
 class Token(BaseModel):
     token: str
@@ -0,0 +1,106 @@
+# search.py
+import os
+import re
+
+from sqlalchemy import Float, Integer, func, literal_column, or_, text
+
+import models
+
+# "auto" picks FTS5 on SQLite and tsvector on PostgreSQL; "like" forces the
+# ILIKE fallback everywhere
+SEARCH_BACKEND = os.environ.get("SEARCH_BACKEND", "auto")
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(term: str):
+    return TOKEN_RE.findall(term.lower())
+
+
+class LikeSearch:
+    name = "like"
+
+    def apply(self, query, term: str):
+        search_term = f"%{term}%"
+        query = query.filter(
+            or_(
+                models.Task.title.ilike(search_term),
+                models.Task.description.ilike(search_term)
+            )
+        )
+        return query, None
+
+
+class SqliteFTS5Search:
+    name = "fts5"
+
+    def apply(self, query, term: str):
+        tokens = tokenize(term)
+        if not tokens:
+            return LikeSearch().apply(query, term)
+        # Every token must match, each as a prefix: "rep bug" -> "rep"* "bug"*
+        match = " ".join(f'"{token}"*' for token in tokens)
+        # bm25 is lower-is-better; title hits weigh more than description hits
+        hits = text(
+            "SELECT rowid AS task_id, bm25(tasks_fts, 10.0, 1.0) AS rank "
+            "FROM tasks_fts WHERE tasks_fts MATCH :match"
+        ).bindparams(match=match).columns(task_id=Integer, rank=Float).subquery("fts_hits")
+        query = query.join(hits, hits.c.task_id == models.Task.id)
+        return query, hits.c.rank.asc()
+
+
+class PostgresFullTextSearch:
+    name = "tsvector"
+
+    # Must match the expression indexed by ix_tasks_fts (migration 0003)
+    DOCUMENT = "to_tsvector('simple', coalesce(tasks.title, '') || ' ' || coalesce(tasks.description, ''))"
+
+    def apply(self, query, term: str):
+        tokens = tokenize(term)
+        if not tokens:
+            return LikeSearch().apply(query, term)
+        document = literal_column(self.DOCUMENT)
+        ts_query = func.to_tsquery("simple", " & ".join(f"{token}:*" for token in tokens))
+        query = query.filter(document.op("@@")(ts_query))
+        return query, func.ts_rank(document, ts_query).desc()
+
+
+def backend_for(dialect_name: str):
+    if SEARCH_BACKEND == "like":
+        return LikeSearch()
+    if dialect_name == "sqlite":
+        return SqliteFTS5Search()
+    if dialect_name == "postgresql":
+        return PostgresFullTextSearch()
+    return LikeSearch()
+
+
+# dialect name -> whether the full-text index objects exist
+_installed = {}
+
+
+def apply_search(query, term: str, bind):
+    # bind is a sync Engine or Connection, only used to probe for the index once
+    dialect_name = bind.dialect.name
+    if dialect_name not in _installed:
+        # Index objects are created by migration 0003; without
+        # them fall back to substring matching rather than failing the request
+        if hasattr(bind, "connect"):
+            with bind.connect() as connection:
+                _installed[dialect_name] = is_installed(connection)
+        else:
+            _installed[dialect_name] = is_installed(bind)
+    backend = backend_for(dialect_name) if _installed[dialect_name] else LikeSearch()
+    return backend.apply(query, term)
+
+
+def is_installed(connection):
+    if connection.dialect.name == "sqlite":
+        return connection.exec_driver_sql(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'tasks_fts'"
+        ).first() is not None
+    if connection.dialect.name == "postgresql":
+        return connection.exec_driver_sql(
+            "SELECT 1 FROM pg_indexes WHERE indexname = 'ix_tasks_fts'"
+        ).first() is not None
+    return False
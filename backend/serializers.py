@@ -0,0 +1,111 @@
+# serializers.py
+# Fast path for the task, member and team responses: a row-to-dict function
+# compiled once per response schema, plus an orjson response class.
+#
+# The dicts match what FastAPI's response_model path produces (same keys in
+# the same order, datetimes as isoformat(), enums as their values), and
+# orjson encodes them to the same bytes as JSONResponse's
+# json.dumps(ensure_ascii=False, separators=(",", ":")). What is skipped is
+# building and re-validating a pydantic model per row for data that came out
+# of our own database. JSON_RESPONSE_MODE=pydantic turns the fast path off.
+import os
+from datetime import date, datetime
+from enum import Enum
+from functools import lru_cache
+from operator import attrgetter
+from typing import Callable, Optional
+
+from fastapi import Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from pydantic.fields import SHAPE_SINGLETON
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+JSON_RESPONSE_MODE = os.environ.get("JSON_RESPONSE_MODE", "fast")
+FAST_JSON = JSON_RESPONSE_MODE == "fast"
+
+
+def _isoformat(value):
+    return value.isoformat() if isinstance(value, (date, datetime)) else value
+
+
+def _enum_value(value):
+    return value.value if isinstance(value, Enum) else value
+
+
+def _converter(field) -> Callable:
+    if field.shape != SHAPE_SINGLETON:
+        return jsonable_encoder
+    type_ = field.type_
+    if isinstance(type_, type):
+        if issubclass(type_, BaseModel):
+            nested = serializer(type_)
+            return lambda value: None if value is None else nested(value)
+        if issubclass(type_, (date, datetime)):
+            return _isoformat
+        if issubclass(type_, Enum):
+            return _enum_value
+    return None
+
+
+def field_converter(schema, name: str) -> Optional[Callable]:
+    return _converter(schema.__fields__[name])
+
+
+@lru_cache(maxsize=None)
+def serializer(schema) -> Callable:
+    # Plan: (output key, attribute getter, converter or None) per field, in
+    # schema order. Rows may be ORM objects, schema instances or dicts
+    # already produced by a serializer (the read cache stores those).
+    plan = [
+        (field.alias, attrgetter(name), _converter(field))
+        for name, field in schema.__fields__.items()
+    ]
+
+    def serialize(row) -> dict:
+        if isinstance(row, dict):
+            return row
+        result = {}
+        for key, get, convert in plan:
+            value = get(row)
+            result[key] = value if convert is None else convert(value)
+        return result
+
+    return serialize
+
+
+def dump(schema, row):
+    return None if row is None else serializer(schema)(row)
+
+
+def dump_many(schema, rows) -> list:
+    serialize = serializer(schema)
+    return [serialize(row) for row in rows]
+
+
+class ORJSONResponse(JSONResponse):
+    def render(self, content) -> bytes:
+        if orjson is None:
+            return super().render(content)
+        return orjson.dumps(content)
+
+
+def respond(schema, data, response: Optional[Response] = None, many: bool = False, sparse: bool = False):
+    # Returns the response to send: the serialized rows with the headers
+    # already set on the route's Response (ETag, X-Next-Cursor, ...), or the
+    # data itself for FastAPI to validate when the fast path is off. Sparse
+    # fieldsets are always sent as is; they would fail response_model checks.
+    if not FAST_JSON and not sparse:
+        return data
+    content = dump_many(schema, data) if many else dump(schema, data)
+    fast = ORJSONResponse(content)
+    if response is not None:
+        for key, value in response.headers.items():
+            if key != "content-length":
+                fast.headers[key] = value
+    return fast
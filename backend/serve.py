@@ -0,0 +1,164 @@
+# serve.py
+# Production launcher.
+#
+#   python migrate.py upgrade              once per deploy
+#   python serve.py                        serve main:app
+#   DATABASE_MODE=async python serve.py    serve async_main:app
+#
+# With gunicorn installed the app is imported once in the master process
+# (preload) and workers fork from it, so starting or replacing a worker does
+# not import anything. Without gunicorn, uvicorn's own supervisor runs the
+# workers and each one imports the app itself. uvicorn uses uvloop and
+# httptools when they are installed (uvicorn[standard]).
+#
+# The master refuses to start against a database that is not at the newest
+# migration; --migrate upgrades it first.
+#
+# SIGTERM drains a worker. It stops accepting connections and ends open task
+# streams, since an SSE response never finishes on its own. It then gives
+# in-flight requests GRACEFUL_TIMEOUT seconds and runs the shutdown hooks.
+#
+#   WEB_CONCURRENCY    worker processes (default: CPU count)
+#   HOST, PORT         bind address (0.0.0.0:8000)
+#   KEEPALIVE          seconds an idle keep-alive connection stays open; keep it
+#                      above the idle timeout of the load balancer in front, or
+#                      it will reuse connections the worker has just closed
+#   GRACEFUL_TIMEOUT   seconds a draining worker waits for in-flight requests
+#   MAX_REQUESTS       replace a worker after this many requests, 0 never;
+#                      each worker adds up to 10% jitter
+#   BACKLOG            listen queue length
+import argparse
+import os
+import sys
+
+import uvicorn
+
+try:
+    from gunicorn.app.base import BaseApplication
+    from gunicorn.arbiter import Arbiter
+    from uvicorn.workers import UvicornWorker
+except ImportError:
+    # Only uvicorn's supervisor is available
+    UvicornWorker = None
+
+import migrate
+import stream
+from database import engine
+
+WEB_CONCURRENCY = int(os.environ.get("WEB_CONCURRENCY", os.cpu_count() or 1))
+HOST = os.environ.get("HOST", "0.0.0.0")
+PORT = int(os.environ.get("PORT", 8000))
+KEEPALIVE = int(os.environ.get("KEEPALIVE", 75))
+GRACEFUL_TIMEOUT = int(os.environ.get("GRACEFUL_TIMEOUT", 30))
+MAX_REQUESTS = int(os.environ.get("MAX_REQUESTS", 0))
+BACKLOG = int(os.environ.get("BACKLOG", 2048))
+# Time the shutdown hooks get after the drain, before gunicorn kills a worker
+SHUTDOWN_MARGIN = 5
+
+
+def app_path() -> str:
+    return "async_main:app" if os.environ.get("DATABASE_MODE") == "async" else "main:app"
+
+
+class DrainingServer(uvicorn.Server):
+    # Runs after the listening sockets are closed and idle connections are
+    # told to shut down, right before uvicorn waits for the rest (uvicorn is
+    # pinned; this is a private hook)
+    async def _wait_tasks_to_complete(self):
+        await stream.task_stream.stop()
+        await super()._wait_tasks_to_complete()
+
+
+def dispose_engines():
+    # Connections opened in the master must not be shared with forked workers
+    engine.dispose(close=False)
+    async_database = sys.modules.get("async_database")
+    if async_database is not None:
+        async_database.async_engine.sync_engine.dispose(close=False)
+
+
+def check_schema(upgrade: bool):
+    result = migrate.upgrade() if upgrade else migrate.revisions()
+    if not result["up_to_date"]:
+        raise SystemExit(
+            f"database is at revision {result['current']}, not {result['head']}; "
+            "run `python migrate.py upgrade` or pass --migrate"
+        )
+    engine.dispose()
+
+
+if UvicornWorker is not None:
+    class Worker(UvicornWorker):
+        CONFIG_KWARGS = {"loop": "auto", "http": "auto", "timeout_graceful_shutdown": GRACEFUL_TIMEOUT}
+
+        # UvicornWorker._serve with DrainingServer in place of uvicorn.Server
+        async def _serve(self):
+            self.config.app = self.wsgi
+            server = DrainingServer(config=self.config)
+            self._install_sigquit_handler()
+            await server.serve(sockets=self.sockets)
+            if not server.started:
+                sys.exit(Arbiter.WORKER_BOOT_ERROR)
+
+    class Application(BaseApplication):
+        def __init__(self, workers: int):
+            self.workers = workers
+            super().__init__()
+
+        def load_config(self):
+            options = {
+                "bind": f"{HOST}:{PORT}",
+                "workers": self.workers,
+                # gunicorn loads the worker class by name
+                "worker_class": "serve.Worker",
+                "preload_app": True,
+                "keepalive": KEEPALIVE,
+                "graceful_timeout": GRACEFUL_TIMEOUT + SHUTDOWN_MARGIN,
+                "max_requests": MAX_REQUESTS,
+                "max_requests_jitter": MAX_REQUESTS // 10,
+                "backlog": BACKLOG,
+                "post_fork": lambda server, worker: dispose_engines(),
+            }
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            module, name = app_path().split(":")
+            return getattr(__import__(module), name)
+
+
+def serve_uvicorn(workers: int):
+    from uvicorn.supervisors import Multiprocess
+
+    config = uvicorn.Config(
+        app_path(),
+        host=HOST,
+        port=PORT,
+        workers=workers,
+        timeout_keep_alive=KEEPALIVE,
+        timeout_graceful_shutdown=GRACEFUL_TIMEOUT,
+        limit_max_requests=MAX_REQUESTS or None,
+        backlog=BACKLOG,
+    )
+    server = DrainingServer(config)
+    if workers > 1:
+        Multiprocess(config, target=server.run, sockets=[config.bind_socket()]).run()
+    else:
+        server.run()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve the API")
+    parser.add_argument("-w", "--workers", type=int, default=WEB_CONCURRENCY)
+    parser.add_argument("--migrate", action="store_true", help="upgrade the schema before starting")
+    parser.add_argument("--no-gunicorn", action="store_true", help="use uvicorn's supervisor even if gunicorn is installed")
+    args = parser.parse_args()
+
+    check_schema(args.migrate)
+    if args.workers > 1 and stream.STREAM_BROKER == "local":
+        # Each worker would only stream the commits it made itself
+        raise SystemExit("STREAM_BROKER=local serves a single worker; unset it or pass --workers 1")
+    if args.no_gunicorn or UvicornWorker is None:
+        serve_uvicorn(args.workers)
+    else:
+        Application(args.workers).run()
@@ -0,0 +1,163 @@
+# stats.py
+# Task counts by status, priority, team and assignee, kept in the task_stats
+# summary table so dashboards read a few rows instead of scanning tasks.
+#
+#   python stats.py rebuild   recount everything from the tasks table
+#   python stats.py check     compare the summary table against a recount
+#
+# Every crud path that writes tasks passes the rows it touched to record();
+# the counts are adjusted with an upsert in the same transaction.
+import argparse
+import json
+import sys
+from collections import Counter
+from typing import Dict, Iterable
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.orm import Session
+
+import models
+
+# dimension -> task attribute; "total" has the single key "all"
+DIMENSIONS = {
+    "status": "status",
+    "priority": "priority",
+    "team": "team_id",
+    "assignee": "assignee_id",
+}
+TOTAL = ("total", "all")
+NONE_KEY = "none"
+
+
+def key_value(value) -> str:
+    if value is None:
+        return NONE_KEY
+    return str(getattr(value, "value", value))
+
+
+def task_keys(task) -> list:
+    # task is an ORM Task, a Row or a dict of column values
+    get = task.get if isinstance(task, dict) else lambda name: getattr(task, name, None)
+    return [TOTAL] + [(dimension, key_value(get(column))) for dimension, column in DIMENSIONS.items()]
+
+
+def deltas(added: Iterable = (), removed: Iterable = ()) -> Counter:
+    counts = Counter()
+    for task in added:
+        counts.update(task_keys(task))
+    for task in removed:
+        counts.subtract(task_keys(task))
+    return counts
+
+
+def record(db: Session, added: Iterable = (), removed: Iterable = ()):
+    # An update is recorded as removing the old row and adding the new one;
+    # keys whose count did not change are skipped
+    apply_deltas(db, deltas(added, removed))
+
+
+def upsert_statement(dialect_name: str):
+    table = models.TaskStat.__table__
+    if dialect_name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect_name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        return None
+    statement = insert(table)
+    return statement.on_conflict_do_update(
+        index_elements=[table.c.dimension, table.c.key],
+        set_={"count": table.c.count + statement.excluded.count},
+    )
+
+
+def apply_deltas(db: Session, counts: Counter):
+    params = [
+        {"dimension": dimension, "key": key, "count": count}
+        for (dimension, key), count in sorted(counts.items())
+        if count
+    ]
+    if not params:
+        return
+    statement = upsert_statement(db.get_bind().dialect.name)
+    if statement is not None:
+        db.execute(statement, params)
+        return
+
+    # No native upsert: update in place, insert the keys that were missing
+    table = models.TaskStat.__table__
+    for param in params:
+        result = db.execute(
+            update(table)
+            .where(table.c.dimension == param["dimension"], table.c.key == param["key"])
+            .values(count=table.c.count + param["count"])
+        )
+        if not result.rowcount:
+            db.execute(table.insert().values(**param))
+
+
+def recount(db: Session) -> Dict[tuple, int]:
+    counts = {TOTAL: db.scalar(select(func.count()).select_from(models.Task)) or 0}
+    for dimension, column in DIMENSIONS.items():
+        attribute = getattr(models.Task, column)
+        for value, count in db.execute(select(attribute, func.count()).group_by(attribute)):
+            counts[(dimension, key_value(value))] = count
+    return counts
+
+
+def stored(db: Session) -> Dict[tuple, int]:
+    rows = db.execute(select(models.TaskStat.dimension, models.TaskStat.key, models.TaskStat.count))
+    return {(dimension, key): count for dimension, key, count in rows}
+
+
+def rebuild(db: Session) -> int:
+    counts = recount(db)
+    db.execute(delete(models.TaskStat))
+    db.execute(
+        models.TaskStat.__table__.insert(),
+        [{"dimension": dimension, "key": key, "count": count} for (dimension, key), count in counts.items()],
+    )
+    db.commit()
+    return len(counts)
+
+
+def check(db: Session) -> list:
+    expected = recount(db)
+    actual = {key: count for key, count in stored(db).items() if count}
+    return [
+        {"dimension": dimension, "key": key, "expected": expected.get((dimension, key), 0),
+         "stored": actual.get((dimension, key), 0)}
+        for dimension, key in sorted(set(expected) | set(actual))
+        if expected.get((dimension, key), 0) != actual.get((dimension, key), 0)
+    ]
+
+
+def summary(db: Session) -> dict:
+    counts = stored(db)
+    result = {"total": counts.get(TOTAL, 0)}
+    for dimension in DIMENSIONS:
+        result[f"by_{dimension}"] = {
+            key: count for (row_dimension, key), count in sorted(counts.items())
+            if row_dimension == dimension and count
+        }
+    return result
+
+
+if __name__ == "__main__":
+    from database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Maintain the task_stats summary table")
+    parser.add_argument("command", choices=("rebuild", "check"))
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.command == "rebuild":
+            print(json.dumps({"keys": rebuild(db)}))
+        else:
+            mismatches = check(db)
+            print(json.dumps({"consistent": not mismatches, "mismatches": mismatches}, indent=2))
+            if mismatches:
+                sys.exit(1)
+    finally:
+        db.close()
@@ -0,0 +1,269 @@
+# stream.py
+# Push channel for task changes: GET /api/stream/tasks as Server-Sent Events.
+#
+# Events are read from the task_changes log (changelog.py), so the stream
+# carries exactly what GET /api/sync/tasks would return, in token order, and
+# each SSE event id is a sync token. The first event ("ready") gives the
+# token the stream starts after; a client that reconnects, or is told to
+# "resync", catches up with /api/sync/tasks?since=<last id it saw>.
+#
+# Each worker process runs one reader that fans events out to its own
+# subscribers. The broker decides when the reader runs:
+#
+#   STREAM_BROKER=changelog  after every commit in this process that logged
+#                            changes and every STREAM_POLL_INTERVAL seconds,
+#                            which picks up commits made by other workers
+#                            (the default; serve.py starts several)
+#   STREAM_BROKER=local      only after local commits; for a single worker
+#
+# Either way the reader only queries while the worker has subscribers.
+#
+# Subscribers get a bounded queue. One that falls STREAM_QUEUE_SIZE events
+# behind is sent "resync" and disconnected instead of holding up the rest.
+import asyncio
+import json
+import logging
+import os
+from typing import Optional
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+import changelog
+import models
+from database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+STREAM_BROKER = os.environ.get("STREAM_BROKER", "changelog")
+STREAM_POLL_INTERVAL = float(os.environ.get("STREAM_POLL_INTERVAL", 1))
+STREAM_QUEUE_SIZE = int(os.environ.get("STREAM_QUEUE_SIZE", 256))
+# Seconds between keep-alive comments on an idle stream
+STREAM_HEARTBEAT = float(os.environ.get("STREAM_HEARTBEAT", 15))
+STREAM_READ_BATCH = 500
+
+# Queue markers
+RESYNC = "resync"
+CLOSED = "closed"
+
+
+class Subscription:
+    def __init__(
+            self,
+            token: int,
+            team_id: Optional[int] = None,
+            member_id: Optional[int] = None,
+            maxsize: int = STREAM_QUEUE_SIZE
+    ):
+        # Events start after this token
+        self.token = token
+        self.team_id = team_id
+        self.member_id = member_id
+        self.queue = asyncio.Queue(maxsize)
+
+    def matches(self, change: dict) -> bool:
+        # A deleted task's team and assignee are gone with it, so deletes go
+        # to every subscriber; ids it never saw are ignored client side.
+        # An upsert goes to the task's current scope and to the one it was
+        # moved out of, so the old scope's viewers can drop it.
+        if change["op"] == changelog.DELETE:
+            return True
+        teams = (change["team_id"], change["previous_team_id"])
+        members = (change["assignee_id"], change["previous_assignee_id"])
+        return (
+            (self.team_id is None or self.team_id in teams)
+            and (self.member_id is None or self.member_id in members)
+        )
+
+    def offer(self, change: dict) -> bool:
+        try:
+            self.queue.put_nowait(change)
+            return True
+        except asyncio.QueueFull:
+            return False
+
+    def close(self, marker: str):
+        # Drop whatever is queued; the marker must fit
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(marker)
+
+
+class Broker:
+    # Seconds between reads without a local commit; None waits for one
+    poll_interval: Optional[float] = None
+
+    def __init__(self, session_factory=SessionLocal, batch_size: int = STREAM_READ_BATCH):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.subscribers = set()
+        # Last token read; None while nobody is subscribed
+        self.position = None
+        self.published = 0
+        self.disconnected = 0
+        self._loop = None
+        self._wake = None
+        self._task = None
+
+    def notify(self):
+        # Called from whichever thread committed
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    def head(self) -> int:
+        db = self.session_factory()
+        try:
+            return changelog.bounds(db)[1]
+        finally:
+            db.close()
+
+    async def subscribe(self, team_id: Optional[int] = None, member_id: Optional[int] = None) -> Subscription:
+        if self.position is None:
+            head = await run_in_threadpool(self.head)
+            if self.position is None:
+                self.position = head
+        subscription = Subscription(self.position, team_id=team_id, member_id=member_id)
+        self.subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        self.subscribers.discard(subscription)
+        if not self.subscribers:
+            self.position = None
+
+    def read(self, since: int) -> list:
+        db = self.session_factory()
+        try:
+            rows = db.execute(
+                select(
+                    models.TaskChange.id, models.TaskChange.task_id, models.TaskChange.op,
+                    models.Task.team_id, models.Task.assignee_id,
+                    models.TaskChange.previous_team_id, models.TaskChange.previous_assignee_id
+                )
+                .outerjoin(models.Task, models.Task.id == models.TaskChange.task_id)
+                .where(models.TaskChange.id > since)
+                .order_by(models.TaskChange.id)
+                .limit(self.batch_size)
+            ).all()
+        finally:
+            db.close()
+        return [
+            {
+                "token": row.id, "op": row.op, "id": row.task_id,
+                "team_id": row.team_id, "assignee_id": row.assignee_id,
+                "previous_team_id": row.previous_team_id, "previous_assignee_id": row.previous_assignee_id,
+            }
+            for row in rows
+        ]
+
+    def fanout(self, changes: list):
+        for change in changes:
+            for subscription in list(self.subscribers):
+                if subscription.matches(change) and not subscription.offer(change):
+                    self.unsubscribe(subscription)
+                    subscription.close(RESYNC)
+                    self.disconnected += 1
+        self.published += len(changes)
+
+    async def drain(self):
+        while self.subscribers and self.position is not None:
+            changes = await run_in_threadpool(self.read, self.position)
+            if not changes or self.position is None:
+                return
+            self.position = changes[-1]["token"]
+            self.fanout(changes)
+            if len(changes) < self.batch_size:
+                return
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                await self.drain()
+            except Exception:
+                logger.exception("task stream read failed")
+
+    def start(self):
+        if self._task is None:
+            self._loop = asyncio.get_running_loop()
+            self._wake = asyncio.Event()
+            self._task = self._loop.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            self._loop = None
+        # Ends every open stream so the server can finish shutting down
+        for subscription in list(self.subscribers):
+            self.unsubscribe(subscription)
+            subscription.close(CLOSED)
+
+    def stats(self) -> dict:
+        return {
+            "broker": type(self).__name__,
+            "running": self._task is not None,
+            "poll_interval": self.poll_interval,
+            "subscribers": len(self.subscribers),
+            "position": self.position,
+            "published": self.published,
+            "disconnected": self.disconnected,
+        }
+
+
+class LocalBroker(Broker):
+    poll_interval = None
+
+
+class ChangeLogBroker(Broker):
+    poll_interval = STREAM_POLL_INTERVAL
+
+
+BROKERS = {"local": LocalBroker, "changelog": ChangeLogBroker}
+task_stream = BROKERS[STREAM_BROKER]()
+
+
+@event.listens_for(Session, "after_commit")
+def _changes_committed(session):
+    if session.info.pop(changelog.PENDING_KEY, False):
+        task_stream.notify()
+
+
+@event.listens_for(Session, "after_rollback")
+def _changes_rolled_back(session):
+    session.info.pop(changelog.PENDING_KEY, None)
+
+
+def format_event(name: str, data: dict, event_id: Optional[int] = None) -> str:
+    lines = [] if event_id is None else [f"id: {event_id}"]
+    lines += [f"event: {name}", f"data: {json.dumps(data, separators=(',', ':'))}"]
+    return "\n".join(lines) + "\n\n"
+
+
+async def events(broker: Broker, subscription: Subscription, heartbeat: float = STREAM_HEARTBEAT):
+    # The SSE body for one subscriber; unsubscribes when the client goes away
+    try:
+        yield format_event("ready", {"token": subscription.token}, event_id=subscription.token)
+        while True:
+            try:
+                change = await asyncio.wait_for(subscription.queue.get(), heartbeat)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            if change == RESYNC:
+                yield format_event("resync", {})
+                return
+            if change == CLOSED:
+                return
+            yield format_event("task", change, event_id=change["token"])
+    finally:
+        broker.unsubscribe(subscription)
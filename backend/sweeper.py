@@ -0,0 +1,191 @@
+# sweeper.py
+# Background job that marks tasks past their end_date as overdue.
+#
+# Each run moves pending/in_progress tasks whose end_date has passed to
+# overdue in bounded batches: one UPDATE ... WHERE id IN (SELECT id ... LIMIT n)
+# per batch, served by ix_tasks_status_end_date, committed on its own so row
+# locks are held briefly. A lease row in job_leases makes sure only one
+# worker process sweeps at a time. The same run compacts the task change log.
+import asyncio
+import logging
+import os
+import socket
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import func, select, update
+from sqlalchemy.exc import IntegrityError
+from starlette.concurrency import run_in_threadpool
+
+import changelog
+import models
+import stats
+from database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+# Seconds between runs; 0 disables the sweeper
+OVERDUE_SWEEP_INTERVAL = float(os.environ.get("OVERDUE_SWEEP_INTERVAL", 60))
+OVERDUE_SWEEP_BATCH_SIZE = int(os.environ.get("OVERDUE_SWEEP_BATCH_SIZE", 500))
+# How long a lease survives without renewal, e.g. after its worker died
+OVERDUE_SWEEP_LEASE = float(os.environ.get("OVERDUE_SWEEP_LEASE", max(OVERDUE_SWEEP_INTERVAL * 2, 30)))
+
+LEASE_NAME = "overdue_sweep"
+SWEPT_STATUSES = (models.TaskStatus.pending, models.TaskStatus.in_progress)
+
+
+class OverdueSweeper:
+    def __init__(
+            self,
+            session_factory=SessionLocal,
+            interval: float = OVERDUE_SWEEP_INTERVAL,
+            batch_size: int = OVERDUE_SWEEP_BATCH_SIZE,
+            lease_seconds: float = OVERDUE_SWEEP_LEASE
+    ):
+        self.session_factory = session_factory
+        self.interval = interval
+        self.batch_size = batch_size
+        self.lease_seconds = lease_seconds
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.last_run = None
+        self.holds_lease = False
+        self._task = None
+
+    def acquire_lease(self, db) -> bool:
+        # Take the lease if it is free, expired or already ours, and extend it
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=self.lease_seconds)
+        table = models.JobLease.__table__
+        result = db.execute(
+            update(table)
+            .where(table.c.name == LEASE_NAME)
+            .where((table.c.owner == self.owner) | (table.c.expires_at < now))
+            .values(owner=self.owner, expires_at=expires_at)
+        )
+        if not result.rowcount:
+            try:
+                db.execute(table.insert().values(name=LEASE_NAME, owner=self.owner, expires_at=expires_at))
+            except IntegrityError:
+                # Someone else holds it
+                db.rollback()
+                return False
+        db.commit()
+        return True
+
+    def release_lease(self):
+        # Let another worker take over right away instead of after expiry
+        table = models.JobLease.__table__
+        db = self.session_factory()
+        try:
+            db.execute(table.delete().where(table.c.name == LEASE_NAME, table.c.owner == self.owner))
+            db.commit()
+        finally:
+            db.close()
+        self.holds_lease = False
+
+    def sweep(self, db) -> dict:
+        changed = {}
+        for status in SWEPT_STATUSES:
+            changed[status.value] = 0
+            # Repeated in the UPDATE itself: under READ COMMITTED a row picked
+            # by the subquery may be completed by another transaction before
+            # the UPDATE locks it, and PostgreSQL re-checks only the UPDATE's
+            # own WHERE against the row it waited for
+            still_expired = (models.Task.status == status, models.Task.end_date < func.now())
+            while True:
+                expired = select(models.Task.id).where(*still_expired).limit(self.batch_size)
+                statement = (
+                    update(models.Task)
+                    .where(models.Task.id.in_(expired.scalar_subquery()), *still_expired)
+                    .values(status=models.TaskStatus.overdue)
+                )
+                if db.get_bind().dialect.update_returning:
+                    ids = db.scalars(
+                        statement.returning(models.Task.id),
+                        execution_options={"synchronize_session": False}
+                    ).all()
+                else:
+                    # No UPDATE ... RETURNING: lock the batch, then update it by id
+                    ids = db.scalars(expired.with_for_update()).all()
+                    if ids:
+                        db.execute(
+                            update(models.Task)
+                            .where(models.Task.id.in_(ids), *still_expired)
+                            .values(status=models.TaskStatus.overdue),
+                            execution_options={"synchronize_session": False}
+                        )
+                # Only the rows the UPDATE reports changed are counted
+                if ids:
+                    stats.apply_deltas(db, Counter({
+                        ("status", status.value): -len(ids),
+                        ("status", models.TaskStatus.overdue.value): len(ids),
+                    }))
+                    changelog.record(db, upserted=ids)
+                db.commit()
+                changed[status.value] += len(ids)
+                if len(ids) < self.batch_size:
+                    break
+        return changed
+
+    def run_once(self) -> Optional[dict]:
+        # Returns the run report, or None when another worker holds the lease
+        db = self.session_factory()
+        try:
+            self.holds_lease = self.acquire_lease(db)
+            if not self.holds_lease:
+                return None
+            started = time.perf_counter()
+            changed = self.sweep(db)
+            compacted = changelog.compact(db)
+        finally:
+            db.close()
+        report = {
+            "finished_at": datetime.utcnow().isoformat(),
+            "changed": changed,
+            "rows": sum(changed.values()),
+            "compacted": compacted,
+            "seconds": round(time.perf_counter() - started, 3),
+        }
+        self.last_run = report
+        logger.info("overdue sweep changed %d rows in %.3fs", report["rows"], report["seconds"])
+        return report
+
+    async def _loop(self):
+        while True:
+            try:
+                await run_in_threadpool(self.run_once)
+            except Exception:
+                logger.exception("overdue sweep failed")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self.interval > 0 and self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            if self.holds_lease:
+                await run_in_threadpool(self.release_lease)
+
+    def status(self) -> dict:
+        return {
+            "enabled": self.interval > 0,
+            "running": self._task is not None,
+            "interval": self.interval,
+            "batch_size": self.batch_size,
+            "owner": self.owner,
+            "holds_lease": self.holds_lease,
+            "last_run": self.last_run,
+        }
+
+
+overdue_sweeper = OverdueSweeper()
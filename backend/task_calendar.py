@@ -0,0 +1,94 @@
+# task_calendar.py
+# Buckets tasks into calendar days or weeks from the rows of a single
+# interval-overlap query. Each task is listed once with the first and last
+# bucket it spans, so a task running for weeks does not repeat per day.
+import os
+from itertools import accumulate
+from datetime import date, datetime, time, timedelta
+from typing import List
+
+GRANULARITIES = {"day": 1, "week": 7}
+CALENDAR_MAX_DAYS = int(os.environ.get("CALENDAR_MAX_DAYS", 366))
+
+
+class InvalidRange(ValueError):
+    pass
+
+
+def bucket_origin(start: date, granularity: str) -> date:
+    # Weeks start on Monday, like the ISO calendar
+    if granularity == "week":
+        return start - timedelta(days=start.weekday())
+    return start
+
+
+def bucket_starts(start: date, end: date, granularity: str) -> List[date]:
+    if granularity not in GRANULARITIES:
+        raise InvalidRange(f"Unsupported granularity: {granularity}")
+    if end < start:
+        raise InvalidRange("'to' must not be before 'from'")
+    if (end - start).days + 1 > CALENDAR_MAX_DAYS:
+        raise InvalidRange(f"Range is limited to {CALENDAR_MAX_DAYS} days")
+    step = timedelta(days=GRANULARITIES[granularity])
+    current = bucket_origin(start, granularity)
+    starts = []
+    while current <= end:
+        starts.append(current)
+        current += step
+    return starts
+
+
+def range_bounds(start: date, end: date):
+    # Datetime bounds for the overlap query: [start 00:00, end + 1 day 00:00)
+    return datetime.combine(start, time.min), datetime.combine(end + timedelta(days=1), time.min)
+
+
+def as_date(value) -> date:
+    return value.date() if isinstance(value, datetime) else value
+
+
+def json_value(value):
+    # The calendar is sent as built (see serializers.respond), so values are
+    # already in their JSON form: ISO dates, enum values
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return getattr(value, "value", value)
+
+
+def build_calendar(rows: list, starts: List[date], start: date, end: date, granularity: str) -> dict:
+    step = GRANULARITIES[granularity]
+    origin = starts[0]
+    last = len(starts) - 1
+
+    def index(value) -> int:
+        return min(max((as_date(value) - origin).days // step, 0), last)
+
+    # Bucket counts from a difference array over the task spans; a task that
+    # ends before it starts only counts in its start bucket
+    deltas = [0] * (len(starts) + 1)
+    tasks = []
+    for row in rows:
+        first_bucket = index(row.start_date)
+        last_bucket = max(index(row.end_date), first_bucket)
+        deltas[first_bucket] += 1
+        deltas[last_bucket + 1] -= 1
+        tasks.append({
+            "id": row.id,
+            "title": row.title,
+            "status": json_value(row.status),
+            "priority": json_value(row.priority),
+            "start_date": json_value(row.start_date),
+            "end_date": json_value(row.end_date),
+            "first_bucket": first_bucket,
+            "last_bucket": last_bucket,
+        })
+    return {
+        "from": start.isoformat(),
+        "to": end.isoformat(),
+        "granularity": granularity,
+        "buckets": [
+            {"start": bucket_start.isoformat(), "count": count}
+            for bucket_start, count in zip(starts, accumulate(deltas[:-1]))
+        ],
+        "tasks": tasks,
+    }
@@ -0,0 +1,91 @@
+# conftest.py
+# The suite runs against a fresh SQLite file migrated to head, with the
+# overdue sweeper off and cheap bcrypt rounds.
+import os
+import tempfile
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/test.db")
+os.environ.setdefault("OVERDUE_SWEEP_INTERVAL", "0")
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import OperationalError
+
+import migrate
+
+migrate.upgrade()
+
+import main
+from database import engine
+
+EMAIL = "tests@example.com"
+PASSWORD = "tests"
+
+
+@pytest.fixture(scope="session")
+def client():
+    with TestClient(main.app) as client:
+        yield client
+
+
+@pytest.fixture(scope="session")
+def headers(client):
+    client.post("/api/auth/register", json={"name": "Tests", "email": EMAIL, "password": PASSWORD})
+    token = client.post("/api/auth/login", json={"email": EMAIL, "password": PASSWORD}).json()["token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture(scope="session")
+def dataset(client, headers):
+    # 3 teams, 6 members and 60 tasks spread over them, so relationship
+    # loads have several distinct rows to fetch
+    teams = [client.post("/api/teams", json={"name": f"Team {index}"}, headers=headers).json()["id"]
+             for index in range(3)]
+    members = [
+        client.post("/api/members", json={
+            "name": f"Member {index}", "email": f"member{index}@example.com", "team_id": teams[index % 3],
+        }, headers=headers).json()["id"]
+        for index in range(6)
+    ]
+    tasks = [
+        {
+            "title": f"Task {index}", "status": ("pending", "in_progress", "completed")[index % 3],
+            "start_date": "2024-03-01T09:00:00", "end_date": f"2024-03-{index % 28 + 1:02d}T17:00:00",
+            "assignee_id": members[index % 6], "team_id": teams[index % 3] if index % 4 else None,
+        }
+        for index in range(60)
+    ]
+    response = client.post("/api/tasks/bulk", json={"tasks": tasks}, headers=headers)
+    assert response.status_code == 200, response.text
+    return {"teams": teams, "members": members}
+
+
+@pytest.fixture
+def statements():
+    # Every statement sent to the database while the test runs
+    executed = []
+
+    def record(conn, cursor, statement, *args):
+        executed.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    yield executed
+    event.remove(engine, "before_cursor_execute", record)
+
+
+@pytest.fixture(scope="module")
+def postgres():
+    # An engine for TEST_POSTGRES_URL, for the checks that only mean
+    # something on PostgreSQL; skipped when it is unset or unreachable
+    url = os.environ.get("TEST_POSTGRES_URL")
+    if not url:
+        pytest.skip("TEST_POSTGRES_URL is not set")
+    try:
+        postgres_engine = create_engine(url)
+        postgres_engine.connect().close()
+    except (OperationalError, ImportError) as exc:
+        pytest.skip(f"PostgreSQL unavailable: {exc}")
+    yield postgres_engine
+    postgres_engine.dispose()
@@ -0,0 +1,62 @@
+# test_async_parity.py
+# DATABASE_MODE=async serves the same read responses as main.py: sparse
+# fieldsets, ETags and 304s, and the import route on the AsyncSession.
+import pytest
+from fastapi.testclient import TestClient
+
+import async_main
+
+URLS = [
+    "/api/tasks?limit=20",
+    "/api/tasks?fields=id,title,assignee.name&sort=end_date",
+    "/api/tasks?expand=team&status=pending",
+    "/api/tasks?search=task",
+    "/api/tasks/{task}",
+    "/api/members",
+    "/api/members/{member}",
+    "/api/teams?sort=created_at",
+    "/api/teams/{team}",
+]
+
+
+@pytest.fixture(scope="module")
+def async_client():
+    # No lifespan: the startup hooks would start a second task stream
+    # alongside the one the main.py client already runs
+    return TestClient(async_main.app)
+
+
+@pytest.fixture(scope="module")
+def ids(client, headers, dataset):
+    task = client.get("/api/tasks?limit=1", headers=headers).json()[0]
+    return {"task": task["id"], "member": task["assignee"]["id"], "team": dataset["teams"][0]}
+
+
+@pytest.mark.parametrize("url", URLS)
+def test_async_reads_match_main(client, async_client, headers, ids, url):
+    url = url.format(**ids)
+    expected = client.get(url, headers=headers)
+    response = async_client.get(url, headers=headers)
+    assert response.status_code == expected.status_code == 200, response.text
+    assert response.json() == expected.json()
+    assert response.headers["etag"] == expected.headers["etag"]
+    assert response.headers.get("x-next-cursor") == expected.headers.get("x-next-cursor")
+
+    cached = async_client.get(url, headers=dict(headers, **{"If-None-Match": response.headers["etag"]}))
+    assert cached.status_code == 304
+
+
+def test_async_rejects_unknown_fields(async_client, headers):
+    response = async_client.get("/api/tasks?fields=id,secret", headers=headers)
+    assert response.status_code == 400
+
+
+def test_async_import(async_client, headers):
+    body = b'{"name": "Imported async"}\n{"description": "no name"}\n'
+    response = async_client.post(
+        "/api/import/teams", files={"file": ("teams.ndjson", body)}, headers=headers
+    )
+    assert response.status_code == 200, response.text
+    assert (response.json()["inserted"], response.json()["failed"]) == (1, 1)
+    names = [team["name"] for team in async_client.get("/api/teams?limit=1000", headers=headers).json()]
+    assert "Imported async" in names
@@ -0,0 +1,36 @@
+# test_calendar.py
+# Calendar buckets: every task is listed once with the span of buckets it
+# covers, and the bucket counts agree with those spans.
+from collections import namedtuple
+from datetime import date, datetime
+
+import task_calendar
+
+Row = namedtuple("Row", "id title status priority start_date end_date")
+
+
+def test_tasks_are_listed_once_with_their_bucket_span():
+    start, end = date(2024, 3, 4), date(2024, 3, 10)
+    rows = [
+        Row(1, "Spans the week", "pending", "high", datetime(2024, 2, 20, 9), datetime(2024, 3, 31, 17)),
+        Row(2, "Two days", "completed", "low", datetime(2024, 3, 5, 9), datetime(2024, 3, 6, 17)),
+        Row(3, "Ends before it starts", "pending", "low", datetime(2024, 3, 8, 9), datetime(2024, 3, 7, 17)),
+    ]
+    starts = task_calendar.bucket_starts(start, end, "day")
+    calendar = task_calendar.build_calendar(rows, starts, start, end, "day")
+
+    spans = {task["id"]: (task["first_bucket"], task["last_bucket"]) for task in calendar["tasks"]}
+    assert spans == {1: (0, 6), 2: (1, 2), 3: (4, 4)}
+    assert [bucket["count"] for bucket in calendar["buckets"]] == [1, 2, 2, 1, 2, 1, 1]
+    assert calendar["buckets"][0] == {"start": "2024-03-04", "count": 1}
+    assert calendar["tasks"][0]["start_date"] == "2024-02-20T09:00:00"
+
+
+def test_week_buckets_start_on_monday():
+    start, end = date(2024, 3, 6), date(2024, 3, 20)
+    rows = [Row(1, "Task", "pending", "medium", datetime(2024, 3, 12, 9), datetime(2024, 3, 19, 17))]
+    starts = task_calendar.bucket_starts(start, end, "week")
+    calendar = task_calendar.build_calendar(rows, starts, start, end, "week")
+
+    assert [bucket["start"] for bucket in calendar["buckets"]] == ["2024-03-04", "2024-03-11", "2024-03-18"]
+    assert (calendar["tasks"][0]["first_bucket"], calendar["tasks"][0]["last_bucket"]) == (1, 2)
@@ -0,0 +1,34 @@
+# test_diagnostics.py
+# The slow-query log EXPLAINs on the request's own connection; a plan that
+# fails must leave that transaction usable. PostgreSQL runs when
+# TEST_POSTGRES_URL is set, as in test_task_indexes.py.
+import pytest
+
+import diagnostics
+from database import engine
+
+
+def explain_failure_keeps_transaction(bind):
+    with bind.connect() as connection:
+        transaction = connection.begin()
+        try:
+            connection.exec_driver_sql("CREATE TEMPORARY TABLE diagnostics_probe (id INTEGER)")
+            connection.exec_driver_sql("INSERT INTO diagnostics_probe (id) VALUES (1)")
+            plan = diagnostics.Diagnostics().plan(
+                connection, "SELECT * FROM diagnostics_missing_table", (), False
+            )
+            rows = connection.exec_driver_sql("SELECT id FROM diagnostics_probe").all()
+        finally:
+            transaction.rollback()
+    assert plan[0].startswith("EXPLAIN failed"), plan
+    assert [tuple(row) for row in rows] == [(1,)]
+
+
+def test_sqlite_failed_explain_keeps_transaction():
+    if engine.dialect.name != "sqlite":
+        pytest.skip("the suite database is not SQLite")
+    explain_failure_keeps_transaction(engine)
+
+
+def test_postgres_failed_explain_keeps_transaction(postgres):
+    explain_failure_keeps_transaction(postgres)
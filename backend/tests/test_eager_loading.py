@@ -0,0 +1,23 @@
+# test_eager_loading.py
+# List routes load relationships per response, not per row: the statement
+# count of a page must not grow with its size.
+import pytest
+
+import read_cache
+
+
+@pytest.mark.parametrize("path, limits", [
+    ("/api/tasks", (5, 20, 60)),
+    ("/api/members", (2, 4, 6)),
+])
+def test_list_statements_do_not_grow_with_page_size(client, headers, dataset, statements, path, limits):
+    counts = {}
+    for limit in limits:
+        # A cached page would run no loads at all
+        read_cache.read_cache.clear()
+        statements.clear()
+        response = client.get(path, params={"limit": limit}, headers=headers)
+        assert response.status_code == 200
+        assert len(response.json()) == limit
+        counts[limit] = len(statements)
+    assert len(set(counts.values())) == 1, counts
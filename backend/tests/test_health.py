@@ -0,0 +1,12 @@
+# test_health.py
+# The /api/health routes report pool, cache and worker internals, so they
+# need a logged-in user like the rest of /api.
+import pytest
+
+ROUTES = ["/api/health/db", "/api/health/sweeper", "/api/health/cache", "/api/health/stream", "/api/health/diagnostics"]
+
+
+@pytest.mark.parametrize("path", ROUTES)
+def test_health_route_requires_login(client, headers, path):
+    assert client.get(path).status_code == 401
+    assert client.get(path, headers=headers).status_code == 200
@@ -0,0 +1,34 @@
+# test_migrate.py
+# Adopting a database made by the old import-time create_all. The committed
+# task_management.db predates the migrations; the upgrade runs in its own
+# interpreter since the migrations bind to database.engine.
+import os
+import shutil
+import subprocess
+import sys
+
+from sqlalchemy import create_engine, inspect
+
+import migrate
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_legacy_database_gets_the_later_indexes(tmp_path):
+    path = tmp_path / "legacy.db"
+    shutil.copy(os.path.join(BACKEND, "task_management.db"), path)
+    url = f"sqlite:///{path}"
+    subprocess.run(
+        [sys.executable, "migrate.py", "upgrade"], cwd=BACKEND, env=dict(os.environ, DATABASE_URL=url),
+        check=True, capture_output=True,
+    )
+
+    legacy = create_engine(url)
+    try:
+        inspector = inspect(legacy)
+        names = {index["name"] for table in ("tasks", "members") for index in inspector.get_indexes(table)}
+        assert migrate.ADOPTED_INDEXES["0002"] <= names
+        for table in migrate.ADOPTED_TABLES.values():
+            assert inspector.has_table(table)
+    finally:
+        legacy.dispose()
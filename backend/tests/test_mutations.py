@@ -0,0 +1,49 @@
+# test_mutations.py
+# Statements per single-row edit, against the budgets benchmarks/
+# bench_mutations.py reports on: a SELECT-before-UPDATE or a refresh coming
+# back fails here.
+import pytest
+
+TASK = {
+    "title": "Quarterly report", "start_date": "2024-03-01T09:00:00", "end_date": "2024-03-04T17:00:00",
+    "priority": "high",
+}
+# (method, path, body, statement budget); budgets include the table_versions
+# bump and task_changes row, and for counted columns the old-value read and
+# the task_stats upsert
+CASES = [
+    ("PATCH", "/api/tasks/{task}", {"title": "Renamed"}, 4),
+    ("PATCH", "/api/tasks/{task}", {"priority": "low"}, 6),
+    ("PATCH", "/api/tasks/{task}/status", {"status": "completed"}, 6),
+    ("PUT", "/api/tasks/{task}", TASK, 6),
+    ("PATCH", "/api/tasks/0", {"title": "Renamed"}, 1),
+    ("PATCH", "/api/members/{member}", {"role": "lead"}, 5),
+    ("PUT", "/api/members/{member}", {"name": "Ada", "email": "ada@example.com"}, 5),
+    ("PATCH", "/api/teams/{team}", {"description": "Core services"}, 4),
+    ("PUT", "/api/teams/{team}", {"name": "Platform"}, 4),
+]
+
+
+@pytest.fixture(scope="module")
+def rows(client, headers):
+    team = client.post("/api/teams", json={"name": "Platform"}, headers=headers).json()["id"]
+    member = client.post("/api/members", json={
+        "name": "Ada", "email": "ada@example.com", "team_id": team,
+    }, headers=headers).json()["id"]
+    task = client.post("/api/tasks", json=dict(TASK, assignee_id=member, team_id=team), headers=headers).json()["id"]
+    return {"team": team, "member": member, "task": task}
+
+
+@pytest.mark.parametrize("method, path, body, budget", CASES)
+def test_edit_stays_within_statement_budget(client, headers, statements, rows, method, path, body, budget):
+    url = path.format(**rows)
+    if path.startswith("/api/tasks/{task}") and method == "PUT":
+        body = dict(body, assignee_id=rows["member"], team_id=rows["team"])
+    elif path.startswith("/api/members") and method == "PUT":
+        body = dict(body, team_id=rows["team"])
+    # Warms the principal cache, so authentication is not counted
+    client.get("/api/stats/tasks", headers=headers)
+    statements.clear()
+    response = client.request(method, url, json=body, headers=headers)
+    assert response.status_code == (404 if url == "/api/tasks/0" else 200), response.text
+    assert len(statements) <= budget, statements
@@ -0,0 +1,31 @@
+# test_stream.py
+# Task stream scopes: a task moved to another team, or left without one by
+# a team delete, still reaches the subscribers of the team it left.
+from stream import Broker, Subscription
+
+
+def test_moved_task_reaches_old_and_new_scope(client, headers):
+    old, new = (client.post("/api/teams", json={"name": name}, headers=headers).json()["id"]
+                for name in ("Stream old", "Stream new"))
+    member = client.post(
+        "/api/members", json={"name": "Streamer", "email": "streamer@example.com"}, headers=headers
+    ).json()["id"]
+    task = client.post("/api/tasks", json={
+        "title": "Moves", "start_date": "2024-03-01T09:00:00", "end_date": "2024-03-04T17:00:00",
+        "assignee_id": member, "team_id": old,
+    }, headers=headers).json()["id"]
+
+    broker = Broker()
+    head = broker.head()
+    watchers = {team: Subscription(head, team_id=team) for team in (old, new)}
+
+    assert client.patch(f"/api/tasks/{task}", json={"team_id": new}, headers=headers).status_code == 200
+    moved = broker.read(head)
+    scopes = [(change["id"], change["team_id"], change["previous_team_id"]) for change in moved]
+    assert scopes == [(task, new, old)]
+    assert all(watcher.matches(moved[0]) for watcher in watchers.values())
+
+    assert client.delete(f"/api/teams/{new}", headers=headers).status_code == 200
+    orphaned = broker.read(moved[-1]["token"])
+    assert [(change["id"], change["team_id"]) for change in orphaned] == [(task, None)]
+    assert watchers[new].matches(orphaned[0]) and not watchers[old].matches(orphaned[0])
@@ -0,0 +1,33 @@
+# test_sweeper.py
+# One overdue sweep over a mix of expired and current tasks, in batches
+# smaller than the work, against the task_stats summary.
+import stats
+from database import SessionLocal
+from sweeper import OverdueSweeper
+
+
+def test_sweep_marks_only_expired_open_tasks(client, headers):
+    member = client.post(
+        "/api/members", json={"name": "Sweep", "email": "sweep@example.com"}, headers=headers
+    ).json()["id"]
+    tasks = [
+        {"title": f"Sweep {status} {due}", "status": status, "start_date": "2020-01-01T09:00:00",
+         "end_date": f"{due}T17:00:00", "assignee_id": member}
+        for status in ("pending", "in_progress", "completed")
+        for due in ("2020-01-02", "2020-01-03", "2999-01-01")
+    ]
+    response = client.post("/api/tasks/bulk", json={"tasks": tasks}, headers=headers)
+    assert response.status_code == 200, response.text
+    ids = [result["id"] for result in response.json()["results"]]
+
+    with SessionLocal() as db:
+        changed = OverdueSweeper(batch_size=1).sweep(db)
+        assert changed["pending"] >= 2 and changed["in_progress"] >= 2
+        assert stats.check(db) == []
+
+    statuses = [client.get(f"/api/tasks/{task_id}", headers=headers).json()["status"] for task_id in ids]
+    assert statuses == [
+        "overdue", "overdue", "pending",
+        "overdue", "overdue", "in_progress",
+        "completed", "completed", "completed",
+    ]
@@ -0,0 +1,63 @@
+# test_task_indexes.py
+# The filter shapes TaskListView and TaskCalendarView send are planned on
+# the composite indexes from migration 0002. PostgreSQL runs when
+# TEST_POSTGRES_URL points at a database it may create tables in; the
+# tables are created and dropped inside one rolled-back transaction.
+from datetime import datetime
+
+import pytest
+from sqlalchemy import select
+
+import models
+from database import engine
+
+DUE = datetime(2024, 3, 15)
+MONTH_END = datetime(2024, 4, 15)
+Task = models.Task
+
+SHAPES = [
+    ("ix_tasks_assignee_id_status", select(Task).where(Task.assignee_id == 1, Task.status == "pending")),
+    (
+        "ix_tasks_team_id_status_end_date",
+        select(Task).where(Task.team_id == 1, Task.status == "pending", Task.end_date < DUE),
+    ),
+    ("ix_tasks_status_end_date", select(Task).where(Task.status == "in_progress", Task.end_date < DUE)),
+    # The calendar's month window and the list's date-range filter
+    (
+        "ix_tasks_start_date_end_date",
+        select(Task).where(Task.start_date < MONTH_END, Task.end_date >= DUE).order_by(Task.start_date, Task.id),
+    ),
+]
+
+
+def explain(connection, statement, prefix: str) -> str:
+    compiled = statement.compile(dialect=connection.dialect)
+    if compiled.positiontup is not None:
+        parameters = tuple(compiled.params[name] for name in compiled.positiontup)
+    else:
+        parameters = compiled.params
+    rows = connection.exec_driver_sql(prefix + str(compiled), parameters).all()
+    return "\n".join(str(row[-1]) for row in rows)
+
+
+@pytest.mark.parametrize("index, statement", SHAPES, ids=[index for index, _ in SHAPES])
+def test_sqlite_filter_uses_index(index, statement):
+    if engine.dialect.name != "sqlite":
+        pytest.skip("the suite database is not SQLite")
+    with engine.connect() as connection:
+        plan = explain(connection, statement, "EXPLAIN QUERY PLAN ")
+    assert index in plan, plan
+
+
+@pytest.mark.parametrize("index, statement", SHAPES, ids=[index for index, _ in SHAPES])
+def test_postgres_filter_uses_index(postgres, index, statement):
+    with postgres.connect() as connection:
+        transaction = connection.begin()
+        try:
+            models.Base.metadata.create_all(connection)
+            # An empty table is cheapest to scan; ask whether the index is usable
+            connection.exec_driver_sql("SET LOCAL enable_seqscan = off")
+            plan = explain(connection, statement, "EXPLAIN ")
+        finally:
+            transaction.rollback()
+    assert index in plan, plan
@@ -0,0 +1,36 @@
+# test_task_stats.py
+# The task_stats summary has to match a recount after every kind of write,
+# including deletes that change tasks only through a foreign key.
+import stats
+from database import SessionLocal
+
+
+def assert_summary_matches():
+    with SessionLocal() as db:
+        assert stats.check(db) == []
+
+
+def test_deleting_team_and_member_moves_their_tasks_to_none(client, headers):
+    team = client.post("/api/teams", json={"name": "Stats team"}, headers=headers).json()["id"]
+    member = client.post("/api/members", json={
+        "name": "Stats member", "email": "stats@example.com", "team_id": team,
+    }, headers=headers).json()["id"]
+    tasks = [
+        {
+            "title": f"Stats task {index}", "status": "pending",
+            "start_date": "2024-03-01T09:00:00", "end_date": "2024-03-02T17:00:00",
+            "assignee_id": member, "team_id": team,
+        }
+        for index in range(3)
+    ]
+    assert client.post("/api/tasks/bulk", json={"tasks": tasks}, headers=headers).status_code == 200
+    assert_summary_matches()
+
+    assert client.delete(f"/api/members/{member}", headers=headers).status_code == 200
+    assert_summary_matches()
+    assert client.delete(f"/api/teams/{team}", headers=headers).status_code == 200
+    assert_summary_matches()
+
+    summary = client.get("/api/stats/tasks", headers=headers).json()
+    assert str(team) not in summary["by_team"]
+    assert str(member) not in summary["by_assignee"]
@@ -0,0 +1,70 @@
+# versions.py
+# Per-table change versions stored in table_versions. Every crud write bumps
+# the versions of the tables it touched before committing, so a version read
+# from any worker process changes whenever the data behind it may have.
+from typing import Dict, Iterable
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+import models
+
+# Tables each response shape reads: tasks embed their assignee (with its
+# team) and team, members embed their team
+TASK_TABLES = ("tasks", "members", "teams")
+MEMBER_TABLES = ("members", "teams")
+TEAM_TABLES = ("teams",)
+
+MEMO_KEY = "table_versions"
+
+
+def upsert_statement(dialect_name: str):
+    table = models.TableVersion.__table__
+    if dialect_name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect_name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        return None
+    statement = insert(table)
+    return statement.on_conflict_do_update(
+        index_elements=[table.c.table_name],
+        set_={"version": table.c.version + 1},
+    )
+
+
+def bump(db: Session, *tables: str):
+    # Sorted so concurrent writers take the row locks in the same order
+    tables = sorted(set(tables))
+    memo = db.info.get(MEMO_KEY)
+    if memo:
+        for name in tables:
+            memo.pop(name, None)
+    statement = upsert_statement(db.get_bind().dialect.name)
+    if statement is not None:
+        db.execute(statement, [{"table_name": name, "version": 1} for name in tables])
+        return
+
+    table = models.TableVersion.__table__
+    for name in tables:
+        result = db.execute(
+            update(table).where(table.c.table_name == name).values(version=table.c.version + 1)
+        )
+        if not result.rowcount:
+            db.execute(table.insert().values(table_name=name, version=1))
+
+
+def current(db: Session, tables: Iterable[str]) -> Dict[str, int]:
+    # Memoized on the session, so the ETag check and the read cache in one
+    # request share a single lookup; bump() drops the entries it changes
+    tables = sorted(set(tables))
+    memo = db.info.setdefault(MEMO_KEY, {})
+    missing = [name for name in tables if name not in memo]
+    if missing:
+        rows = dict(db.execute(
+            select(models.TableVersion.table_name, models.TableVersion.version)
+            .where(models.TableVersion.table_name.in_(missing))
+        ).all())
+        for name in missing:
+            memo[name] = rows.get(name, 0)
+    return {name: memo[name] for name in tables}
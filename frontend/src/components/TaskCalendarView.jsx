@@ -1,13 +1,15 @@
 // TaskCalendarView.jsx
 import React, { useState, useEffect } from 'react';
 import { Calendar, Badge, Select, Spin, message } from 'antd';
-import { getTasks, getMembers, getTeams } from '../services/api';
-import moment from 'moment';
+import { getTaskCalendar, getMembers, getTeams } from '../services/api';
+import dayjs from 'dayjs';
 
 const { Option } = Select;
 
 const TaskCalendarView = () => {
-  const [tasks, setTasks] = useState([]);
+  // date (YYYY-MM-DD) -> tasks on that day, built from the server's day buckets
+  const [tasksByDate, setTasksByDate] = useState({});
+  const [panelDate, setPanelDate] = useState(dayjs());
   const [loading, setLoading] = useState(false);
   const [members, setMembers] = useState([]);
   const [teams, setTeams] = useState([]);
@@ -36,23 +38,39 @@ const TaskCalendarView = () => {
 
   useEffect(() => {
     fetchTasks();
-  }, [filters]);
+  }, [filters, panelDate]);
 
   const fetchTasks = async () => {
     try {
       setLoading(true);
-      const queryParams = {};
+      // The month grid shows six weeks starting on the week of the 1st
+      const gridStart = panelDate.startOf('month').startOf('week');
+      const queryParams = {
+        from: gridStart.format('YYYY-MM-DD'),
+        to: gridStart.add(41, 'day').format('YYYY-MM-DD'),
+        granularity: 'day'
+      };
 
       if (filters.memberId) {
-        queryParams.memberId = filters.memberId;
+        queryParams.member_id = filters.memberId;
       }
 
       if (filters.teamId) {
-        queryParams.teamId = filters.teamId;
+        queryParams.team_id = filters.teamId;
       }
 
-      const tasksData = await getTasks(queryParams);
-      setTasks(tasksData);
+      const calendar = await getTaskCalendar(queryParams);
+      const byDate = {};
+      calendar.buckets.forEach(bucket => {
+        byDate[bucket.start] = [];
+      });
+      // Each task comes once with the range of buckets it spans
+      calendar.tasks.forEach(task => {
+        for (let index = task.first_bucket; index <= task.last_bucket; index++) {
+          byDate[calendar.buckets[index].start].push(task);
+        }
+      });
+      setTasksByDate(byDate);
     } catch (error) {
       message.error('Failed to load tasks');
       console.error(error);
@@ -69,12 +87,7 @@ const TaskCalendarView = () => {
   };
 
   const getTasksForDate = (date) => {
-    const dateStr = date.format('YYYY-MM-DD');
-    return tasks.filter(task => {
-      const startDate = moment(task.startDate);
-      const endDate = moment(task.endDate);
-      return date.isSameOrAfter(startDate, 'day') && date.isSameOrBefore(endDate, 'day');
-    });
+    return tasksByDate[date.format('YYYY-MM-DD')] || [];
   };
 
   const dateCellRender = (date) => {
@@ -136,6 +149,7 @@ const TaskCalendarView = () => {
       <Spin spinning={loading}>
         <Calendar
           dateCellRender={dateCellRender}
+          onPanelChange={(date) => setPanelDate(date)}
         />
       </Spin>
     </div>
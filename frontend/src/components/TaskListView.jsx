@@ -1,5 +1,5 @@
 // TaskListView.jsx
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import {
   Table,
   Tag,
@@ -16,7 +16,15 @@ import {
   CheckCircleOutlined,
   SearchOutlined
 } from '@ant-design/icons';
-import { getTasks, updateTaskStatus, deleteTask, getMembers, getTeams } from '../services/api';
+import {
+  getTasks,
+  updateTaskStatus,
+  deleteTask,
+  getMembers,
+  getTeams,
+  openTaskStream,
+  syncTasks
+} from '../services/api';
 import moment from 'moment';
 
 const { Option } = Select;
@@ -57,18 +65,30 @@ const TaskListView = () => {
     fetchTasks();
   }, [filters]);
 
+  // Sync token the list is current as of; pushed changes are applied as
+  // deltas from here (see syncChanges)
+  const syncTokenRef = useRef(null);
+
   const fetchTasks = async () => {
     try {
       setLoading(true);
 
-      const queryParams = {};
+      // Taken before the load, so a change that races it is applied again
+      // afterwards rather than missed; upserts are idempotent
+      const { token } = await syncTasks();
+
+      // Only the columns the table renders; skips descriptions and full
+      // assignee/team objects
+      const queryParams = {
+        fields: 'id,title,status,priority,start_date,end_date,assignee.name,team.name'
+      };
 
       if (filters.memberId) {
-        queryParams.memberId = filters.memberId;
+        queryParams.member_id = filters.memberId;
       }
 
       if (filters.teamId) {
-        queryParams.teamId = filters.teamId;
+        queryParams.team_id = filters.teamId;
       }
 
       if (filters.status) {
@@ -76,8 +96,8 @@ const TaskListView = () => {
       }
 
       if (filters.dateRange) {
-        queryParams.startDate = filters.dateRange[0].format('YYYY-MM-DD');
-        queryParams.endDate = filters.dateRange[1].format('YYYY-MM-DD');
+        queryParams.start_date = filters.dateRange[0].format('YYYY-MM-DD');
+        queryParams.end_date = filters.dateRange[1].format('YYYY-MM-DD');
       }
 
       if (filters.search) {
@@ -86,6 +106,7 @@ const TaskListView = () => {
 
       const tasksData = await getTasks(queryParams);
       setTasks(tasksData);
+      syncTokenRef.current = token;
     } catch (error) {
       message.error('Failed to load tasks');
       console.error(error);
@@ -94,6 +115,87 @@ const TaskListView = () => {
     }
   };
 
+  // The server-side filters, for tasks that arrive through sync
+  const matchesFilters = (task) => {
+    if (filters.memberId && task.assignee_id !== filters.memberId) {
+      return false;
+    }
+    if (filters.teamId && task.team_id !== filters.teamId) {
+      return false;
+    }
+    if (filters.status && task.status !== filters.status) {
+      return false;
+    }
+    if (filters.dateRange) {
+      const [start, end] = filters.dateRange.map(date => moment(date.format('YYYY-MM-DD')));
+      if (moment(task.start_date).isAfter(end) || moment(task.end_date).isBefore(start)) {
+        return false;
+      }
+    }
+    return true;
+  };
+
+  // Applies the changes since the list's token: changed tasks are replaced,
+  // or dropped when they no longer match the filters, deleted ones removed
+  const syncChanges = async () => {
+    if (filters.search || syncTokenRef.current === null) {
+      // Search matches and ranks server side; reload instead
+      return fetchTasks();
+    }
+    let changes;
+    do {
+      changes = await syncTasks(syncTokenRef.current);
+      if (changes.reset) {
+        // The token fell out of the change log
+        return fetchTasks();
+      }
+      syncTokenRef.current = changes.token;
+      const changed = new Set([...changes.deleted, ...changes.upserted.map(task => task.id)]);
+      const upserted = changes.upserted.filter(matchesFilters);
+      setTasks(current => [
+        ...current.filter(task => !changed.has(task.id)),
+        ...upserted
+      ].sort((a, b) => a.id - b.id));
+    } while (changes.has_more);
+  };
+
+  // Follow server-pushed changes instead of polling. Bursts of events (bulk
+  // edits, imports) are coalesced into one sync; only "resync", sent when
+  // this stream fell behind, reloads the whole list.
+  const fetchTasksRef = useRef(fetchTasks);
+  fetchTasksRef.current = fetchTasks;
+  const syncChangesRef = useRef(syncChanges);
+  syncChangesRef.current = syncChanges;
+  useEffect(() => {
+    const params = {};
+    if (filters.memberId) {
+      params.member_id = filters.memberId;
+    }
+    if (filters.teamId) {
+      params.team_id = filters.teamId;
+    }
+    const source = openTaskStream(params);
+    let timer = null;
+    let reload = false;
+    // One sync or reload at a time, in order
+    let running = Promise.resolve();
+    const schedule = (fullReload) => {
+      reload = reload || fullReload;
+      clearTimeout(timer);
+      timer = setTimeout(() => {
+        const run = reload ? fetchTasksRef.current : syncChangesRef.current;
+        reload = false;
+        running = running.then(run).catch(error => console.error(error));
+      }, 300);
+    };
+    source.addEventListener('task', () => schedule(false));
+    source.addEventListener('resync', () => schedule(true));
+    return () => {
+      clearTimeout(timer);
+      source.close();
+    };
+  }, [filters.memberId, filters.teamId]);
+
   const handleFilterChange = (filterType, value) => {
     setFilters(prevFilters => ({
       ...prevFilters,
@@ -36,6 +36,27 @@ export const getTasks = async (params = {}) => {
   return response.data;
 };
 
+// Calendar buckets and the tasks in them: { buckets: [{ start, count }],
+// tasks: [{ ..., first_bucket, last_bucket }] }, each task listed once
+export const getTaskCalendar = async (params = {}) => {
+  const response = await api.get('/tasks/calendar', { params });
+  return response.data;
+};
+
+// Task changes after a sync token: { token, reset, has_more, upserted: [task],
+// deleted: [id] }. Without a token it only returns the current one.
+export const syncTasks = async (since) => {
+  const response = await api.get('/sync/tasks', { params: since ? { since } : {} });
+  return response.data;
+};
+
+// Server-Sent Events for task changes; EventSource cannot send headers, so
+// the token goes in the query string. Listen for 'task' and 'resync' events.
+export const openTaskStream = (params = {}) => {
+  const query = new URLSearchParams({ ...params, token: localStorage.getItem('token') || '' });
+  return new EventSource(`${api.defaults.baseURL}/stream/tasks?${query}`);
+};
+
 export const getTaskById = async (id) => {
   const response = await api.get(`/tasks/${id}`);
   return response.data;